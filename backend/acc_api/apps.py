@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AccApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'acc_api'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,89 @@
+"""
+JWT authentication with an in-process user cache
+simplejwt's JWTAuthentication loads the User row on every request. This
+subclass keeps recently seen users for AUTH_USER_CACHE_TTL seconds, keyed by
+the token's user id claim, so hot endpoints skip that query. Entries are
+dropped as soon as the user is saved or deleted in this process (see
+signals.py); other processes pick up changes when the TTL runs out.
+"""
+
+import collections
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+class UserCache:
+    """Bounded LRU of user id -> (expires_at, user)."""
+
+    def __init__(self, ttl, max_size):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._users = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None or entry[0] <= now:
+                self._users.pop(user_id, None)
+                self.misses += 1
+                return None
+            self._users.move_to_end(user_id)
+            self.hits += 1
+            # Each request gets its own instance, so a view mutating request.user can't leak
+            return copy.copy(entry[1])
+
+    def set(self, user_id, user):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._users[user_id] = (time.monotonic() + self.ttl, copy.copy(user))
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._users), "hits": self.hits, "misses": self.misses}
+
+
+user_cache = UserCache(ttl=settings.AUTH_USER_CACHE_TTL, max_size=settings.AUTH_USER_CACHE_SIZE)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that serves the token's user from user_cache when it can."""
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)  # raises the usual InvalidToken
+        key = str(user_id)
+        user = user_cache.get(key)
+        if user is None:
+            # Loads the row and runs simplejwt's active/revocation checks
+            user = super().get_user(validated_token)
+            user_cache.set(key, user)
+        elif api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            # Same check as simplejwt, against the cached password hash
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
@@ -0,0 +1,223 @@
+"""
+Concurrent database load test for the configured DATABASE_URL.
+
+Runs the same mixed workload (contact edits and Google token refreshes
+against contact list reads) from several threads, once per profile, each on
+its own throwaway database:
+
+    python manage.py db_loadtest                     # tuned vs baseline
+    python manage.py db_loadtest --threads 16 --ops 500 --write-ratio 0.5
+    python manage.py db_loadtest --profiles tuned --output db_load.json
+
+"tuned" is the profile settings.py builds (backend/database.py); "baseline"
+is the same database with Django's defaults. Each operation ends the way a
+request does, with close_if_unusable_or_obsolete(), so connection reuse and
+pooling show up in the numbers.
+"""
+
+import json
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+
+from backend.database import POSTGRES_ENGINE, SQLITE_ENGINE, postgres_database, sqlite_database
+from contact_api.models import Contacts
+from gmailapi.models import GoogleCredentials
+
+ALIAS = "db_loadtest"
+CONNECTION_KEYS = ("NAME", "USER", "PASSWORD", "HOST", "PORT")
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+class Command(BaseCommand):
+    help = "Compare database profiles under concurrent reads and writes on throwaway databases."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--ops", type=int, default=300, help="operations per thread")
+        parser.add_argument("--write-ratio", type=float, default=0.3)
+        parser.add_argument("--contacts", type=int, default=200, help="contacts per thread's user")
+        parser.add_argument("--profiles", default="tuned,baseline", help="comma-separated: tuned, baseline")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="write the results as JSON")
+
+    def handle(self, *args, **options):
+        configured = settings.DATABASES["default"]
+        engine = configured["ENGINE"]
+        if engine not in (SQLITE_ENGINE, POSTGRES_ENGINE, "django.db.backends.postgresql_psycopg2"):
+            raise CommandError(f"No profiles for {engine}")
+        profiles = [p.strip() for p in options["profiles"].split(",") if p.strip()]
+        unknown = set(profiles) - {"tuned", "baseline"}
+        if unknown:
+            raise CommandError(f"Unknown profiles: {', '.join(sorted(unknown))}")
+
+        results = []
+        for profile in profiles:
+            with tempfile.TemporaryDirectory() as tmp:
+                config = self._profile_config(configured, profile, Path(tmp))
+                self.stdout.write(f"{profile}: {self._describe(config)}")
+                results.append(self._run_profile(profile, config, options))
+        self._report(results)
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps({"engine": engine, "results": results}, indent=2))
+            self.stdout.write(f"Wrote {options['output']}")
+
+    def _profile_config(self, configured, profile, tmp):
+        if profile == "tuned":
+            config = dict(configured)
+        else:
+            base = {key: configured.get(key, "") for key in CONNECTION_KEYS}
+            if configured["ENGINE"] == SQLITE_ENGINE:
+                config = sqlite_database(base, tuned=False)
+            else:
+                config = postgres_database(base, tuned=False)
+        test = dict(configured.get("TEST") or {})
+        if config["ENGINE"] == SQLITE_ENGINE:
+            # A real file: WAL and locking don't apply to in-memory databases
+            test["NAME"] = str(tmp / f"{profile}.sqlite3")
+        else:
+            test["NAME"] = f"test_db_loadtest_{profile}"
+        config["TEST"] = test
+        return config
+
+    @staticmethod
+    def _describe(config):
+        options = config.get("OPTIONS") or {}
+        if config["ENGINE"] == SQLITE_ENGINE:
+            return (f"sqlite timeout={options.get('timeout', 5)} "
+                    f"transaction_mode={options.get('transaction_mode', 'DEFERRED')} "
+                    f"init_command={options.get('init_command', '-')!r}")
+        return (f"postgres CONN_MAX_AGE={config.get('CONN_MAX_AGE', 0)} "
+                f"health_checks={config.get('CONN_HEALTH_CHECKS', False)} pool={options.get('pool', False)}")
+
+    def _run_profile(self, profile, config, options):
+        # Fill in Django's per-database defaults; create_test_db() also reads
+        # the alias back from settings
+        config = connections.configure_settings({"default": config})["default"]
+        settings.DATABASES[ALIAS] = config
+        connections.settings[ALIAS] = config
+        connection = connections[ALIAS]
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            users = self._seed(options["threads"], options["contacts"])
+            latencies = {"read": [], "write": []}
+            errors = Counter()
+            lock = threading.Lock()
+            barrier = threading.Barrier(options["threads"])
+
+            def worker(index, user_id):
+                rng = random.Random(options["seed"] * 1000 + index)
+                local = {"read": [], "write": []}
+                local_errors = Counter()
+                contact_ids = list(Contacts.objects.using(ALIAS).filter(user_id=user_id).values_list("id", flat=True))
+                connections[ALIAS].close()
+                barrier.wait()
+                for _ in range(options["ops"]):
+                    kind = "write" if rng.random() < options["write_ratio"] else "read"
+                    started = time.perf_counter()
+                    try:
+                        if kind == "write":
+                            self._write(rng, user_id, contact_ids)
+                        else:
+                            self._read(user_id)
+                        local[kind].append(1000 * (time.perf_counter() - started))
+                    except OperationalError as e:
+                        local_errors[str(e).split("\n")[0][:80]] += 1
+                    finally:
+                        # End of "request"
+                        connections[ALIAS].close_if_unusable_or_obsolete()
+                connections[ALIAS].close()
+                with lock:
+                    for key in local:
+                        latencies[key].extend(local[key])
+                    errors.update(local_errors)
+
+            threads = [threading.Thread(target=worker, args=(i, user_id)) for i, user_id in enumerate(users)]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            connection.close()
+            if hasattr(connection, "close_pool"):
+                connection.close_pool()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            del connections[ALIAS]
+            connections.settings.pop(ALIAS, None)
+            settings.DATABASES.pop(ALIAS, None)
+
+        all_ms = latencies["read"] + latencies["write"]
+        return {
+            "profile": profile,
+            "threads": options["threads"],
+            "ops": len(all_ms),
+            "errors": sum(errors.values()),
+            "error_kinds": dict(errors),
+            "elapsed_s": round(elapsed, 3),
+            "ops_per_s": round(len(all_ms) / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": round(percentile(all_ms, 50), 2),
+            "p99_ms": round(percentile(all_ms, 99), 2),
+            "read_p50_ms": round(percentile(latencies["read"], 50), 2),
+            "write_p50_ms": round(percentile(latencies["write"], 50), 2),
+            "write_p99_ms": round(percentile(latencies["write"], 99), 2),
+            "mean_ms": round(statistics.fmean(all_ms), 2) if all_ms else 0.0,
+        }
+
+    @staticmethod
+    def _seed(threads, contacts):
+        users = []
+        with transaction.atomic(using=ALIAS):
+            for i in range(threads):
+                user = User.objects.db_manager(ALIAS).create_user(f"loadtest{i}", password=None)
+                GoogleCredentials.objects.using(ALIAS).create(user=user, token="t", token_uri="uri", scopes="s")
+                Contacts.objects.using(ALIAS).bulk_create([
+                    Contacts(user=user, name=f"Contact {i}-{n}", email=f"c{i}-{n}@example.com",
+                             relation=("colleague", "client", "friend")[n % 3], tone="friendly")
+                    for n in range(contacts)
+                ])
+                users.append(user.pk)
+        connections[ALIAS].close()
+        return users
+
+    @staticmethod
+    def _write(rng, user_id, contact_ids):
+        with transaction.atomic(using=ALIAS):
+            if rng.random() < 0.5:
+                # Token refresh, as in gmailapi.views.get_google_credentials
+                GoogleCredentials.objects.using(ALIAS).filter(user_id=user_id).update(token=f"t{rng.random()}")
+            else:
+                contact = Contacts.objects.using(ALIAS).get(pk=rng.choice(contact_ids))
+                contact.tone = rng.choice(("friendly", "formal", "casual"))
+                contact.save(update_fields=["tone"])
+
+    @staticmethod
+    def _read(user_id):
+        list(Contacts.objects.using(ALIAS).filter(user_id=user_id).order_by("name", "id")
+             .values("id", "name", "email", "relation", "tone")[:50])
+        GoogleCredentials.objects.using(ALIAS).get(user_id=user_id)
+
+    def _report(self, results):
+        self.stdout.write(f"\n{'profile':<10}{'ops':>7}{'errors':>8}{'ops/s':>9}{'p50 ms':>9}{'p99 ms':>9}"
+                          f"{'read p50':>10}{'write p50':>11}{'write p99':>11}")
+        for r in results:
+            self.stdout.write(f"{r['profile']:<10}{r['ops']:>7}{r['errors']:>8}{r['ops_per_s']:>9}{r['p50_ms']:>9}"
+                              f"{r['p99_ms']:>9}{r['read_p50_ms']:>10}{r['write_p50_ms']:>11}{r['write_p99_ms']:>11}")
+            for kind, count in r["error_kinds"].items():
+                self.stdout.write(f"  {count} x {kind}")
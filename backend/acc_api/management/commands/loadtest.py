@@ -0,0 +1,325 @@
+"""
+HTTP load test of the mail and contact endpoints against a fake Gmail API.
+
+Swaps googleapiclient's build() in gmailapi.views for benchmarks.fake_gmail
+(realistic message payloads, configurable latency), seeds a throwaway
+database and drives emails/, emails/<id>/, send/ and contactapi/contacts/
+through the full middleware and JWT authentication stack from concurrent
+threads, one level at a time:
+
+    python manage.py loadtest                                   # 1,4,16 threads
+    python manage.py loadtest --concurrency 1,8,32 --requests 800 --gmail-latency 80
+    python manage.py loadtest --output load.json
+    python manage.py loadtest --baseline load.json              # fails on regression
+
+Each level starts with every cache empty (the shared cache, the JWT user
+cache and the contact and autocomplete indexes), so levels are comparable
+with each other and with earlier runs. Threads block in the fake's sleeps the way a
+threaded WSGI worker blocks on Google, so the numbers are for one process.
+"""
+
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from acc_api.authentication import user_cache
+from benchmarks.fake_gmail import FakeGmail
+from contact_api import resolve
+from contact_api.models import Contacts
+from gmailapi import autocomplete, views as gmail_views
+from gmailapi.models import GoogleCredentials
+
+ENDPOINTS = ("emails", "email_detail", "send", "contacts")
+RELATIONS = ("colleague", "client", "friend", "manager", "family")
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def rss_mb():
+    """Current resident set size (Linux), else the peak so far."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return round(int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (2**20 if platform.system() == "Darwin" else 2**10), 1)
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise CommandError(f"Unknown endpoint {name!r} in --mix, expected {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class Command(BaseCommand):
+    help = "Load-test the mail and contact endpoints with a fake Gmail API on a throwaway database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", default="1,4,16", help="comma-separated thread counts")
+        parser.add_argument("--requests", type=int, default=400, help="requests per level")
+        parser.add_argument("--mix", default="emails=3,email_detail=3,send=1,contacts=3",
+                            help="endpoint weights, e.g. emails=3,email_detail=3,send=1,contacts=3")
+        parser.add_argument("--page-size", type=int, default=20, help="max_results for emails/")
+        parser.add_argument("--messages", type=int, default=500, help="messages in the fake mailbox")
+        parser.add_argument("--body-kb", type=float, default=8, help="size of each text and HTML body part")
+        parser.add_argument("--gmail-latency", type=float, default=50.0, help="ms per fake Gmail call")
+        parser.add_argument("--gmail-jitter", type=float, default=10.0, help="extra random ms per call")
+        parser.add_argument("--contacts", type=int, default=500, help="contacts per user")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--access-log", action="store_true", help="keep printing the per-request access log")
+        parser.add_argument("--output", help="write the results as JSON")
+        parser.add_argument("--baseline", help="compare against an earlier --output file")
+        parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression (default 0.2)")
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(c) for c in options["concurrency"].split(",") if c.strip()]
+        except ValueError:
+            raise CommandError("--concurrency takes comma-separated integers")
+        mix = parse_mix(options["mix"])
+        fake = FakeGmail(messages=options["messages"], body_kb=options["body_kb"],
+                         latency_ms=options["gmail_latency"], jitter_ms=options["gmail_jitter"], seed=options["seed"])
+
+        connection = connections["default"]
+        original_build = gmail_views.build
+        access_logger = logging.getLogger("backend.access")
+        # Still formatted per request (it's part of the stack), just not printed
+        access_logger.disabled = not options["access_log"]
+        setup_test_environment()
+        with tempfile.TemporaryDirectory() as tmp:
+            test = connection.settings_dict.setdefault("TEST", {})
+            # A real file, so every thread sees the same SQLite database
+            test["NAME"] = str(Path(tmp) / "loadtest.sqlite3") if connection.vendor == "sqlite" else "test_loadtest"
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            gmail_views.build = fake.build
+            try:
+                users = self._seed(max(levels), options["contacts"], fake.address)
+                results = []
+                for concurrency in levels:
+                    result = self._run_level(concurrency, users, fake, mix, options)
+                    results.append(result)
+                    self.stdout.write(f"c={concurrency}: {result['requests_per_s']} req/s, "
+                                      f"p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms, "
+                                      f"{result['errors']} errors, rss {result['rss_mb']} MB")
+                # Let the address harvester finish before its database goes away
+                autocomplete.harvester.join()
+            finally:
+                gmail_views.build = original_build
+                access_logger.disabled = False
+                connections.close_all()
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+
+        self._report(results)
+        report = {"meta": self._meta(options), "levels": results}
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"Wrote {options['output']}")
+        if options["baseline"]:
+            baseline = json.loads(Path(options["baseline"]).read_text())
+            changed = {k: v for k, v in report["meta"]["options"].items()
+                       if baseline.get("meta", {}).get("options", {}).get(k, v) != v}
+            if changed:
+                # Cache hit rates depend on the workload, so only like-for-like runs compare cleanly
+                self.stderr.write(f"Baseline was run with different options: {', '.join(sorted(changed))}")
+            regressions = self._compare(results, baseline, options["tolerance"])
+            if regressions:
+                raise CommandError("Regressions:\n" + "\n".join(f"  - {r}" for r in regressions))
+            self.stdout.write(f"No regressions against {options['baseline']} (tolerance {options['tolerance']:.0%})")
+
+    @staticmethod
+    def _seed(count, contacts, address):
+        users = []
+        with transaction.atomic():
+            for i in range(count):
+                user = User.objects.create_user(f"loadtest{i}", email=address, password=None)
+                GoogleCredentials.objects.create(user=user, token="fake", refresh_token="fake", token_uri="fake",
+                                                 scopes=" ".join(settings.SCOPES),
+                                                 expiry=timezone.now() + timedelta(days=1))
+                Contacts.objects.bulk_create([
+                    Contacts(user=user, name=f"Contact {n:05d}", email=f"contact{n}.{i}@example.com",
+                             relation=RELATIONS[n % len(RELATIONS)], tone="friendly")
+                    for n in range(contacts)
+                ])
+                users.append(user)
+        return users
+
+    def _run_level(self, concurrency, users, fake, mix, options):
+        # Shared cache and the per-process caches in front of the database
+        caches["default"].clear()
+        user_cache.clear()
+        resolve.clear()
+        autocomplete.clear()
+        tokens = [str(AccessToken.for_user(user)) for user in users]
+        names, weights = list(mix), list(mix.values())
+        message_ids = fake.message_ids
+        gmail_before = dict(fake.calls)
+        latencies = {name: [] for name in ENDPOINTS}
+        errors = Counter()
+        lock = threading.Lock()
+        barrier = threading.Barrier(concurrency)
+        per_thread = [options["requests"] // concurrency + (i < options["requests"] % concurrency)
+                      for i in range(concurrency)]
+
+        def worker(index):
+            rng = random.Random(options["seed"] * 1000 + concurrency * 100 + index)
+            client = Client(headers={"Authorization": f"Bearer {tokens[index % len(tokens)]}"})
+            local = {name: [] for name in ENDPOINTS}
+            local_errors = Counter()
+            barrier.wait()
+            for _ in range(per_thread[index]):
+                name = rng.choices(names, weights)[0]
+                started = time.perf_counter()
+                try:
+                    response = self._request(client, name, rng, message_ids, options["page_size"])
+                    if response.status_code >= 400:
+                        local_errors[f"{name}: HTTP {response.status_code}"] += 1
+                except Exception as e:
+                    local_errors[f"{name}: {type(e).__name__}: {str(e)[:60]}"] += 1
+                local[name].append(1000 * (time.perf_counter() - started))
+            connections.close_all()
+            with lock:
+                for name in ENDPOINTS:
+                    latencies[name].extend(local[name])
+                errors.update(local_errors)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        all_ms = [ms for values in latencies.values() for ms in values]
+        return {
+            "concurrency": concurrency,
+            "requests": len(all_ms),
+            "errors": sum(errors.values()),
+            "error_kinds": dict(errors),
+            "elapsed_s": round(elapsed, 3),
+            "requests_per_s": round(len(all_ms) / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": round(percentile(all_ms, 50), 2),
+            "p99_ms": round(percentile(all_ms, 99), 2),
+            "mean_ms": round(statistics.fmean(all_ms), 2) if all_ms else 0.0,
+            "rss_mb": rss_mb(),
+            "peak_rss_mb": peak_rss_mb(),
+            "gmail_calls": {kind: fake.calls[kind] - gmail_before[kind] for kind in fake.calls},
+            "endpoints": {
+                name: {
+                    "requests": len(values),
+                    "p50_ms": round(percentile(values, 50), 2),
+                    "p99_ms": round(percentile(values, 99), 2),
+                    "mean_ms": round(statistics.fmean(values), 2) if values else 0.0,
+                }
+                for name, values in latencies.items() if values
+            },
+        }
+
+    @staticmethod
+    def _request(client, name, rng, message_ids, page_size):
+        if name == "emails":
+            # Mostly the first page, like an inbox being refreshed
+            page = 0 if rng.random() < 0.7 else rng.randint(1, 4)
+            params = {"max_results": page_size}
+            if page:
+                params["page_token"] = str(page * page_size)
+            return client.get("/emails/", params)
+        if name == "email_detail":
+            return client.get(f"/emails/{rng.choice(message_ids)}/")
+        if name == "send":
+            return client.post("/send/", {"to": f"contact{rng.randint(0, 99)}.0@example.com",
+                                          "subject": "Load test", "body": "Hello from the load test."},
+                               content_type="application/json")
+        params = rng.choice([{}, {"relation": rng.choice(RELATIONS)}, {"name": "Contact 0"}, {"page_size": 200}])
+        return client.get("/contactapi/contacts/", params)
+
+    @staticmethod
+    def _meta(options):
+        try:
+            commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                    cwd=settings.BASE_DIR, timeout=5).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            commit = None
+        return {
+            "commit": commit,
+            "created_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": settings.DATABASES["default"]["ENGINE"],
+            "cache": settings.CACHES["default"]["BACKEND"],
+            "options": {k: options[k] for k in ("concurrency", "requests", "mix", "page_size", "messages", "body_kb",
+                                                "gmail_latency", "gmail_jitter", "contacts", "seed")},
+        }
+
+    @staticmethod
+    def _compare(results, baseline, tolerance):
+        """Regressions against a previous --output file."""
+        previous = {level["concurrency"]: level for level in baseline.get("levels", [])}
+        regressions = []
+        for level in results:
+            old = previous.get(level["concurrency"])
+            if old is None:
+                continue
+            c = level["concurrency"]
+            if level["requests_per_s"] < old["requests_per_s"] * (1 - tolerance):
+                regressions.append(f"c={c}: throughput {old['requests_per_s']} -> {level['requests_per_s']} req/s")
+            if level["p99_ms"] > old["p99_ms"] * (1 + tolerance):
+                regressions.append(f"c={c}: p99 {old['p99_ms']} -> {level['p99_ms']} ms")
+            for name, stats in level["endpoints"].items():
+                old_stats = old.get("endpoints", {}).get(name)
+                if old_stats and stats["p50_ms"] > old_stats["p50_ms"] * (1 + tolerance):
+                    regressions.append(f"c={c}: {name} p50 {old_stats['p50_ms']} -> {stats['p50_ms']} ms")
+            if level["errors"] > old["errors"]:
+                regressions.append(f"c={c}: errors {old['errors']} -> {level['errors']}")
+        return regressions
+
+    def _report(self, results):
+        self.stdout.write(f"\n{'c':>4}{'reqs':>7}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'rss MB':>9}"
+                          + "".join(f"{name + ' p50':>18}" for name in ENDPOINTS))
+        for r in results:
+            self.stdout.write(f"{r['concurrency']:>4}{r['requests']:>7}{r['errors']:>8}{r['requests_per_s']:>9}"
+                              f"{r['p50_ms']:>9}{r['p99_ms']:>9}{r['rss_mb']!s:>9}"
+                              + "".join(f"{r['endpoints'].get(name, {}).get('p50_ms', '-')!s:>18}" for name in ENDPOINTS))
+            for kind, count in r["error_kinds"].items():
+                self.stdout.write(f"  {count} x {kind}")
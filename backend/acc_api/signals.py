@@ -0,0 +1,10 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import user_cache
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate(str(instance.pk))
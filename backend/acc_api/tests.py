@@ -1,3 +1,100 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import CachedJWTAuthentication, UserCache, user_cache
+
+
+class UserCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 100.0
+        patcher = mock.patch("acc_api.authentication.time.monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_entries_expire_after_the_ttl(self):
+        cache = UserCache(ttl=60, max_size=10)
+        cache.set("1", User(pk=1, username="a"))
+        self.now += 59
+        self.assertEqual(cache.get("1").username, "a")
+        self.now += 1
+        self.assertIsNone(cache.get("1"))
+        self.assertEqual(cache.stats(), {"size": 0, "hits": 1, "misses": 1})
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = UserCache(ttl=60, max_size=2)
+        cache.set("1", User(pk=1))
+        cache.set("2", User(pk=2))
+        cache.get("1")
+        cache.set("3", User(pk=3))
+        self.assertIsNone(cache.get("2"))
+        self.assertIsNotNone(cache.get("1"))
+
+    def test_each_hit_is_a_separate_copy(self):
+        cache = UserCache(ttl=60, max_size=10)
+        cache.set("1", User(pk=1, username="a"))
+        cache.get("1").username = "changed"
+        self.assertEqual(cache.get("1").username, "a")
+
+    def test_zero_ttl_disables_the_cache(self):
+        cache = UserCache(ttl=0, max_size=10)
+        cache.set("1", User(pk=1))
+        self.assertIsNone(cache.get("1"))
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        # override_settings(SIMPLE_JWT=...) rebinds a global the importers never see
+        patcher = mock.patch.object(api_settings, "CHECK_REVOKE_TOKEN", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.user = User.objects.create_user("owner", password="old-password")
+        self.token = AccessToken.for_user(self.user)
+
+    def authenticate(self, token=None):
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token or self.token}")
+        user, _ = CachedJWTAuthentication().authenticate(request)
+        return user
+
+    def test_cached_hit_skips_the_user_query(self):
+        with self.assertNumQueries(1):
+            self.authenticate()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate().pk, self.user.pk)
+
+    def test_deactivated_user_is_rejected_once_saved(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed) as ctx:
+            self.authenticate()
+        self.assertEqual(ctx.exception.detail["code"], "user_inactive")
+
+    def test_changed_password_is_rejected_once_saved(self):
+        self.authenticate()
+        self.user.set_password("new-password")
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed) as ctx:
+            self.authenticate()
+        self.assertEqual(ctx.exception.detail["code"], "password_changed")
+
+    def test_old_token_is_rejected_against_a_cached_user(self):
+        self.user.set_password("new-password")
+        self.user.save()
+        self.authenticate(AccessToken.for_user(self.user))  # caches the user with the new hash
+        with self.assertNumQueries(0), self.assertRaises(AuthenticationFailed) as ctx:
+            self.authenticate()
+        self.assertEqual(ctx.exception.detail["code"], "password_changed")
+
+    def test_deleted_user_is_rejected(self):
+        self.authenticate()
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed) as ctx:
+            self.authenticate()
+        self.assertEqual(ctx.exception.detail["code"], "user_not_found")
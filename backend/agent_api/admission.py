@@ -0,0 +1,183 @@
+"""
+Admission control for agent runs
+Caps concurrent LangGraph runs per user and globally, queueing the excess
+in a weighted fair queue with a bounded wait.
+"""
+
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted (queue full or wait timed out)."""
+
+    def __init__(self, reason, retry_after=1):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Ticket:
+    __slots__ = ("user_id", "start_tag", "finish_tag", "seq", "enqueued_at", "granted")
+
+    def __init__(self, user_id, start_tag, finish_tag, seq):
+        self.user_id = user_id
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+
+
+class AdmissionController:
+    """
+    Weighted fair admission for agent runs.
+
+    Each waiting request gets a virtual finish tag of
+    ``max(virtual_time, last_tag[user]) + 1 / weight``; when a slot frees up the
+    waiter with the smallest tag whose user is under the per-user cap is
+    admitted. A user firing many requests therefore only advances their own
+    tags and cannot starve others.
+    """
+
+    def __init__(self, max_global, max_per_user, max_queue_depth, max_wait):
+        self.max_global = max_global
+        self.max_per_user = max_per_user
+        self.max_queue_depth = max_queue_depth
+        self.max_wait = max_wait
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._active_by_user = {}
+        self._waiting = []
+        self._last_tag = {}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+
+        # Metrics
+        self._admitted = 0
+        self._rejected_full = 0
+        self._rejected_timeout = 0
+        self._max_depth_seen = 0
+        self._total_wait = 0.0
+        self._max_wait_seen = 0.0
+
+    # --- Public API ---
+    @contextmanager
+    def admit(self, user_id, weight=1.0):
+        """Hold an admission slot for the duration of the ``with`` block."""
+        self.acquire(user_id, weight)
+        try:
+            yield
+        finally:
+            self.release(user_id)
+
+    def acquire(self, user_id, weight=1.0):
+        with self._cond:
+            if not self._waiting and self._has_capacity(user_id):
+                self._grant(user_id, 0.0)
+                return
+
+            if len(self._waiting) >= self.max_queue_depth:
+                self._rejected_full += 1
+                raise AdmissionRejected("Agent queue is full", retry_after=max(1, int(self.max_wait)))
+
+            ticket = self._enqueue(user_id, weight)
+            deadline = ticket.enqueued_at + self.max_wait
+            self._dispatch()
+            while not ticket.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiting.remove(ticket)
+                    self._rejected_timeout += 1
+                    # Our removal may unblock a waiter that was queued behind us
+                    self._dispatch()
+                    raise AdmissionRejected("Timed out waiting for an agent slot", retry_after=max(1, int(self.max_wait)))
+                self._cond.wait(remaining)
+
+    def release(self, user_id):
+        with self._cond:
+            self._active -= 1
+            count = self._active_by_user.get(user_id, 0) - 1
+            if count > 0:
+                self._active_by_user[user_id] = count
+            else:
+                self._active_by_user.pop(user_id, None)
+                if not any(t.user_id == user_id for t in self._waiting):
+                    self._last_tag.pop(user_id, None)
+            self._dispatch()
+
+    def snapshot(self):
+        """Current queue depth and counters, for the health endpoint."""
+        with self._cond:
+            return {
+                "active": self._active,
+                "active_users": len(self._active_by_user),
+                "queue_depth": len(self._waiting),
+                "max_queue_depth_seen": self._max_depth_seen,
+                "admitted": self._admitted,
+                "rejected_queue_full": self._rejected_full,
+                "rejected_timeout": self._rejected_timeout,
+                "avg_wait_ms": round(1000 * self._total_wait / self._admitted, 2) if self._admitted else 0.0,
+                "max_wait_ms": round(1000 * self._max_wait_seen, 2),
+                "limits": {
+                    "global": self.max_global,
+                    "per_user": self.max_per_user,
+                    "queue_depth": self.max_queue_depth,
+                    "max_wait_seconds": self.max_wait,
+                },
+            }
+
+    # --- Internals (caller holds self._cond) ---
+    def _has_capacity(self, user_id):
+        return (
+            self._active < self.max_global
+            and self._active_by_user.get(user_id, 0) < self.max_per_user
+        )
+
+    def _enqueue(self, user_id, weight):
+        start = max(self._virtual_time, self._last_tag.get(user_id, 0.0))
+        ticket = _Ticket(user_id, start, start + 1.0 / max(weight, 0.01), next(self._seq))
+        self._last_tag[user_id] = ticket.finish_tag
+        self._waiting.append(ticket)
+        self._max_depth_seen = max(self._max_depth_seen, len(self._waiting))
+        return ticket
+
+    def _grant(self, user_id, waited):
+        self._active += 1
+        self._active_by_user[user_id] = self._active_by_user.get(user_id, 0) + 1
+        self._admitted += 1
+        self._total_wait += waited
+        self._max_wait_seen = max(self._max_wait_seen, waited)
+
+    def _dispatch(self):
+        granted_any = False
+        while self._waiting and self._active < self.max_global:
+            eligible = [t for t in self._waiting if self._has_capacity(t.user_id)]
+            if not eligible:
+                break
+            ticket = min(eligible, key=lambda t: (t.finish_tag, t.seq))
+            self._waiting.remove(ticket)
+            self._virtual_time = max(self._virtual_time, ticket.start_tag)
+            ticket.granted = True
+            self._grant(ticket.user_id, time.monotonic() - ticket.enqueued_at)
+            granted_any = True
+        if granted_any:
+            self._cond.notify_all()
+
+
+def user_weight(user):
+    """Scheduling weight for a user; staff get a larger share of the queue."""
+    return settings.AGENT_STAFF_WEIGHT if user.is_staff else 1.0
+
+
+controller = AdmissionController(
+    max_global=settings.AGENT_MAX_CONCURRENT_RUNS,
+    max_per_user=settings.AGENT_MAX_CONCURRENT_RUNS_PER_USER,
+    max_queue_depth=settings.AGENT_MAX_QUEUE_DEPTH,
+    max_wait=settings.AGENT_QUEUE_TIMEOUT,
+)
@@ -0,0 +1,239 @@
+"""
+Circuit breaker and cached health state for an HTTP dependency
+"""
+
+import collections
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the dependency while the circuit is open."""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"{name} circuit is open")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Error-rate driven circuit breaker.
+
+    closed    -> calls pass through; outcomes are kept in a sliding time window.
+                 Once the window holds ``min_calls`` outcomes and the failure
+                 rate reaches ``failure_rate``, the circuit opens.
+    open      -> calls fail immediately with CircuitOpenError until
+                 ``open_seconds`` have passed.
+    half_open -> up to ``half_open_calls`` trial calls are let through; one
+                 failure re-opens the circuit, that many successes close it.
+
+    Health probes (``record_probe``) drive the same transitions without
+    waiting for user traffic.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_rate=0.5, min_calls=5, window_seconds=30.0,
+                 open_seconds=15.0, half_open_calls=1):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._outcomes = collections.deque()  # (timestamp, ok)
+        self._opened_at = 0.0
+        self._trials_in_flight = 0
+        self._trial_successes = 0
+        self._short_circuited = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            return self._state
+
+    def before_call(self):
+        """Reserve permission to call the dependency or raise CircuitOpenError."""
+        with self._lock:
+            now = time.monotonic()
+            self._maybe_half_open(now)
+            if self._state == self.OPEN:
+                self._short_circuited += 1
+                raise CircuitOpenError(self.name, self._retry_after(now))
+            if self._state == self.HALF_OPEN:
+                if self._trials_in_flight >= self.half_open_calls:
+                    self._short_circuited += 1
+                    raise CircuitOpenError(self.name, 1)
+                self._trials_in_flight += 1
+
+    def record_success(self):
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            if self._state == self.OPEN:
+                # A call let through before the circuit opened
+                return
+            if self._state == self.HALF_OPEN:
+                self._trials_in_flight = max(0, self._trials_in_flight - 1)
+                self._trial_successes += 1
+                if self._trial_successes >= self.half_open_calls:
+                    self._close()
+                return
+            self._record(True)
+
+    def record_failure(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._open(time.monotonic())
+                return
+            if self._state == self.OPEN:
+                return
+            self._record(False)
+            total, failures = self._window_counts()
+            if total >= self.min_calls and failures / total >= self.failure_rate:
+                self._open(time.monotonic())
+
+    def record_probe(self, healthy):
+        """
+        Apply a health probe result. A failed probe opens the circuit at once
+        (the window may never reach ``min_calls`` without traffic); a healthy
+        one counts as a trial call once the open period is over.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._maybe_half_open(now)
+            if not healthy:
+                if self._state != self.OPEN:
+                    self._open(now)
+                return
+            if self._state == self.HALF_OPEN:
+                self._trial_successes += 1
+                if self._trial_successes >= self.half_open_calls:
+                    self._close()
+            elif self._state == self.CLOSED:
+                self._record(True)
+
+    def snapshot(self):
+        with self._lock:
+            now = time.monotonic()
+            self._maybe_half_open(now)
+            total, failures = self._window_counts()
+            return {
+                "state": self._state,
+                "window_calls": total,
+                "window_failures": failures,
+                "short_circuited": self._short_circuited,
+                "retry_after": self._retry_after(now) if self._state == self.OPEN else 0,
+            }
+
+    # --- Internals (caller holds self._lock) ---
+    def _record(self, ok):
+        now = time.monotonic()
+        self._outcomes.append((now, ok))
+        cutoff = now - self.window_seconds
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            self._outcomes.popleft()
+
+    def _window_counts(self):
+        cutoff = time.monotonic() - self.window_seconds
+        recent = [ok for ts, ok in self._outcomes if ts >= cutoff]
+        return len(recent), recent.count(False)
+
+    def _open(self, now):
+        self._state = self.OPEN
+        self._opened_at = now
+        self._trials_in_flight = 0
+        self._trial_successes = 0
+
+    def _close(self):
+        self._state = self.CLOSED
+        self._outcomes.clear()
+        self._trials_in_flight = 0
+        self._trial_successes = 0
+
+    def _maybe_half_open(self, now):
+        if self._state == self.OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._trials_in_flight = 0
+            self._trial_successes = 0
+
+    def _retry_after(self, now):
+        return max(1, int(self.open_seconds - (now - self._opened_at) + 0.999))
+
+
+class HealthMonitor:
+    """
+    Polls a health probe on a daemon thread and caches the last result, so
+    health checks are answered from memory. Probe outcomes drive the breaker:
+    a failed probe opens it and a healthy one closes it again once the open
+    period is over, without waiting for user traffic.
+
+    With a ``shared`` cache namespace, results are published there and a
+    result another worker got within the last interval is adopted instead of
+    probing again, so N workers don't probe N times as often.
+    """
+
+    def __init__(self, probe, breaker, interval=10.0, shared=None):
+        self.probe = probe
+        self.breaker = breaker
+        self.interval = interval
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._thread = None
+        self._last = None
+
+    def ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+                self._thread.start()
+
+    def current(self):
+        """Last cached probe result, probing synchronously if none exists yet."""
+        self.ensure_started()
+        with self._lock:
+            last = self._last
+        if last is None:
+            last = self.refresh()
+        return dict(last, age_seconds=round(time.time() - last["checked_at"], 3))
+
+    def healthy(self):
+        """False only when the last cached probe failed; never probes."""
+        with self._lock:
+            return self._last is None or self._last["healthy"]
+
+    def refresh(self):
+        result = self.shared.get(None, "health") if self.shared is not None else None
+        if result is None or time.time() - result["checked_at"] >= self.interval:
+            result = self._probe()
+            if self.shared is not None:
+                self.shared.set(None, "health", result)
+        self.breaker.record_probe(result["healthy"])
+        with self._lock:
+            self._last = result
+        return result
+
+    def _probe(self):
+        started = time.monotonic()
+        reachable = True
+        try:
+            healthy, details = self.probe()
+        except Exception as e:
+            healthy, details, reachable = False, str(e), False
+        return {
+            "healthy": healthy,
+            "reachable": reachable,
+            "details": details,
+            "checked_at": time.time(),
+            "probe_ms": round(1000 * (time.monotonic() - started), 2),
+        }
+
+    def _run(self):
+        while True:
+            self.refresh()
+            time.sleep(self.interval)
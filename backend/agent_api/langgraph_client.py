@@ -0,0 +1,65 @@
+"""
+LangGraph server client
+Every call to the LangGraph server goes through one shared circuit breaker.
+"""
+
+import os
+
+import requests
+from django.conf import settings
+from dotenv import load_dotenv
+
+from backend import timing
+from backend.cache import Namespace
+
+from .circuit import CircuitBreaker, HealthMonitor
+
+load_dotenv()
+
+# LangGraph server URL (when running with langgraph dev)
+LANGGRAPH_URL = os.getenv("LANGGRAPH_URL", "http://127.0.0.1:2024")
+
+breaker = CircuitBreaker(
+    "langgraph",
+    failure_rate=settings.LANGGRAPH_BREAKER_FAILURE_RATE,
+    min_calls=settings.LANGGRAPH_BREAKER_MIN_CALLS,
+    window_seconds=settings.LANGGRAPH_BREAKER_WINDOW,
+    open_seconds=settings.LANGGRAPH_BREAKER_OPEN_SECONDS,
+)
+
+
+def _probe():
+    response = requests.get(f"{LANGGRAPH_URL}/ok", timeout=settings.LANGGRAPH_HEALTH_TIMEOUT)
+    return response.status_code == 200, "" if response.status_code == 200 else response.text
+
+
+# Workers share probe results through the cache
+health = HealthMonitor(
+    _probe,
+    breaker,
+    interval=settings.LANGGRAPH_HEALTH_INTERVAL,
+    shared=Namespace("agent.health", timeout=max(1, int(settings.LANGGRAPH_HEALTH_INTERVAL * 3))),
+)
+
+
+def langgraph_request(method, path, **kwargs):
+    """
+    Call the LangGraph server through the circuit breaker.
+
+    Raises CircuitOpenError without touching the network while the circuit is
+    open. Transport errors (connection failures, timeouts) and 5xx responses
+    count as failures.
+    """
+    health.ensure_started()
+    breaker.before_call()
+    try:
+        with timing.track("langgraph"):
+            response = requests.request(method, f"{LANGGRAPH_URL}{path}", **kwargs)
+    except requests.exceptions.RequestException:
+        breaker.record_failure()
+        raise
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return response
@@ -0,0 +1,253 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from . import views
+from .admission import AdmissionController, AdmissionRejected
+from .circuit import CircuitBreaker, CircuitOpenError, HealthMonitor
+
+
+class AdmissionControllerTests(SimpleTestCase):
+    def controller(self, max_global=1, max_per_user=1, max_queue_depth=10, max_wait=5.0):
+        return AdmissionController(max_global, max_per_user, max_queue_depth, max_wait)
+
+    def wait_for_depth(self, controller, depth):
+        deadline = time.monotonic() + 2
+        while controller.snapshot()["queue_depth"] != depth:
+            self.assertLess(time.monotonic(), deadline, "waiter never queued")
+            time.sleep(0.001)
+
+    def queue(self, controller, order, user_id, weight=1.0):
+        """Start a waiter for ``user_id`` and return once it is queued."""
+        depth = controller.snapshot()["queue_depth"]
+
+        def run():
+            with controller.admit(user_id, weight):
+                order.append(user_id)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.wait_for_depth(controller, depth + 1)
+        return thread
+
+    def drain(self, controller, holder, threads):
+        controller.release(holder)
+        for thread in threads:
+            thread.join(2)
+
+    def test_admits_immediately_under_capacity(self):
+        controller = self.controller(max_global=2)
+        controller.acquire("a")
+        controller.acquire("b")
+        snapshot = controller.snapshot()
+        self.assertEqual((snapshot["active"], snapshot["queue_depth"], snapshot["admitted"]), (2, 0, 2))
+
+    def test_busy_user_cannot_starve_others(self):
+        controller = self.controller(max_per_user=3)
+        controller.acquire("holder")
+        order = []
+        threads = [self.queue(controller, order, "a") for _ in range(3)]
+        threads.append(self.queue(controller, order, "b"))
+        self.drain(controller, "holder", threads)
+        # b queued last but its first request ties with a's first
+        self.assertEqual(order, ["a", "b", "a", "a"])
+
+    def test_weight_gives_a_larger_share(self):
+        controller = self.controller(max_per_user=4)
+        controller.acquire("holder")
+        order = []
+        threads = [self.queue(controller, order, "user") for _ in range(2)]
+        threads += [self.queue(controller, order, "staff", weight=2.0) for _ in range(2)]
+        self.drain(controller, "holder", threads)
+        self.assertEqual(order, ["staff", "user", "staff", "user"])
+
+    def test_per_user_cap_lets_other_users_through(self):
+        controller = self.controller(max_global=2, max_per_user=1)
+        controller.acquire("a")
+        order = []
+        blocked = self.queue(controller, order, "a")
+        controller.acquire("b")  # a's waiter is capped, so b takes the free slot
+        self.assertEqual(controller.snapshot()["active_users"], 2)
+        controller.release("b")
+        self.drain(controller, "a", [blocked])
+        self.assertEqual(order, ["a"])
+
+    def test_full_queue_rejects_without_waiting(self):
+        controller = self.controller(max_queue_depth=1, max_wait=5.0)
+        controller.acquire("holder")
+        thread = self.queue(controller, [], "a")
+        started = time.monotonic()
+        with self.assertRaises(AdmissionRejected) as ctx:
+            controller.acquire("b")
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(ctx.exception.reason, "Agent queue is full")
+        self.assertEqual(ctx.exception.retry_after, 5)
+        self.drain(controller, "holder", [thread])
+        self.assertEqual(controller.snapshot()["rejected_queue_full"], 1)
+
+    def test_wait_times_out(self):
+        controller = self.controller(max_wait=0.05)
+        controller.acquire("holder")
+        with self.assertRaises(AdmissionRejected) as ctx:
+            controller.acquire("a")
+        self.assertEqual(ctx.exception.reason, "Timed out waiting for an agent slot")
+        snapshot = controller.snapshot()
+        self.assertEqual((snapshot["rejected_timeout"], snapshot["queue_depth"]), (1, 0))
+
+    def test_timed_out_waiter_unblocks_the_one_behind_it(self):
+        controller = self.controller(max_global=2, max_per_user=1, max_wait=0.1)
+        controller.acquire("a")
+        controller.acquire("holder")
+        order = []
+        # a's second run is capped; b queued behind it must not wait for a's timeout forever
+        timed_out = []
+
+        def capped():
+            try:
+                controller.acquire("a")
+            except AdmissionRejected:
+                timed_out.append(True)
+
+        thread = threading.Thread(target=capped)
+        thread.start()
+        self.wait_for_depth(controller, 1)
+        waiter = self.queue(controller, order, "b")
+        controller.release("holder")
+        waiter.join(2)
+        thread.join(2)
+        self.assertEqual((order, timed_out), (["b"], [True]))
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("agent_api.circuit.time.monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker("test", failure_rate=0.5, min_calls=4, window_seconds=30,
+                                      open_seconds=15, half_open_calls=1)
+
+    def call(self, ok):
+        self.breaker.before_call()
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def trip(self):
+        for ok in (True, True, False, False):
+            self.call(ok)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    def test_stays_closed_below_min_calls(self):
+        for _ in range(3):
+            self.call(False)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failure_rate_over_the_window_opens(self):
+        self.trip()
+        self.now += 5
+        with self.assertRaises(CircuitOpenError) as ctx:
+            self.breaker.before_call()
+        self.assertEqual(ctx.exception.retry_after, 10)
+        self.assertEqual(self.breaker.snapshot()["short_circuited"], 1)
+
+    def test_old_outcomes_leave_the_window(self):
+        self.call(False)
+        self.call(False)
+        self.now += 31
+        self.call(False)
+        self.call(True)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_trial_success_closes(self):
+        self.trip()
+        self.now += 15
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.breaker.before_call()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()  # only one trial at a time
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.snapshot()["state"], CircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker.snapshot()["window_calls"], 0)
+
+    def test_half_open_trial_failure_reopens(self):
+        self.trip()
+        self.now += 15
+        self.call(False)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.snapshot()["retry_after"], 15)
+
+    def test_late_success_does_not_count_while_open(self):
+        self.trip()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.snapshot()["window_calls"], 4)
+
+    def test_failed_probe_opens_without_traffic(self):
+        self.breaker.record_probe(False)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    def test_healthy_probe_closes_after_the_open_period(self):
+        self.breaker.record_probe(False)
+        self.now += 5
+        self.breaker.record_probe(True)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.now += 10
+        self.breaker.record_probe(True)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_probe_after_the_open_period_reopens(self):
+        self.breaker.record_probe(False)
+        self.now += 15
+        self.breaker.record_probe(False)
+        self.assertEqual(self.breaker.snapshot()["retry_after"], 15)
+
+
+class HealthMonitorTests(SimpleTestCase):
+    def monitor(self, *results):
+        probe = mock.Mock(side_effect=list(results))
+        breaker = CircuitBreaker("test", open_seconds=0)
+        return HealthMonitor(probe, breaker, interval=10), breaker
+
+    def test_probes_drive_the_breaker(self):
+        monitor, breaker = self.monitor((False, "down"), (True, ""))
+        self.assertTrue(monitor.healthy())  # nothing cached yet
+        monitor.refresh()
+        self.assertFalse(monitor.healthy())
+        self.assertEqual(breaker._state, CircuitBreaker.OPEN)
+        monitor.refresh()
+        self.assertTrue(monitor.healthy())
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_probe_exceptions_are_unreachable_failures(self):
+        monitor, breaker = self.monitor(OSError("refused"))
+        result = monitor.refresh()
+        self.assertEqual((result["healthy"], result["reachable"], result["details"]), (False, False, "refused"))
+        self.assertEqual(breaker._state, CircuitBreaker.OPEN)
+
+
+class SendEmailAdmissionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("agent-user", password="pw"))
+
+    def test_rejection_is_429_with_retry_after_only(self):
+        rejected = AdmissionRejected("Agent queue is full", retry_after=7)
+        with mock.patch.object(views.admission, "acquire", side_effect=rejected):
+            response = self.client.post(reverse("agent_send_email"), {"message": "hi"}, format="json")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "7")
+        self.assertEqual(response.data, {"error": "Agent queue is full", "retry_after": 7})
+
+    def test_cached_unhealthy_probe_fails_fast(self):
+        with mock.patch.object(views.health, "healthy", return_value=False), \
+                mock.patch.object(views, "_run_agent") as run_agent:
+            response = self.client.post(reverse("agent_send_email"), {"message": "hi"}, format="json")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], str(int(views.health.interval)))
+        run_agent.assert_not_called()
@@ -9,14 +9,13 @@ from rest_framework.response import Response
 from rest_framework import status
 import requests
 import json
-import os
 import uuid
-from dotenv import load_dotenv
 
-load_dotenv()
+from backend import timing
 
-# LangGraph server URL (when running with langgraph dev)
-LANGGRAPH_URL = os.getenv("LANGGRAPH_URL", "http://127.0.0.1:2024")
+from .admission import AdmissionRejected, controller as admission, user_weight
+from .circuit import CircuitOpenError
+from .langgraph_client import LANGGRAPH_URL, breaker, health, langgraph_request
 
 
 @api_view(['POST'])
@@ -31,7 +30,38 @@ def send_email_with_agent(request):
         "thread_id": "optional-conversation-id",  # For continuing conversations
         "action": "continue"  # or "send" to approve, or "cancel"
     }
+
+    Runs are admitted through the agent admission controller; when the user
+    or the server is at capacity the request waits in a fair queue and is
+    rejected with 429 if no slot frees up in time.
     """
+    sends_edited_emails = request.data.get('action') == "send" and request.data.get('edited_emails')
+    if not sends_edited_emails and (breaker.state == breaker.OPEN or not health.healthy()):
+        # Fail fast without taking a queue slot while LangGraph is known to be down
+        response = Response(
+            {
+                "error": "LangGraph server is unavailable",
+                "help": "Make sure LangGraph server is running with 'langgraph dev'"
+            },
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        response["Retry-After"] = str(breaker.snapshot()["retry_after"] or max(1, int(health.interval)))
+        return response
+
+    try:
+        with admission.admit(request.user.id, user_weight(request.user)):
+            return _run_agent(request)
+    except AdmissionRejected as e:
+        print(f"⏳ Agent run rejected for user {request.user.id}: {e.reason}")
+        response = Response(
+            {"error": e.reason, "retry_after": e.retry_after},
+            status=status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        response["Retry-After"] = str(e.retry_after)
+        return response
+
+
+def _run_agent(request):
     try:
         user_message = request.data.get('message')
         thread_id = request.data.get('thread_id')
@@ -56,16 +86,18 @@ def send_email_with_agent(request):
             results = []
             try:
                 for email in edited_emails:
-                    email_response = requests.post(
-                        f"http://127.0.0.1:8000/gmailapi/send/",
-                        json={
-                            "to": email.get("to"),
-                            "subject": email.get("subject"),
-                            "body": email.get("body")
-                        },
-                        headers={"Authorization": f"Bearer {user_token}"},
-                        timeout=30
-                    )
+                    # Goes out through our Gmail send endpoint
+                    with timing.track("gmail"):
+                        email_response = requests.post(
+                            f"http://127.0.0.1:8000/gmailapi/send/",
+                            json={
+                                "to": email.get("to"),
+                                "subject": email.get("subject"),
+                                "body": email.get("body")
+                            },
+                            headers={"Authorization": f"Bearer {user_token}"},
+                            timeout=30
+                        )
                     email_response.raise_for_status()
                     results.append({
                         "to": email.get("to"),
@@ -118,9 +150,9 @@ def send_email_with_agent(request):
         print(f"📝 Input: {user_message} (action: {action}, thread: {thread_identifier})")
         
         # Step 1: Create or get thread
-        thread_url = f"{LANGGRAPH_URL}/threads"
-        thread_response = requests.post(
-            thread_url,
+        thread_response = langgraph_request(
+            "POST",
+            "/threads",
             json={"thread_id": thread_identifier},
             headers={"Content-Type": "application/json"},
             timeout=10
@@ -132,12 +164,13 @@ def send_email_with_agent(request):
             print(f"⚠️ Thread creation response: {thread_response.status_code}")
         
         # Step 2: Run the graph with the thread
-        langgraph_endpoint = f"{LANGGRAPH_URL}/threads/{thread_identifier}/runs/wait"
+        langgraph_path = f"/threads/{thread_identifier}/runs/wait"
         
-        print(f"📡 Calling LangGraph at {langgraph_endpoint}")
+        print(f"📡 Calling LangGraph at {LANGGRAPH_URL}{langgraph_path}")
         
-        response = requests.post(
-            langgraph_endpoint,
+        response = langgraph_request(
+            "POST",
+            langgraph_path,
             json={
                 "assistant_id": "email_agent",
                 "input": langgraph_input
@@ -236,6 +269,16 @@ def send_email_with_agent(request):
                 status=status.HTTP_502_BAD_GATEWAY
             )
             
+    except CircuitOpenError as e:
+        response = Response(
+            {
+                "error": "LangGraph server is unavailable",
+                "help": "Make sure LangGraph server is running with 'langgraph dev'"
+            },
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        response["Retry-After"] = str(e.retry_after)
+        return response
     except requests.exceptions.ConnectionError:
         return Response(
             {
@@ -264,26 +307,31 @@ def send_email_with_agent(request):
 def agent_health(request):
     """
     Check if LangGraph agent is available
+
+    Answered from the health state cached by the background monitor, so this
+    never waits on the LangGraph server.
     """
     try:
-        response = requests.get(f"{LANGGRAPH_URL}/ok", timeout=5)
-        if response.status_code == 200:
+        cached = health.current()
+        circuit = breaker.snapshot()
+        if cached["healthy"] and circuit["state"] != breaker.OPEN:
             return Response({
                 "status": "healthy",
                 "langgraph_server": "connected",
-                "url": LANGGRAPH_URL
+                "url": LANGGRAPH_URL,
+                "checked_at": cached["checked_at"],
+                "age_seconds": cached["age_seconds"],
+                "circuit": circuit,
+                "admission": admission.snapshot()
             })
-        else:
-            return Response({
-                "status": "unhealthy",
-                "langgraph_server": "error",
-                "details": response.text
-            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-    except requests.exceptions.ConnectionError:
         return Response({
             "status": "unhealthy",
-            "langgraph_server": "disconnected",
-            "help": "Start LangGraph server with 'langgraph dev' in langgraph_server directory"
+            "langgraph_server": "error" if cached["reachable"] else "disconnected",
+            "details": cached["details"],
+            "help": "Start LangGraph server with 'langgraph dev' in langgraph_server directory",
+            "checked_at": cached["checked_at"],
+            "age_seconds": cached["age_seconds"],
+            "circuit": circuit
         }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
     except Exception as e:
         return Response({
@@ -0,0 +1,141 @@
+"""
+Shared cache helpers
+settings.CACHES["default"] comes from CACHE_URL: process-local memory by
+default, Redis (redis://...) once several workers must see the same entries.
+Every lookup goes through django.core.cache.caches, so tests can swap the
+backend for an in-process one with override_settings(CACHES=...).
+
+A Namespace keys entries as "<namespace>:v<version>:<owner>:<generation>:<name>",
+where the owner is a user id (or "global"). Bumping ``version`` in code
+orphans everything cached in an older shape; invalidate(user_id) bumps that
+user's generation, which orphans all of their entries at once without knowing
+or scanning the keys. Orphans simply expire.
+
+Cache errors (Redis down, timeouts) are logged and treated as misses: the
+cache can make a request faster but never fail it.
+"""
+
+import logging
+import time
+
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = object()
+_MISSING = object()
+
+
+class Namespace:
+    def __init__(self, name, version=1, timeout=300, alias="default"):
+        self.name = name
+        self.version = version
+        self.timeout = timeout
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _owner_key(self, user_id):
+        owner = "global" if user_id is None else f"u{user_id}"
+        return f"{self.name}:v{self.version}:{owner}"
+
+    def _generation(self, user_id):
+        generation_key = f"{self._owner_key(user_id)}:gen"
+        generation = self.cache.get(generation_key)
+        if generation is None:
+            # Start from the clock rather than 0: if the counter is evicted,
+            # entries from an older generation must not become visible again
+            fresh = time.time_ns()
+            self.cache.add(generation_key, fresh, timeout=None)
+            generation = self.cache.get(generation_key, fresh)
+        return generation
+
+    def _prefix(self, user_id):
+        """Key prefix for the owner's current generation."""
+        return f"{self._owner_key(user_id)}:{self._generation(user_id)}:"
+
+    def generation(self, user_id=None):
+        """
+        Token that changes on every invalidate(); in-process caches compare it
+        to notice writes made by other workers. None if the cache is unreachable.
+        """
+        try:
+            return self._generation(user_id)
+        except Exception as e:
+            self._failed("generation", e)
+            return None
+
+    def _timeout(self, timeout):
+        return self.timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def _failed(self, operation, error):
+        logger.warning(f"Cache {operation} failed in namespace {self.name}: {error}")
+
+    def get(self, user_id, name, default=None):
+        try:
+            return self.cache.get(self._prefix(user_id) + name, default)
+        except Exception as e:
+            self._failed("get", e)
+            return default
+
+    def get_many(self, user_id, names):
+        """``{name: value}`` for the names that are cached."""
+        try:
+            prefix = self._prefix(user_id)
+            found = self.cache.get_many([prefix + name for name in names])
+        except Exception as e:
+            self._failed("get_many", e)
+            return {}
+        return {key[len(prefix):]: value for key, value in found.items()}
+
+    def set(self, user_id, name, value, timeout=DEFAULT_TIMEOUT):
+        try:
+            self.cache.set(self._prefix(user_id) + name, value, self._timeout(timeout))
+        except Exception as e:
+            self._failed("set", e)
+
+    def set_many(self, user_id, mapping, timeout=DEFAULT_TIMEOUT):
+        if not mapping:
+            return
+        try:
+            prefix = self._prefix(user_id)
+            self.cache.set_many({prefix + name: value for name, value in mapping.items()}, self._timeout(timeout))
+        except Exception as e:
+            self._failed("set_many", e)
+
+    def get_or_set(self, user_id, name, compute, timeout=DEFAULT_TIMEOUT):
+        """
+        Cached value, or ``compute()`` stored under the generation read before
+        computing it, so a result raced by an invalidate() is never served.
+        Exceptions from ``compute`` propagate and nothing is stored.
+        """
+        try:
+            key = self._prefix(user_id) + name
+            value = self.cache.get(key, _MISSING)
+        except Exception as e:
+            self._failed("get", e)
+            return compute()
+        if value is _MISSING:
+            value = compute()
+            try:
+                self.cache.set(key, value, self._timeout(timeout))
+            except Exception as e:
+                self._failed("set", e)
+        return value
+
+    def invalidate(self, user_id=None):
+        """
+        Drop every entry the owner has in this namespace. Returns the new
+        generation, or None if there was no counter yet or the cache failed.
+        """
+        generation_key = f"{self._owner_key(user_id)}:gen"
+        try:
+            return self.cache.incr(generation_key)
+        except ValueError:
+            # No counter yet: the next read starts a generation nothing was cached under
+            return None
+        except Exception as e:
+            self._failed("invalidate", e)
+            return None
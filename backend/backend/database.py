@@ -0,0 +1,81 @@
+"""
+Database profiles
+settings.py builds DATABASES["default"] from DATABASE_URL through
+database_from_env(). Each engine gets a tuned profile:
+
+- SQLite: WAL journaling (readers no longer block the writer), a busy timeout
+  instead of immediate "database is locked" errors, BEGIN IMMEDIATE so write
+  transactions take the lock up front rather than failing on upgrade, and
+  cache/mmap pragmas.
+- PostgreSQL: persistent connections with health checks, or a psycopg 3
+  connection pool when psycopg and psycopg_pool are installed (psycopg2 has
+  no pool support in Django).
+
+tuned=False gives Django's defaults, which db_loadtest uses as its baseline.
+"""
+
+import importlib.util
+
+SQLITE_ENGINE = "django.db.backends.sqlite3"
+POSTGRES_ENGINE = "django.db.backends.postgresql"
+
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA mmap_size=134217728",
+)
+
+
+def pooling_available():
+    return bool(importlib.util.find_spec("psycopg") and importlib.util.find_spec("psycopg_pool"))
+
+
+def sqlite_database(config, busy_timeout=20.0, tuned=True):
+    config = {**config, "ENGINE": SQLITE_ENGINE}
+    if tuned:
+        config["OPTIONS"] = {
+            **config.get("OPTIONS", {}),
+            "timeout": busy_timeout,
+            "transaction_mode": "IMMEDIATE",
+            "init_command": "; ".join(SQLITE_PRAGMAS),
+        }
+    return config
+
+
+def postgres_database(config, conn_max_age=60, pool=True, pool_min_size=2, pool_max_size=20,
+                      pool_timeout=10.0, tuned=True):
+    config = {**config, "ENGINE": POSTGRES_ENGINE}
+    if not tuned:
+        return {**config, "CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False}
+    if pool and pooling_available():
+        # Pooled connections are returned to the pool at request end, so
+        # persistent connections must stay off
+        config["CONN_MAX_AGE"] = 0
+        config["OPTIONS"] = {
+            **config.get("OPTIONS", {}),
+            "pool": {"min_size": pool_min_size, "max_size": pool_max_size, "timeout": pool_timeout},
+        }
+    else:
+        config["CONN_MAX_AGE"] = conn_max_age
+        config["CONN_HEALTH_CHECKS"] = True
+    return config
+
+
+def database_from_env(env, default_url, tuned=True):
+    """DATABASES["default"] for DATABASE_URL with the matching profile applied."""
+    config = env.db("DATABASE_URL", default=default_url)
+    if config["ENGINE"] == SQLITE_ENGINE:
+        return sqlite_database(config, busy_timeout=env.float("SQLITE_BUSY_TIMEOUT", default=20.0), tuned=tuned)
+    if config["ENGINE"] in (POSTGRES_ENGINE, "django.db.backends.postgresql_psycopg2"):
+        return postgres_database(
+            config,
+            conn_max_age=env.int("DB_CONN_MAX_AGE", default=60),
+            pool=env.bool("DB_POOL", default=True),
+            pool_min_size=env.int("DB_POOL_MIN_SIZE", default=2),
+            pool_max_size=env.int("DB_POOL_MAX_SIZE", default=20),
+            pool_timeout=env.float("DB_POOL_TIMEOUT", default=10.0),
+            tuned=tuned,
+        )
+    return config
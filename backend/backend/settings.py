@@ -14,6 +14,9 @@ from datetime import timedelta
 from pathlib import Path
 import environ
 import os
+import tempfile
+
+from .database import database_from_env
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -59,10 +62,74 @@ INSTALLED_APPS = [
 ]
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'acc_api.authentication.CachedJWTAuthentication',
     )
 }
 
+# Agent admission control (see agent_api/admission.py)
+AGENT_MAX_CONCURRENT_RUNS = env.int("AGENT_MAX_CONCURRENT_RUNS", default=8)
+AGENT_MAX_CONCURRENT_RUNS_PER_USER = env.int("AGENT_MAX_CONCURRENT_RUNS_PER_USER", default=2)
+AGENT_MAX_QUEUE_DEPTH = env.int("AGENT_MAX_QUEUE_DEPTH", default=32)
+AGENT_QUEUE_TIMEOUT = env.float("AGENT_QUEUE_TIMEOUT", default=15.0)
+AGENT_STAFF_WEIGHT = env.float("AGENT_STAFF_WEIGHT", default=2.0)
+
+# LangGraph circuit breaker and cached health check (see agent_api/langgraph_client.py)
+LANGGRAPH_BREAKER_FAILURE_RATE = env.float("LANGGRAPH_BREAKER_FAILURE_RATE", default=0.5)
+LANGGRAPH_BREAKER_MIN_CALLS = env.int("LANGGRAPH_BREAKER_MIN_CALLS", default=5)
+LANGGRAPH_BREAKER_WINDOW = env.float("LANGGRAPH_BREAKER_WINDOW", default=30.0)
+LANGGRAPH_BREAKER_OPEN_SECONDS = env.float("LANGGRAPH_BREAKER_OPEN_SECONDS", default=15.0)
+LANGGRAPH_HEALTH_INTERVAL = env.float("LANGGRAPH_HEALTH_INTERVAL", default=10.0)
+LANGGRAPH_HEALTH_TIMEOUT = env.float("LANGGRAPH_HEALTH_TIMEOUT", default=2.0)
+
+# Bulk contact import/export (see contact_api/bulk.py)
+CONTACT_IMPORT_CHUNK_SIZE = env.int("CONTACT_IMPORT_CHUNK_SIZE", default=1000)
+CONTACT_IMPORT_MAX_ERRORS = env.int("CONTACT_IMPORT_MAX_ERRORS", default=100)
+CONTACT_EXPORT_CHUNK_SIZE = env.int("CONTACT_EXPORT_CHUNK_SIZE", default=2000)
+
+# Address autocomplete harvested from mail headers (see gmailapi/autocomplete.py)
+AUTOCOMPLETE_HALF_LIFE_DAYS = env.float("AUTOCOMPLETE_HALF_LIFE_DAYS", default=30.0)
+AUTOCOMPLETE_QUEUE_SIZE = env.int("AUTOCOMPLETE_QUEUE_SIZE", default=1000)
+AUTOCOMPLETE_MAX_RESULTS = env.int("AUTOCOMPLETE_MAX_RESULTS", default=10)
+
+# Authenticated users cached in-process between requests (see acc_api/authentication.py)
+AUTH_USER_CACHE_TTL = env.float("AUTH_USER_CACHE_TTL", default=60.0)
+AUTH_USER_CACHE_SIZE = env.int("AUTH_USER_CACHE_SIZE", default=10000)
+
+# Cache (see backend/cache.py): locmemcache:// keeps entries per process,
+# redis://host:6379/1 shares them between workers
+CACHES = {
+    'default': {
+        **env.cache("CACHE_URL", default="locmemcache://supermail"),
+        'KEY_PREFIX': env("CACHE_KEY_PREFIX", default="supermail"),
+        'TIMEOUT': env.int("CACHE_DEFAULT_TIMEOUT", default=300),
+    },
+}
+CACHE_GMAIL_CREDENTIALS_TIMEOUT = env.int("CACHE_GMAIL_CREDENTIALS_TIMEOUT", default=300)
+CACHE_GMAIL_MESSAGE_TIMEOUT = env.int("CACHE_GMAIL_MESSAGE_TIMEOUT", default=3600)
+CACHE_GMAIL_LIST_TIMEOUT = env.int("CACHE_GMAIL_LIST_TIMEOUT", default=60)
+CACHE_CONTACTS_TIMEOUT = env.int("CACHE_CONTACTS_TIMEOUT", default=300)
+
+# Request timing, access logs and sampled profiling (see backend/timing.py)
+SERVER_TIMING_HEADER = env.bool("SERVER_TIMING_HEADER", default=DEBUG)
+ACCESS_LOG = env.bool("ACCESS_LOG", default=True)
+REQUEST_PROFILE_SAMPLE_RATE = env.float("REQUEST_PROFILE_SAMPLE_RATE", default=0.0)
+REQUEST_PROFILE_THRESHOLD_MS = env.float("REQUEST_PROFILE_THRESHOLD_MS", default=1000.0)
+REQUEST_PROFILE_DIR = env("REQUEST_PROFILE_DIR", default=os.path.join(tempfile.gettempdir(), "supermail-profiles"))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'access': {'class': 'logging.StreamHandler', 'formatter': 'message'},
+    },
+    'loggers': {
+        'backend.access': {'handlers': ['access'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 # SIMPLE_JWT = {
 #     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),  # increase this to desired time
 #     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),    # increase refresh token lifetime
@@ -80,6 +147,8 @@ CSRF_TRUSTED_ORIGINS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its totals cover every other middleware
+    'backend.timing.TimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -114,11 +183,10 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# DATABASE_URL selects the engine (sqlite:///... or postgres://...); each
+# gets its tuned profile, see backend/database.py
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_from_env(env, default_url=f"sqlite:///{BASE_DIR / 'db.sqlite3'}"),
 }
 
 
@@ -0,0 +1,167 @@
+import json
+import warnings
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import CacheKeyWarning, caches
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from contact_api import caching as contact_caching
+from gmailapi import caching as gmail_caching
+
+from . import timing
+from .cache import Namespace
+
+
+class NamespaceTests(SimpleTestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.ns = Namespace("test", timeout=60)
+
+    def test_get_or_set_computes_once(self):
+        compute = mock.Mock(return_value={"page": 1})
+        self.assertEqual(self.ns.get_or_set(1, "page", compute), {"page": 1})
+        self.assertEqual(self.ns.get_or_set(1, "page", compute), {"page": 1})
+        compute.assert_called_once()
+
+    def test_invalidate_drops_only_that_owners_entries(self):
+        self.ns.set(1, "a", "one")
+        self.ns.set(2, "a", "two")
+        self.ns.set(None, "a", "global")
+        self.ns.invalidate(1)
+        self.assertIsNone(self.ns.get(1, "a"))
+        self.assertEqual((self.ns.get(2, "a"), self.ns.get(None, "a")), ("two", "global"))
+
+    def test_invalidate_bumps_and_returns_the_generation(self):
+        before = self.ns.generation(1)
+        self.assertEqual(self.ns.invalidate(1), before + 1)
+        self.assertEqual(self.ns.generation(1), before + 1)
+
+    def test_invalidate_without_a_counter_is_a_no_op(self):
+        self.assertIsNone(self.ns.invalidate(1))
+        self.ns.set(1, "a", "one")
+        self.assertEqual(self.ns.get(1, "a"), "one")
+
+    def test_evicted_counter_never_revives_old_entries(self):
+        self.ns.set(1, "a", "stale")
+        self.ns.invalidate(1)
+        self.ns.set(1, "a", "current")
+        caches["default"].delete("test:v1:u1:gen")
+        self.assertIsNone(self.ns.get(1, "a"))
+
+    def test_version_bump_orphans_older_entries(self):
+        self.ns.set(1, "a", "old shape")
+        self.assertIsNone(Namespace("test", version=2).get(1, "a"))
+
+    def test_get_many_returns_names_without_the_prefix(self):
+        self.ns.set_many(1, {"a": 1, "b": 2})
+        self.assertEqual(self.ns.get_many(1, ["a", "b", "c"]), {"a": 1, "b": 2})
+
+    def test_result_raced_by_an_invalidate_is_not_served(self):
+        def compute():
+            self.ns.invalidate(1)  # a write lands while the value is being computed
+            return "computed before the write"
+
+        self.ns.generation(1)
+        self.assertEqual(self.ns.get_or_set(1, "a", compute), "computed before the write")
+        self.assertIsNone(self.ns.get(1, "a"))
+
+    def test_cache_errors_are_misses(self):
+        broken = mock.Mock(**{"get.side_effect": ConnectionError("down"), "incr.side_effect": ConnectionError("down")})
+        with mock.patch.object(Namespace, "cache", broken), self.assertLogs("backend.cache", "WARNING"):
+            self.assertEqual(self.ns.get(1, "a", "default"), "default")
+            self.assertEqual(self.ns.get_or_set(1, "a", lambda: "computed"), "computed")
+            self.assertIsNone(self.ns.generation(1))
+            self.assertIsNone(self.ns.invalidate(1))
+
+
+class FreeTextKeyTests(SimpleTestCase):
+    def test_keys_from_free_text_are_hashed(self):
+        keys = [
+            gmail_caching.listing_key("from:ann subject:q3 report", 10, None),
+            gmail_caching.listing_key("from:ann subject:q3 report", 10, "page-2"),
+            contact_caching.expand_key("design team"),
+            contact_caching.expand_key("design  teamé"),
+        ]
+        self.assertEqual(len(set(keys)), 4)
+        for key in keys:
+            self.assertRegex(key, r"^(list|expand):[0-9a-f]{40}$")
+        self.assertEqual(contact_caching.expand_key("design team"), keys[2])
+
+    def test_hashed_keys_are_memcached_safe(self):
+        ns = Namespace("test")
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", CacheKeyWarning)
+            ns.set(1, contact_caching.expand_key("design team"), ["a"])
+            ns.set(1, gmail_caching.listing_key("is:unread " * 40, 50, None), ["b"])
+
+
+@override_settings(SERVER_TIMING_HEADER=True, ACCESS_LOG=True, REQUEST_PROFILE_SAMPLE_RATE=0.0)
+class TimingMiddlewareTests(TestCase):
+    def work(self):
+        """One query and one tracked Gmail call, as a view would make them."""
+        User.objects.count()
+        with timing.track("gmail"):
+            pass
+
+    def call(self, view):
+        return timing.TimingMiddleware(view)(RequestFactory().get("/inbox/"))
+
+    def log_entry(self, logs):
+        [line] = logs.records
+        return json.loads(line.getMessage())
+
+    def test_normal_response_gets_server_timing_and_a_log_line(self):
+        def view(request):
+            self.work()
+            return HttpResponse("ok")
+
+        with self.assertLogs("backend.access", "INFO") as logs:
+            response = self.call(view)
+        header = response["Server-Timing"]
+        self.assertRegex(header, r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="count=1", gmail;dur=[\d.]+;desc="count=1"$')
+        entry = self.log_entry(logs)
+        self.assertEqual((entry["path"], entry["status"], entry["db_queries"], entry["gmail_calls"]),
+                         ("/inbox/", 200, 1, 1))
+        self.assertNotIn("streamed", entry)
+
+    def test_streamed_response_is_logged_after_its_body_is_sent(self):
+        def body():
+            yield "first,"
+            self.work()  # work done while the body is produced still counts
+            yield "second"
+
+        with self.assertNoLogs("backend.access", "INFO"):
+            response = self.call(lambda request: StreamingHttpResponse(body()))
+        self.assertNotIn("Server-Timing", response)
+
+        with self.assertLogs("backend.access", "INFO") as logs:
+            self.assertEqual(b"".join(response.streaming_content), b"first,second")
+        entry = self.log_entry(logs)
+        self.assertEqual((entry["streamed"], entry["db_queries"], entry["gmail_calls"]), (True, 1, 1))
+
+    def test_abandoned_stream_is_logged_when_closed(self):
+        response = self.call(lambda request: StreamingHttpResponse(iter(["a", "b"])))
+        next(iter(response.streaming_content))
+        with self.assertLogs("backend.access", "INFO") as logs:
+            response.close()
+        self.assertTrue(self.log_entry(logs)["streamed"])
+
+    def test_work_between_chunks_is_not_counted(self):
+        response = self.call(lambda request: StreamingHttpResponse(iter(["a", "b"])))
+        chunks = iter(response.streaming_content)
+        next(chunks)
+        self.work()  # the server's own code, not the view's
+        with self.assertLogs("backend.access", "INFO") as logs:
+            list(chunks)
+        entry = self.log_entry(logs)
+        self.assertEqual((entry["db_queries"], entry["gmail_calls"]), (0, 0))
+
+    def test_track_outside_a_request_is_a_no_op(self):
+        self.assertIsNone(timing._current.get())
+        with mock.patch.object(timing.RequestTiming, "record") as record:
+            with timing.track("gmail"):
+                result = "ran"
+        self.assertEqual(result, "ran")
+        record.assert_not_called()
@@ -0,0 +1,195 @@
+"""
+Per-request timing
+TimingMiddleware measures every request: total time, the number and time of
+database queries (through connection.execute_wrapper) and the number and time
+of outbound calls, which the code making them reports with
+``with timing.track("gmail"):``. A context variable carries the current
+request's totals, so calls outside a request (background threads) are simply
+not counted.
+
+Each request gets a Server-Timing header (SERVER_TIMING_HEADER) and a JSON
+access log line on the "backend.access" logger (ACCESS_LOG). Streamed
+responses send their headers before the body exists, so they get no
+Server-Timing; their log line is written once the body has been sent and
+covers it, marked "streamed". With
+REQUEST_PROFILE_SAMPLE_RATE > 0, that share of requests runs under cProfile
+and those slower than REQUEST_PROFILE_THRESHOLD_MS are dumped to
+REQUEST_PROFILE_DIR for ``python -m pstats``.
+"""
+
+import contextlib
+import contextvars
+import cProfile
+import json
+import logging
+import random
+import re
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+access_logger = logging.getLogger("backend.access")
+logger = logging.getLogger(__name__)
+
+SERVICES = ("gmail", "genai", "langgraph")
+
+_current = contextvars.ContextVar("request_timing", default=None)
+_UNSAFE_FILENAME = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class RequestTiming:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_ms = 0.0
+        self.calls = {}  # service -> [count, ms]
+
+    def record(self, service, ms):
+        totals = self.calls.setdefault(service, [0, 0.0])
+        totals[0] += 1
+        totals[1] += ms
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_ms += 1000 * (time.perf_counter() - started)
+
+
+@contextlib.contextmanager
+def track(service):
+    """Count the enclosed block as one outbound call to ``service`` in the current request."""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.record(service, 1000 * (time.perf_counter() - started))
+
+
+def server_timing(timing, total_ms):
+    metrics = [f"total;dur={total_ms:.1f}", f'db;dur={timing.db_ms:.1f};desc="count={timing.db_queries}"']
+    for service, (count, ms) in sorted(timing.calls.items()):
+        metrics.append(f'{service};dur={ms:.1f};desc="count={count}"')
+    return ", ".join(metrics)
+
+
+class TimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = RequestTiming()
+        profiler = self._start_profiler()
+        try:
+            with self._measure(timing):
+                response = self.get_response(request)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+
+        if response.streaming and not response.is_async:
+            # Headers go out before the body, so there is no Server-Timing;
+            # the access log is written once the body has been sent. Async
+            # bodies (ASGI only) are not wrapped and are logged at the headers.
+            response.streaming_content = self._stream(
+                response.streaming_content, timing,
+                lambda: self._finish(request, response, timing, profiler),
+            )
+            return response
+        self._finish(request, response, timing, profiler)
+        return response
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _measure(timing):
+        """Attribute outbound calls and queries made inside the block to ``timing``."""
+        token = _current.set(timing)
+        try:
+            with contextlib.ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timing.db_wrapper))
+                yield
+        finally:
+            _current.reset(token)
+
+    def _stream(self, content, timing, finish):
+        # Measured chunk by chunk, so nothing leaks into the server's context between chunks
+        try:
+            while True:
+                with self._measure(timing):
+                    try:
+                        chunk = next(content)
+                    except StopIteration:
+                        return
+                yield chunk
+        finally:
+            close = getattr(content, "close", None)
+            if close is not None:
+                close()
+            finish()
+
+    def _finish(self, request, response, timing, profiler):
+        total_ms = 1000 * (time.perf_counter() - timing.started)
+        profile_path = None
+        if profiler is not None and total_ms >= settings.REQUEST_PROFILE_THRESHOLD_MS:
+            profile_path = self._dump(profiler, request, total_ms)
+        if settings.SERVER_TIMING_HEADER and not response.streaming:
+            response["Server-Timing"] = server_timing(timing, total_ms)
+        if settings.ACCESS_LOG:
+            self._log(request, response, timing, total_ms, profile_path)
+
+    @staticmethod
+    def _start_profiler():
+        rate = settings.REQUEST_PROFILE_SAMPLE_RATE
+        if rate <= 0 or random.random() >= rate:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this thread
+            return None
+        return profiler
+
+    @staticmethod
+    def _dump(profiler, request, total_ms):
+        directory = Path(settings.REQUEST_PROFILE_DIR)
+        name = _UNSAFE_FILENAME.sub("_", request.path.strip("/")) or "root"
+        path = directory / f"{time.strftime('%Y%m%dT%H%M%S')}-{request.method}-{name}-{int(total_ms)}ms.prof"
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(path)
+        except OSError as e:
+            logger.warning(f"Could not write request profile {path}: {e}")
+            return None
+        return str(path)
+
+    @staticmethod
+    def _log(request, response, timing, total_ms, profile_path):
+        user = getattr(request, "user", None)
+        entry = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "user": user.pk if user is not None and user.is_authenticated else None,
+            "total_ms": round(total_ms, 2),
+            "db_queries": timing.db_queries,
+            "db_ms": round(timing.db_ms, 2),
+        }
+        for service in SERVICES:
+            count, ms = timing.calls.get(service, (0, 0.0))
+            entry[f"{service}_calls"] = count
+            entry[f"{service}_ms"] = round(ms, 2)
+        if response.streaming:
+            entry["streamed"] = True
+        if profile_path:
+            entry["profile"] = profile_path
+        access_logger.info(json.dumps(entry))
@@ -0,0 +1,231 @@
+"""
+Local fake of the googleapiclient Gmail service.
+
+Implements the calls the gmailapi views make (messages list/get/send, batch
+requests, getProfile) against an in-memory mailbox. Messages are shaped like
+real format="full" responses: a dozen transport headers plus a
+multipart/alternative payload with base64url text and HTML parts of
+``body_kb`` each. Every execute() sleeps for a configurable latency, like a
+round trip to Google; a batch pays it once plus ``batch_item_ms`` per item.
+
+    fake = FakeGmail(messages=500, body_kb=8, latency_ms=50)
+    gmailapi.views.build = fake.build
+"""
+
+import base64
+import itertools
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+NAMES = ["Priya Sharma", "Daniel Okafor", "Mei Chen", "Lucas Martin", "Sara Lindqvist", "Tom Becker",
+         "Anna Rossi", "Kenji Watanabe", "Fatima Zahra", "Olivia Brown", "Mateo Garcia", "Noah Wilson"]
+WORDS = ("quarterly report review meeting schedule budget update launch plan draft notes customer "
+         "feedback invoice project timeline contract proposal team offsite agenda follow up").split()
+
+
+def _address(name):
+    return f"{name.lower().replace(' ', '.')}@example.com"
+
+
+def _b64(text):
+    return base64.urlsafe_b64encode(text.encode()).decode()
+
+
+class FakeGmail:
+    def __init__(self, messages=500, body_kb=8, latency_ms=50.0, jitter_ms=10.0, batch_item_ms=2.0,
+                 address="me@example.com", seed=0):
+        self.body_kb = body_kb
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.batch_item_ms = batch_item_ms
+        self.address = address
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.calls = {"list": 0, "get": 0, "send": 0, "profile": 0, "batch": 0}
+        self.mailbox = {}  # id -> message, newest last
+        now = datetime.now(timezone.utc)
+        for i in range(messages):
+            self._store(self._message(now - timedelta(minutes=17 * (messages - i))))
+
+    # --- googleapiclient.discovery.build replacement ---
+    def build(self, *args, **kwargs):
+        return _Service(self)
+
+    @property
+    def message_ids(self):
+        with self._lock:
+            return list(self.mailbox)
+
+    def _message(self, sent_at, sender=None, to=None, subject=None, text=None):
+        rng = self._rng
+        sender = sender or f"{(name := rng.choice(NAMES))} <{_address(name)}>"
+        to = to or self.address
+        subject = subject or " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 8))).capitalize()
+        if text is None:
+            words = []
+            size = 0
+            while size < self.body_kb * 1024:
+                word = rng.choice(WORDS)
+                words.append(word)
+                size += len(word) + 1
+            text = " ".join(words)
+        html = f"<html><body><div dir=\"ltr\"><p>{text}</p></div></body></html>"
+        message_id = f"{next(self._ids):016x}"
+        headers = [
+            {"name": "Delivered-To", "value": self.address},
+            {"name": "Received", "value": f"by 2002:a05:6a10:{message_id[-4:]} with SMTP id x{message_id}; "
+                                          f"{format_datetime(sent_at)}"},
+            {"name": "ARC-Seal", "value": "i=1; a=rsa-sha256; t=1; cv=none; d=google.com; s=arc-20160816; b=" + "A" * 340},
+            {"name": "DKIM-Signature", "value": "v=1; a=rsa-sha256; c=relaxed/relaxed; d=example.com; b=" + "B" * 340},
+            {"name": "MIME-Version", "value": "1.0"},
+            {"name": "From", "value": sender},
+            {"name": "To", "value": to},
+            {"name": "Cc", "value": ", ".join(f"{n} <{_address(n)}>" for n in rng.sample(NAMES, rng.randint(0, 3)))},
+            {"name": "Subject", "value": subject},
+            {"name": "Date", "value": format_datetime(sent_at)},
+            {"name": "Message-ID", "value": f"<{message_id}@mail.example.com>"},
+            {"name": "Content-Type", "value": "multipart/alternative; boundary=\"000000000000b\""},
+        ]
+        return {
+            "id": message_id,
+            "threadId": message_id,
+            "labelIds": ["INBOX", "UNREAD"] if rng.random() < 0.3 else ["INBOX"],
+            "snippet": text[:200],
+            "sizeEstimate": len(text) + len(html) + 2000,
+            "internalDate": str(int(sent_at.timestamp() * 1000)),
+            "payload": {
+                "mimeType": "multipart/alternative",
+                "headers": headers,
+                "body": {"size": 0},
+                "parts": [
+                    {"partId": "0", "mimeType": "text/plain", "body": {"size": len(text), "data": _b64(text)}},
+                    {"partId": "1", "mimeType": "text/html", "body": {"size": len(html), "data": _b64(html)}},
+                ],
+            },
+        }
+
+    def _store(self, message):
+        with self._lock:
+            self.mailbox[message["id"]] = message
+
+    def _sleep(self, extra_ms=0.0):
+        time.sleep(max(0.0, self.latency_ms + self._rng.uniform(0, self.jitter_ms) + extra_ms) / 1000)
+
+    def _count(self, kind):
+        with self._lock:
+            self.calls[kind] += 1
+
+    # --- API calls ---
+    def list(self, maxResults=100, q=None, pageToken=None, **kwargs):
+        self._count("list")
+        with self._lock:
+            ids = list(reversed(self.mailbox))
+        if q:
+            needle = q.split(":", 1)[-1].split(" ", 1)[0].lower()
+            ids = [i for i in ids if needle in self._header(i, "From").lower() or needle in self._header(i, "To").lower()]
+        start = int(pageToken or 0)
+        page = ids[start:start + maxResults]
+        result = {"messages": [{"id": i, "threadId": i} for i in page], "resultSizeEstimate": len(ids)}
+        if start + maxResults < len(ids):
+            result["nextPageToken"] = str(start + maxResults)
+        return result
+
+    def get(self, id, **kwargs):
+        self._count("get")
+        with self._lock:
+            message = self.mailbox.get(id)
+        if message is None:
+            raise HttpError(httplib2.Response({"status": 404}), b'{"error": {"message": "Requested entity was not found."}}')
+        return message
+
+    def send(self, body, **kwargs):
+        self._count("send")
+        raw = base64.urlsafe_b64decode(body["raw"]).decode("utf-8", errors="ignore")
+        headers, _, text = raw.partition("\n\n")
+        fields = dict(line.split(": ", 1) for line in headers.splitlines() if ": " in line)
+        message = self._message(datetime.now(timezone.utc), sender=self.address, to=fields.get("to"),
+                                subject=fields.get("subject"), text=text)
+        message["labelIds"] = ["SENT"]
+        self._store(message)
+        return {"id": message["id"], "threadId": message["threadId"], "labelIds": ["SENT"]}
+
+    def profile(self, **kwargs):
+        self._count("profile")
+        return {"emailAddress": self.address, "messagesTotal": len(self.mailbox)}
+
+    def _header(self, message_id, name):
+        message = self.mailbox.get(message_id)
+        return next((h["value"] for h in message["payload"]["headers"] if h["name"] == name), "") if message else ""
+
+
+class _Request:
+    def __init__(self, fake, call):
+        self.fake = fake
+        self.call = call
+
+    def execute(self):
+        self.fake._sleep()
+        return self.call()
+
+
+class _Batch:
+    def __init__(self, fake, callback):
+        self.fake = fake
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        self.requests.append((request_id or str(len(self.requests) + 1), request, callback or self.callback))
+
+    def execute(self):
+        self.fake._count("batch")
+        self.fake._sleep(self.fake.batch_item_ms * len(self.requests))
+        for request_id, request, callback in self.requests:
+            try:
+                response, exception = request.call(), None
+            except HttpError as e:
+                response, exception = None, e
+            callback(request_id, response, exception)
+
+
+class _Messages:
+    def __init__(self, fake):
+        self.fake = fake
+
+    def list(self, userId="me", **kwargs):
+        return _Request(self.fake, lambda: self.fake.list(**kwargs))
+
+    def get(self, userId="me", id=None, **kwargs):
+        return _Request(self.fake, lambda: self.fake.get(id=id, **kwargs))
+
+    def send(self, userId="me", body=None):
+        return _Request(self.fake, lambda: self.fake.send(body=body))
+
+
+class _Users:
+    def __init__(self, fake):
+        self.fake = fake
+
+    def messages(self):
+        return _Messages(self.fake)
+
+    def getProfile(self, userId="me"):
+        return _Request(self.fake, self.fake.profile)
+
+
+class _Service:
+    def __init__(self, fake):
+        self.fake = fake
+
+    def users(self):
+        return _Users(self.fake)
+
+    def new_batch_http_request(self, callback=None):
+        return _Batch(self.fake, callback)
@@ -0,0 +1,164 @@
+"""
+Bulk contact import and export
+Imports stream a CSV or JSONL upload row by row, validate each chunk with
+ContactSerializers and upsert it on (user, email) with one SELECT, one
+bulk_update and one bulk_create per chunk. Exports stream rows straight from
+a server-side iterator, so neither direction holds the whole file in memory.
+"""
+
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from . import caching, groups, resolve
+from .models import Contacts
+from .serializers import ContactSerializers
+
+FIELDS = ["name", "email", "relation", "tone"]
+FORMATS = ("csv", "jsonl")
+
+
+class ImportFormatError(ValueError):
+    """The upload can't be read at all (as opposed to individual bad rows)."""
+
+
+def detect_format(requested, filename, content_type):
+    fmt = (requested or "").lower()
+    if not fmt:
+        name = (filename or "").lower()
+        if name.endswith((".jsonl", ".ndjson")) or "ndjson" in (content_type or "") or "jsonl" in (content_type or ""):
+            fmt = "jsonl"
+        else:
+            fmt = "csv"
+    if fmt not in FORMATS:
+        raise ImportFormatError(f"Unsupported format {fmt!r}, expected one of {', '.join(FORMATS)}")
+    return fmt
+
+
+def read_rows(upload, fmt):
+    """Yield ``(row_number, row, error)``, exactly one of row/error set; rows are numbered from 1."""
+    lines = codecs.iterdecode(upload, "utf-8-sig")
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        if reader.fieldnames is None:
+            return
+        missing = set(FIELDS) - {(f or "").strip().lower() for f in reader.fieldnames}
+        if missing:
+            raise ImportFormatError(f"CSV header is missing: {', '.join(sorted(missing))}")
+        for number, row in enumerate(reader, start=1):
+            yield number, {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}, None
+        return
+
+    number = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, None, {"non_field_errors": [f"Invalid JSON: {e}"]}
+            continue
+        if not isinstance(row, dict):
+            yield number, None, {"non_field_errors": ["Expected a JSON object"]}
+            continue
+        yield number, row, None
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def import_contacts(user, rows, chunk_size=None, max_errors=None):
+    """
+    Upsert parsed rows for ``user``; returns
+    ``{"created", "updated", "failed", "errors": [{"row", "errors"}, ...]}``.
+
+    Rows with an email the user already has update that contact (the first one
+    if there are duplicates); within one upload the last row for an email wins.
+    """
+    chunk_size = chunk_size or settings.CONTACT_IMPORT_CHUNK_SIZE
+    max_errors = settings.CONTACT_IMPORT_MAX_ERRORS if max_errors is None else max_errors
+    report = {"created": 0, "updated": 0, "failed": 0, "errors": []}
+
+    def fail(number, errors):
+        report["failed"] += 1
+        if len(report["errors"]) < max_errors:
+            report["errors"].append({"row": number, "errors": errors})
+
+    # One serializer validates every row, so its fields are only built once
+    validator = ContactSerializers()
+    try:
+        for chunk in _chunks(rows, chunk_size):
+            valid = {}
+            for number, row, error in chunk:
+                if error:
+                    fail(number, error)
+                    continue
+                try:
+                    data = validator.run_validation({f: row.get(f, "") for f in FIELDS})
+                except ValidationError as e:
+                    fail(number, e.detail)
+                    continue
+                valid[data["email"]] = data
+            if valid:
+                created, updated = _upsert(user, valid)
+                report["created"] += created
+                report["updated"] += updated
+    finally:
+        # bulk_create/bulk_update don't send post_save, so do what the signals would
+        if report["created"] or report["updated"]:
+            groups.rebuild_relation_groups(user.id)
+            resolve.invalidate(user.id)
+            caching.invalidate(user.id)
+    return report
+
+
+def _upsert(user, valid):
+    with transaction.atomic():
+        existing = {}
+        for contact in Contacts.objects.filter(user=user, email__in=list(valid)).order_by("id"):
+            existing.setdefault(contact.email, contact)
+        to_update, to_create = [], []
+        for email, data in valid.items():
+            contact = existing.get(email)
+            if contact is None:
+                to_create.append(Contacts(user=user, **data))
+                continue
+            for field in FIELDS:
+                setattr(contact, field, data[field])
+            to_update.append(contact)
+        if to_update:
+            Contacts.objects.bulk_update(to_update, FIELDS)
+        if to_create:
+            Contacts.objects.bulk_create(to_create)
+    return len(to_create), len(to_update)
+
+
+class _Echo:
+    """csv.writer target that hands each formatted line back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def export_lines(user, fmt):
+    """Yield the user's contacts as CSV (with header) or JSONL lines, ordered by id."""
+    rows = (Contacts.objects.filter(user=user).order_by("id")
+            .values_list("id", *FIELDS).iterator(chunk_size=settings.CONTACT_EXPORT_CHUNK_SIZE))
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(["id", *FIELDS])
+        for row in rows:
+            yield writer.writerow(row)
+        return
+    keys = ["id", *FIELDS]
+    for row in rows:
+        yield json.dumps(dict(zip(keys, row))) + "\n"
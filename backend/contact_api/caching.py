@@ -0,0 +1,29 @@
+"""
+Cached contact reads
+Contact list pages, the group list and group expansions are cached per user
+and all dropped together by invalidate() on any contact or group write:
+signals cover single saves and deletes, bulk.py and the group views call it
+after writes that bypass them.
+"""
+
+import hashlib
+
+from django.conf import settings
+
+from backend.cache import Namespace
+
+contacts = Namespace("contacts", timeout=settings.CACHE_CONTACTS_TIMEOUT)
+
+
+def invalidate(user_id):
+    contacts.invalidate(user_id)
+
+
+def page_key(request):
+    # The absolute URL, since the cursor links in the page are built from it
+    return "page:" + hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+
+
+def expand_key(group_key):
+    # Hashed: group keys can contain spaces, which memcached rejects in keys
+    return "expand:" + hashlib.sha1(group_key.encode()).hexdigest()
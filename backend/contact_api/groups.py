@@ -0,0 +1,95 @@
+"""
+Contact groups
+Relation groups mirror Contacts.relation: every distinct relation a user has
+gets a ContactGroup whose memberships are kept in sync on every contact write
+(signals) and rebuilt wholesale after bulk imports, so expanding "all
+colleagues" is a single indexed join instead of a scan over every contact.
+List groups are curated by the user and never touched by the sync.
+"""
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import ContactGroup, ContactGroupMember, Contacts
+from .resolve import normalize, singular, strip_fillers
+
+MEMBER_FIELDS = ("id", "name", "email", "relation", "tone")
+
+
+def group_key(text):
+    """'My Colleagues' -> 'colleague'; shared by group names, relations and lookups."""
+    return " ".join(singular(w) for w in strip_fillers(normalize(text)).split())
+
+
+def _prune_empty_relation_groups(user_id, using="default"):
+    ContactGroup.objects.using(using).filter(user_id=user_id, kind=ContactGroup.RELATION, memberships__isnull=True).delete()
+
+
+def _relation_group(user_id, relation, key, using="default"):
+    group, _ = ContactGroup.objects.using(using).get_or_create(
+        user_id=user_id, key=key,
+        defaults={"name": relation.strip()[:100], "kind": ContactGroup.RELATION},
+    )
+    # A list the user named like a relation keeps precedence
+    return group if group.kind == ContactGroup.RELATION else None
+
+
+def sync_contact(contact, using="default"):
+    """Put one contact in the relation group for its current relation, and only that one."""
+    key = group_key(contact.relation)
+    with transaction.atomic(using=using):
+        stale = ContactGroupMember.objects.using(using).filter(contact=contact, group__kind=ContactGroup.RELATION)
+        if key:
+            stale = stale.exclude(group__key=key)
+        had_stale = stale.delete()[0]
+        if key:
+            group = _relation_group(contact.user_id, contact.relation, key, using)
+            if group is not None:
+                ContactGroupMember.objects.using(using).get_or_create(group=group, contact=contact)
+        if had_stale:
+            _prune_empty_relation_groups(contact.user_id, using)
+
+
+def contact_deleted(user_id, using="default"):
+    # Memberships cascade with the contact; only the group may be left empty
+    _prune_empty_relation_groups(user_id, using)
+
+
+def rebuild_relation_groups(user_id, using="default"):
+    """Recompute every relation membership for a user (after bulk writes that skip signals)."""
+    with transaction.atomic(using=using):
+        ContactGroupMember.objects.using(using).filter(group__user_id=user_id, group__kind=ContactGroup.RELATION).delete()
+        by_key = {}
+        for contact_id, relation in Contacts.objects.using(using).filter(user_id=user_id).values_list("id", "relation"):
+            key = group_key(relation)
+            if key:
+                by_key.setdefault(key, (relation, []))[1].append(contact_id)
+        members = []
+        for key, (relation, contact_ids) in by_key.items():
+            group = _relation_group(user_id, relation, key, using)
+            if group is not None:
+                members.extend(ContactGroupMember(group=group, contact_id=i) for i in contact_ids)
+        ContactGroupMember.objects.using(using).bulk_create(members, batch_size=1000)
+        _prune_empty_relation_groups(user_id, using)
+
+
+def expand(user_id, name):
+    """
+    ``{"group", "kind", "members"}`` for the group called ``name`` (one join
+    over the membership index), or None if the user has no such group.
+    """
+    key = group_key(name)
+    if not key:
+        return None
+    rows = list(
+        Contacts.objects.filter(group_memberships__group__user_id=user_id, group_memberships__group__key=key)
+        .order_by("name", "id")
+        .values(*MEMBER_FIELDS, group_name=F("group_memberships__group__name"),
+                group_kind=F("group_memberships__group__kind"))
+    )
+    if rows:
+        group = {"group": rows[0]["group_name"], "kind": rows[0]["group_kind"]}
+        return {**group, "members": [{f: row[f] for f in MEMBER_FIELDS} for row in rows]}
+    # Only a miss pays for a second query, to tell an empty group from an unknown one
+    group = ContactGroup.objects.filter(user_id=user_id, key=key).values("name", "kind").first()
+    return {"group": group["name"], "kind": group["kind"], "members": []} if group else None
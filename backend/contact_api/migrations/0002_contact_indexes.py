@@ -0,0 +1,27 @@
+# Generated by Django 6.1.2 on 2026-10-19 16:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact_api', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contacts',
+            index=models.Index(fields=['user', 'relation'], name='contact_user_relation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contacts',
+            index=models.Index(fields=['user', 'email'], name='contact_user_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contacts',
+            index=models.Index(fields=['user', 'name'], name='contact_user_name_idx'),
+        ),
+    ]
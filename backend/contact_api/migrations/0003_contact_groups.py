@@ -0,0 +1,90 @@
+# Generated by Django 6.1.2 on 2026-10-19 16:29
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copy of contact_api.groups.group_key as of this migration; later
+# changes to the live normalization must not change what the backfill does
+_FILLER_WORDS = {"my", "our", "the", "all", "to", "and", "of", "a", "an", "every", "everyone", "in"}
+_NON_ALNUM = re.compile(r"[^a-z0-9@._ ]+")
+
+
+def group_key(text):
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    words = []
+    for word in _NON_ALNUM.sub(" ", text).split():
+        if word in _FILLER_WORDS:
+            continue
+        if len(word) > 3 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return " ".join(words)
+
+
+def backfill_relation_groups(apps, schema_editor):
+    """One relation group per distinct relation, as groups.rebuild_relation_groups would build it."""
+    Contacts = apps.get_model('contact_api', 'Contacts')
+    ContactGroup = apps.get_model('contact_api', 'ContactGroup')
+    ContactGroupMember = apps.get_model('contact_api', 'ContactGroupMember')
+    db_alias = schema_editor.connection.alias
+    groups = {}
+    members = []
+    for contact_id, user_id, relation in Contacts.objects.using(db_alias).values_list('id', 'user_id', 'relation').iterator():
+        key = group_key(relation)
+        if not key:
+            continue
+        if (user_id, key) not in groups:
+            groups[(user_id, key)] = ContactGroup.objects.using(db_alias).create(
+                user_id=user_id, key=key, name=relation.strip()[:100], kind='relation')
+        members.append(ContactGroupMember(group=groups[(user_id, key)], contact_id=contact_id))
+    ContactGroupMember.objects.using(db_alias).bulk_create(members, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact_api', '0002_contact_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContactGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('key', models.CharField(max_length=100)),
+                ('kind', models.CharField(choices=[('relation', 'Relation'), ('list', 'Distribution list')], default='list', max_length=10)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contact_groups', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ContactGroupMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('contact', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_memberships', to='contact_api.contacts')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='contact_api.contactgroup')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='contactgroup',
+            name='contacts',
+            field=models.ManyToManyField(related_name='contact_groups', through='contact_api.ContactGroupMember', to='contact_api.contacts'),
+        ),
+        migrations.AddConstraint(
+            model_name='contactgroupmember',
+            constraint=models.UniqueConstraint(fields=('group', 'contact'), name='contact_group_member_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='contactgroup',
+            constraint=models.UniqueConstraint(fields=('user', 'key'), name='contact_group_user_key_uniq'),
+        ),
+        migrations.RunPython(backfill_relation_groups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def create_name_prefix_index(apps, schema_editor):
+    # Only PostgreSQL needs it: under a locale collation a plain btree index
+    # can't serve the UPPER(name) LIKE 'JO%' of ?name= prefix filters
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = schema_editor.quote_name(apps.get_model('contact_api', 'Contacts')._meta.db_table)
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS contact_user_name_prefix_idx ON {table} '
+        f'(user_id, (UPPER(name::text)) text_pattern_ops)'
+    )
+
+
+def drop_name_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS contact_user_name_prefix_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact_api', '0003_contact_groups'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_name_prefix_index, drop_name_prefix_index),
+    ]
@@ -7,6 +7,53 @@ class Contacts(models.Model):
     relation=models.CharField(max_length=100)
     tone=models.TextField()
     user=models.ForeignKey(User, on_delete=models.CASCADE)
+
+    class Meta:
+        # Every lookup is scoped to one user; these back the list filters,
+        # cursor ordering and the agent's relation/email lookups (PostgreSQL
+        # also gets a name-prefix pattern index, see migration 0004)
+        indexes = [
+            models.Index(fields=["user", "relation"], name="contact_user_relation_idx"),
+            models.Index(fields=["user", "email"], name="contact_user_email_idx"),
+            models.Index(fields=["user", "name"], name="contact_user_name_idx"),
+        ]
     
     def __str__(self):
         return self.name
+
+
+class ContactGroup(models.Model):
+    """
+    A named set of contacts, looked up by its normalized ``key``.
+
+    Relation groups ("colleague", "family") are maintained automatically from
+    Contacts.relation (see groups.py); list groups are curated by the user.
+    """
+    RELATION = "relation"
+    LIST = "list"
+    KIND_CHOICES = [(RELATION, "Relation"), (LIST, "Distribution list")]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="contact_groups")
+    name = models.CharField(max_length=100)
+    key = models.CharField(max_length=100)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default=LIST)
+    contacts = models.ManyToManyField(Contacts, through="ContactGroupMember", related_name="contact_groups")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="contact_group_user_key_uniq"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class ContactGroupMember(models.Model):
+    group = models.ForeignKey(ContactGroup, on_delete=models.CASCADE, related_name="memberships")
+    contact = models.ForeignKey(Contacts, on_delete=models.CASCADE, related_name="group_memberships")
+
+    class Meta:
+        # Also the index group expansion walks: group -> member contacts
+        constraints = [
+            models.UniqueConstraint(fields=["group", "contact"], name="contact_group_member_uniq"),
+        ]
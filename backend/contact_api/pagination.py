@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ContactCursorPagination(CursorPagination):
+    """
+    Stable cursor pages ordered by name (id breaks ties), served from the
+    (user, name) index. Works on ``.values()`` rows as well as instances.
+    """
+    ordering = ("name", "id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
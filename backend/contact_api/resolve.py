@@ -0,0 +1,140 @@
+"""
+Fuzzy contact resolution
+Matches free-text names or relations ("John", "my manager", "colleagues")
+against a per-user index over Contacts, built once and reused until the
+user's contacts change.
+"""
+
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+from . import caching
+from .models import Contacts
+
+MIN_SCORE = 0.3
+RELATION_LIMIT = 50
+
+_FILLER_WORDS = {"my", "our", "the", "all", "to", "and", "of", "a", "an", "every", "everyone", "in"}
+_NON_ALNUM = re.compile(r"[^a-z0-9@._ ]+")
+
+
+def normalize(text):
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join(_NON_ALNUM.sub(" ", text).split())
+
+
+def singular(word):
+    if len(word) > 3 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def strip_fillers(text):
+    return " ".join(w for w in text.split() if w not in _FILLER_WORDS)
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ContactIndex:
+    """Normalized-name / trigram / relation index over one user's contacts."""
+
+    def __init__(self, rows):
+        self.rows = {row["id"]: row for row in rows}
+        self.names = {}
+        self.name_grams = {}
+        self.by_gram = defaultdict(set)
+        self.by_relation = defaultdict(list)
+        self.by_email = {}
+
+        for row in rows:
+            name = normalize(row["name"])
+            grams = trigrams(name)
+            self.names[row["id"]] = name
+            self.name_grams[row["id"]] = grams
+            for gram in grams:
+                self.by_gram[gram].add(row["id"])
+            relation = " ".join(singular(w) for w in normalize(row["relation"]).split())
+            if relation:
+                self.by_relation[relation].append(row["id"])
+            self.by_email[row["email"].lower()] = row["id"]
+
+    def resolve(self, query, limit=5):
+        """Return ``[(score, match_type, row), ...]`` best first."""
+        # Addresses are matched raw: normalizing would split "a-b+c@x.io"
+        email_id = self.by_email.get((query or "").strip().lower())
+        if email_id is not None:
+            return [(1.0, "email", self.rows[email_id])]
+
+        text = strip_fillers(normalize(query))
+        if not text:
+            return []
+
+        relation = " ".join(singular(w) for w in text.split())
+        if relation in self.by_relation:
+            ids = self.by_relation[relation][:RELATION_LIMIT]
+            return [(0.95, "relation", self.rows[i]) for i in ids]
+
+        query_grams = trigrams(text)
+        candidates = set()
+        for gram in query_grams:
+            candidates |= self.by_gram.get(gram, set())
+
+        scored = []
+        for contact_id in candidates:
+            name = self.names[contact_id]
+            grams = self.name_grams[contact_id]
+            score = len(query_grams & grams) / len(query_grams | grams)
+            if name == text:
+                score = 1.0
+            elif any(part.startswith(text) for part in name.split()):
+                # "jo" -> "John Smith": prefix of a name token
+                score = max(score, 0.8)
+            if score >= MIN_SCORE:
+                scored.append((round(score, 3), "name", self.rows[contact_id]))
+        scored.sort(key=lambda item: (-item[0], item[2]["name"]))
+        return scored[:limit]
+
+
+_lock = threading.Lock()
+_versions = defaultdict(int)
+_indexes = {}
+
+
+def invalidate(user_id):
+    """Drop the user's index; called whenever one of their contacts changes."""
+    with _lock:
+        _versions[user_id] += 1
+        _indexes.pop(user_id, None)
+
+
+def clear():
+    """Drop every user's index (load tests start each run cold)."""
+    with _lock:
+        _indexes.clear()
+        _versions.clear()
+
+
+def get_index(user_id):
+    # Writes handled by other workers only show up as a new generation of the shared cache
+    shared = caching.contacts.generation(user_id)
+    with _lock:
+        version = (_versions[user_id], shared)
+        cached = _indexes.get(user_id)
+        if cached and cached[0] == version:
+            return cached[1]
+    rows = list(Contacts.objects.filter(user_id=user_id).values("id", "name", "email", "relation", "tone"))
+    index = ContactIndex(rows)
+    with _lock:
+        # Only keep it if no write happened while we were building
+        if _versions[user_id] == version[0]:
+            _indexes[user_id] = (version, index)
+    return index
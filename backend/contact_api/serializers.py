@@ -6,3 +6,13 @@ class ContactSerializers(serializers.ModelSerializer):
         model= Contacts
         fields = ['id', 'name', 'email', 'relation', 'tone']
         read_only_fields = ['id', 'user']
+
+
+class ContactGroupSerializers(serializers.Serializer):
+    name = serializers.CharField(max_length=100)
+    contact_ids = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+
+
+class ContactGroupMembersSerializers(serializers.Serializer):
+    add = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    remove = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import caching, groups, resolve
+from .models import Contacts
+
+
+@receiver([post_save, post_delete], sender=Contacts)
+def invalidate_contact_index(sender, instance, **kwargs):
+    resolve.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Contacts)
+def sync_relation_group(sender, instance, raw=False, using="default", **kwargs):
+    if not raw:
+        groups.sync_contact(instance, using)
+
+
+@receiver(post_delete, sender=Contacts)
+def prune_relation_groups(sender, instance, using="default", **kwargs):
+    groups.contact_deleted(instance.user_id, using)
+
+
+@receiver([post_save, post_delete], sender=Contacts)
+def invalidate_cached_reads(sender, instance, **kwargs):
+    # Registered after the group sync, so nothing can cache the pre-sync groups
+    caching.invalidate(instance.user_id)
@@ -1,3 +1,370 @@
-from django.test import TestCase
+import io
+import json
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from . import bulk, caching, groups, resolve
+from .models import ContactGroup, ContactGroupMember, Contacts
+
+
+class ContactTestCase(TestCase):
+    def setUp(self):
+        # Cached reads are keyed by user id, which the test database reuses
+        caches["default"].clear()
+        resolve.clear()
+        self.user = User.objects.create_user("owner", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def contact(self, name, relation, email=None, tone="friendly"):
+        email = email or f"{name.split()[0].lower()}@example.com"
+        return Contacts.objects.create(user=self.user, name=name, email=email, relation=relation, tone=tone)
+
+
+class GroupKeyTests(TestCase):
+    def test_fillers_case_and_plurals_collapse(self):
+        self.assertEqual(groups.group_key("My Colleagues"), "colleague")
+        self.assertEqual(groups.group_key("all the colleague"), "colleague")
+        self.assertEqual(groups.group_key("Companies"), "company")
+        self.assertEqual(groups.group_key("Design Team"), "design team")
+
+    def test_short_words_and_double_s_keep_their_s(self):
+        self.assertEqual(groups.group_key("bus"), "bus")
+        self.assertEqual(groups.group_key("Boss"), "boss")
+
+    def test_blank_and_filler_only_names_have_no_key(self):
+        self.assertEqual(groups.group_key(""), "")
+        self.assertEqual(groups.group_key("  my  "), "")
+
+
+class SyncContactTests(ContactTestCase):
+    def members(self, key):
+        return set(ContactGroupMember.objects.filter(group__user=self.user, group__key=key)
+                   .values_list("contact__name", flat=True))
+
+    def test_contact_joins_its_relation_group(self):
+        self.contact("Mei Chen", "Colleague")
+        self.contact("Dan Okafor", "colleagues")
+        group = ContactGroup.objects.get(user=self.user, key="colleague")
+        self.assertEqual(group.kind, ContactGroup.RELATION)
+        self.assertEqual(group.name, "Colleague")
+        self.assertEqual(self.members("colleague"), {"Mei Chen", "Dan Okafor"})
+
+    def test_relation_change_moves_the_contact_and_prunes_the_empty_group(self):
+        mei = self.contact("Mei Chen", "colleague")
+        mei.relation = "friend"
+        mei.save()
+        self.assertEqual(self.members("friend"), {"Mei Chen"})
+        self.assertFalse(ContactGroup.objects.filter(user=self.user, key="colleague").exists())
+
+    def test_delete_prunes_the_empty_group(self):
+        mei = self.contact("Mei Chen", "colleague")
+        dan = self.contact("Dan Okafor", "colleague")
+        mei.delete()
+        self.assertEqual(self.members("colleague"), {"Dan Okafor"})
+        dan.delete()
+        self.assertFalse(ContactGroup.objects.filter(user=self.user, key="colleague").exists())
+
+    def test_list_named_like_a_relation_takes_precedence(self):
+        clients = ContactGroup.objects.create(user=self.user, name="Clients", key="client", kind=ContactGroup.LIST)
+        self.contact("Lucas Martin", "client")
+        self.assertFalse(clients.memberships.exists())
+        self.assertEqual(ContactGroup.objects.filter(user=self.user, key="client").count(), 1)
+
+
+class RebuildRelationGroupsTests(ContactTestCase):
+    def test_import_rebuilds_groups_for_bulk_written_contacts(self):
+        self.contact("Mei Chen", "friend", email="mei@example.com")
+        rows = [
+            (1, {"name": "Mei Chen", "email": "mei@example.com", "relation": "colleague", "tone": "warm"}, None),
+            (2, {"name": "Dan Okafor", "email": "dan@example.com", "relation": "Colleagues", "tone": "friendly"}, None),
+            (3, {"name": "Anna Rossi", "email": "anna@example.com", "relation": "family", "tone": "warm"}, None),
+        ]
+        report = bulk.import_contacts(self.user, rows)
+        self.assertEqual((report["created"], report["updated"]), (2, 1))
+
+        keys = dict(ContactGroup.objects.filter(user=self.user).values_list("key", "kind"))
+        self.assertEqual(keys, {"colleague": ContactGroup.RELATION, "family": ContactGroup.RELATION})
+        colleagues = ContactGroupMember.objects.filter(group__user=self.user, group__key="colleague")
+        self.assertEqual(set(colleagues.values_list("contact__email", flat=True)),
+                         {"mei@example.com", "dan@example.com"})
+
+
+class ReadRowsTests(SimpleTestCase):
+    def rows(self, text, fmt):
+        return list(bulk.read_rows(io.BytesIO(text.encode("utf-8")), fmt))
+
+    def test_csv_header_is_case_and_space_insensitive_and_bom_is_skipped(self):
+        rows = self.rows("\ufeffName, Email ,RELATION,tone\n Mei Chen ,mei@example.com,colleague,warm\n", "csv")
+        self.assertEqual(rows, [(1, {"name": "Mei Chen", "email": "mei@example.com",
+                                     "relation": "colleague", "tone": "warm"}, None)])
+
+    def test_csv_missing_column_is_a_format_error(self):
+        with self.assertRaisesMessage(bulk.ImportFormatError, "CSV header is missing: relation, tone"):
+            self.rows("name,email\nMei,mei@example.com\n", "csv")
+
+    def test_empty_csv_has_no_rows(self):
+        self.assertEqual(self.rows("", "csv"), [])
+
+    def test_jsonl_skips_blank_lines_and_reports_bad_lines(self):
+        text = '{"name": "Mei"}\n\nnot json\n[1, 2]\n'
+        rows = self.rows(text, "jsonl")
+        self.assertEqual([(number, row) for number, row, _ in rows], [(1, {"name": "Mei"}), (2, None), (3, None)])
+        self.assertTrue(rows[1][2]["non_field_errors"][0].startswith("Invalid JSON"))
+        self.assertEqual(rows[2][2], {"non_field_errors": ["Expected a JSON object"]})
+
+    def test_format_detection(self):
+        self.assertEqual(bulk.detect_format(None, "contacts.ndjson", ""), "jsonl")
+        self.assertEqual(bulk.detect_format(None, "upload", "application/x-ndjson"), "jsonl")
+        self.assertEqual(bulk.detect_format(None, "contacts.txt", "text/plain"), "csv")
+        self.assertEqual(bulk.detect_format("JSONL", "contacts.csv", "text/csv"), "jsonl")
+        with self.assertRaises(bulk.ImportFormatError):
+            bulk.detect_format("xml", "contacts.xml", "")
+
+
+class ImportContactsTests(ContactTestCase):
+    def row(self, number, name, email, relation="friend", tone="warm"):
+        return number, {"name": name, "email": email, "relation": relation, "tone": tone}, None
+
+    def test_existing_emails_are_updated_and_the_last_row_wins(self):
+        mei = self.contact("Mei Chen", "friend", email="mei@example.com")
+        rows = [
+            self.row(1, "Mei C.", "mei@example.com", relation="colleague"),
+            self.row(2, "Dan Okafor", "dan@example.com"),
+            self.row(3, "Dan O.", "dan@example.com"),
+        ]
+        # Dan's rows land in different chunks: created by the first, updated by the second
+        report = bulk.import_contacts(self.user, rows, chunk_size=2)
+        self.assertEqual(report, {"created": 1, "updated": 2, "failed": 0, "errors": []})
+        mei.refresh_from_db()
+        self.assertEqual((mei.name, mei.relation), ("Mei C.", "colleague"))
+        self.assertEqual(Contacts.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(Contacts.objects.get(user=self.user, email="dan@example.com").name, "Dan O.")
+
+    def test_other_users_contacts_are_never_updated(self):
+        other = User.objects.create_user("other", password="pw")
+        Contacts.objects.create(user=other, name="Mei", email="mei@example.com", relation="friend", tone="")
+        report = bulk.import_contacts(self.user, [self.row(1, "Mei Chen", "mei@example.com")])
+        self.assertEqual((report["created"], report["updated"]), (1, 0))
+        self.assertEqual(Contacts.objects.get(user=other).name, "Mei")
+
+    def test_reported_row_errors_are_capped_but_all_are_counted(self):
+        rows = [self.row(n, "Bad", "not-an-email") for n in range(1, 6)]
+        rows.append((6, None, {"non_field_errors": ["Invalid JSON"]}))
+        rows.append(self.row(7, "Mei Chen", "mei@example.com"))
+        report = bulk.import_contacts(self.user, rows, max_errors=2)
+        self.assertEqual((report["created"], report["failed"]), (1, 6))
+        self.assertEqual([e["row"] for e in report["errors"]], [1, 2])
+        self.assertIn("email", report["errors"][0]["errors"])
+
+    def test_import_view_reads_an_upload(self):
+        upload = SimpleUploadedFile("contacts.jsonl", b'{"name": "Mei Chen", "email": "mei@example.com", '
+                                    b'"relation": "colleague", "tone": "warm"}\n{"name": ""}\n')
+        response = self.client.post(reverse("contact_import"), {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["created"], response.data["failed"]), (1, 1))
+        self.assertEqual(response.data["errors"][0]["row"], 2)
+
+    def test_import_view_rejects_a_bad_header_and_non_utf8(self):
+        bad_header = SimpleUploadedFile("contacts.csv", b"name,email\nMei,mei@example.com\n")
+        response = self.client.post(reverse("contact_import"), {"file": bad_header}, format="multipart")
+        self.assertEqual(response.status_code, 400)
+        latin1 = SimpleUploadedFile("contacts.csv", "name,email,relation,tone\nZoë,z@example.com,friend,\n".encode("latin-1"))
+        response = self.client.post(reverse("contact_import"), {"file": latin1}, format="multipart")
+        self.assertEqual(response.data, {"error": "The file must be UTF-8 encoded"})
+
+
+class ExportContactsTests(ContactTestCase):
+    def export(self, **params):
+        response = self.client.get(reverse("contact_export"), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_csv_export_streams_a_header_and_rows_in_id_order(self):
+        mei = self.contact("Mei Chen", "colleague", tone="warm")
+        dan = self.contact("Okafor, Dan", "friend", email="dan@example.com", tone="")
+        response, body = self.export()
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="contacts.csv"')
+        self.assertEqual(body.splitlines(), [
+            "id,name,email,relation,tone",
+            f"{mei.id},Mei Chen,mei@example.com,colleague,warm",
+            f'{dan.id},"Okafor, Dan",dan@example.com,friend,',
+        ])
+
+    def test_jsonl_export_round_trips_through_import(self):
+        self.contact("Mei Chen", "colleague", tone="warm")
+        response, body = self.export(type="jsonl")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        [line] = body.splitlines()
+        self.assertEqual({k: v for k, v in json.loads(line).items() if k != "id"},
+                         {"name": "Mei Chen", "email": "mei@example.com", "relation": "colleague", "tone": "warm"})
+        rows = bulk.read_rows(io.BytesIO(body.encode()), "jsonl")
+        self.assertEqual(bulk.import_contacts(self.user, rows)["updated"], 1)
+
+    def test_unknown_type_is_rejected(self):
+        self.assertEqual(self.client.get(reverse("contact_export"), {"type": "xml"}).status_code, 400)
+
+
+class GroupExpandViewTests(ContactTestCase):
+    def expand(self, name):
+        return self.client.get(reverse("contact_group_expand", args=[name]))
+
+    def test_expands_a_relation_group_by_loose_name(self):
+        self.contact("Mei Chen", "colleague", tone="casual")
+        response = self.expand("all my Colleagues")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["group"], "colleague")
+        self.assertEqual(response.data["kind"], ContactGroup.RELATION)
+        self.assertEqual([(m["name"], m["tone"]) for m in response.data["members"]], [("Mei Chen", "casual")])
+
+    def test_unknown_group_is_404(self):
+        self.assertEqual(self.expand("colleagues").status_code, 404)
+
+    def test_empty_group_is_200_with_no_members(self):
+        ContactGroup.objects.create(user=self.user, name="Design Team", key="design team", kind=ContactGroup.LIST)
+        response = self.expand("design team")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"group": "Design Team", "kind": ContactGroup.LIST, "members": []})
+
+    def test_other_users_groups_are_not_visible(self):
+        other = User.objects.create_user("other", password="pw")
+        Contacts.objects.create(user=other, name="Zoe", email="zoe@example.com", relation="colleague", tone="")
+        self.assertEqual(self.expand("colleagues").status_code, 404)
+
+
+class ContactListViewTests(ContactTestCase):
+    def names(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return [row["name"] for row in response.data["results"]], response.data
+
+    def test_cursor_pages_walk_every_contact_in_name_order(self):
+        for name in ["Dan Okafor", "Anna Rossi", "Mei Chen", "Anna Rossi", "Bo Li"]:
+            self.contact(name, "friend", email=f"{name.split()[0].lower()}{Contacts.objects.count()}@example.com")
+        seen, url, params = [], reverse("all_contacts"), {"page_size": 2}
+        while url:
+            names, data = self.names(url, **params)
+            self.assertLessEqual(len(names), 2)
+            seen += names
+            url, params = data["next"], {}
+        self.assertEqual(seen, ["Anna Rossi", "Anna Rossi", "Bo Li", "Dan Okafor", "Mei Chen"])
+
+        names, data = self.names(reverse("all_contacts"), page_size=2)
+        names, data = self.names(data["next"])
+        self.assertEqual(self.names(data["previous"])[0], ["Anna Rossi", "Anna Rossi"])
+
+    def test_name_prefix_is_case_insensitive(self):
+        for name in ["John Smith", "joan Berg", "Mary Jo", "Jö Park"]:
+            self.contact(name, "friend")
+        # Page order follows the database collation; only membership is compared
+        self.assertCountEqual(self.names(reverse("all_contacts"), name="JO")[0], ["joan Berg", "John Smith"])
+        self.assertEqual(self.names(reverse("all_contacts"), name="john s")[0], ["John Smith"])
+
+    def test_name_prefix_wildcards_are_literal(self):
+        self.contact("Ann%Lee", "friend")
+        self.contact("Anne Lee", "friend")
+        self.assertEqual(self.names(reverse("all_contacts"), name="ann%")[0], ["Ann%Lee"])
+        self.assertEqual(self.names(reverse("all_contacts"), name="an_")[0], [])
+
+    def test_exact_filters_and_other_users(self):
+        self.contact("Mei Chen", "colleague")
+        self.contact("Dan Okafor", "friend")
+        other = User.objects.create_user("other", password="pw")
+        Contacts.objects.create(user=other, name="Zoe", email="zoe@example.com", relation="colleague", tone="")
+        self.assertEqual(self.names(reverse("all_contacts"), relation="colleague")[0], ["Mei Chen"])
+        self.assertEqual(self.names(reverse("all_contacts"), email="dan@example.com")[0], ["Dan Okafor"])
+
+
+class ContactIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = resolve.ContactIndex([
+            {"id": 1, "name": "John Smith", "email": "john@example.com", "relation": "Manager", "tone": ""},
+            {"id": 2, "name": "Johanna Berg", "email": "johanna@example.com", "relation": "colleague", "tone": ""},
+            {"id": 3, "name": "Mei Chen", "email": "mei@example.com", "relation": "Colleagues", "tone": ""},
+            {"id": 4, "name": "Jon Smyth", "email": "jon@example.com", "relation": "friend", "tone": ""},
+            {"id": 5, "name": "Ann Lee", "email": "Ann.Lee@my-company.com", "relation": "client", "tone": ""},
+            {"id": 6, "name": "Bob Stone", "email": "bob+work@x.io", "relation": "friend", "tone": ""},
+        ])
+
+    def resolve(self, query):
+        return [(score, match, row["name"]) for score, match, row in self.index.resolve(query)]
+
+    def test_exact_name_ranks_first_ignoring_case_accents_and_punctuation(self):
+        self.assertEqual(self.resolve("Jöhn  Smith!")[0], (1.0, "name", "John Smith"))
+
+    def test_email_is_an_exact_match(self):
+        self.assertEqual(self.resolve("MEI@example.com"), [(1.0, "email", "Mei Chen")])
+
+    def test_hyphen_and_plus_addresses_are_exact_matches(self):
+        self.assertEqual(self.resolve(" ann.lee@MY-company.com "), [(1.0, "email", "Ann Lee")])
+        self.assertEqual(self.resolve("bob+work@x.io"), [(1.0, "email", "Bob Stone")])
+
+    def test_prefix_of_a_name_token(self):
+        self.assertEqual(self.resolve("joh"), [(0.8, "name", "Johanna Berg"), (0.8, "name", "John Smith")])
+
+    def test_trigram_similarity_ranks_typos(self):
+        results = self.resolve("jon smith")
+        self.assertEqual([name for _, _, name in results], ["John Smith", "Jon Smyth"])
+        self.assertGreater(results[0][0], results[1][0])
+        self.assertLess(results[0][0], 1.0)
+
+    def test_relation_plurals_and_fillers(self):
+        self.assertEqual(self.resolve("all my colleagues"),
+                         [(0.95, "relation", "Johanna Berg"), (0.95, "relation", "Mei Chen")])
+        self.assertEqual(self.resolve("the manager"), [(0.95, "relation", "John Smith")])
+
+    def test_weak_matches_are_cut_at_min_score(self):
+        self.assertEqual(self.resolve("smith xyz abc def"), [])
+        with mock.patch.object(resolve, "MIN_SCORE", 0.1):
+            self.assertIn("John Smith", [name for _, _, name in self.resolve("smith xyz abc def")])
+
+    def test_filler_only_query_matches_nothing(self):
+        self.assertEqual(self.resolve("my"), [])
+
+
+class ResolveIndexInvalidationTests(ContactTestCase):
+    def names(self, query):
+        return [row["name"] for _, _, row in resolve.get_index(self.user.id).resolve(query)]
+
+    def test_index_is_reused_until_a_contact_changes(self):
+        self.contact("John Smith", "manager")
+        index = resolve.get_index(self.user.id)
+        with self.assertNumQueries(0):
+            self.assertIs(resolve.get_index(self.user.id), index)
+
+    def test_save_rebuilds_the_index(self):
+        john = self.contact("John Smith", "manager")
+        self.assertEqual(self.names("john"), ["John Smith"])
+        john.name = "Jack Smith"
+        john.save()
+        self.assertEqual(self.names("john"), [])
+        self.assertEqual(self.names("jack"), ["Jack Smith"])
+
+    def test_delete_rebuilds_the_index(self):
+        john = self.contact("John Smith", "manager")
+        self.assertEqual(self.names("manager"), ["John Smith"])
+        john.delete()
+        self.assertEqual(self.names("manager"), [])
+
+    def test_shared_cache_generation_rebuilds_the_index(self):
+        # A write on another worker only bumps the shared generation
+        index = resolve.get_index(self.user.id)
+        caching.invalidate(self.user.id)
+        self.assertIsNot(resolve.get_index(self.user.id), index)
+
+    def test_resolve_endpoint_returns_candidates_per_query(self):
+        self.contact("John Smith", "manager")
+        response = self.client.post(reverse("contact_resolve"), {"queries": ["my manager", "nobody"]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        results = response.data["results"]
+        self.assertEqual([r["query"] for r in results], ["my manager", "nobody"])
+        self.assertEqual([(c["name"], c["match"]) for c in results[0]["candidates"]], [("John Smith", "relation")])
+        self.assertEqual(results[1]["candidates"], [])
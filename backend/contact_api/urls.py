@@ -2,5 +2,11 @@ from django.urls import path
 from . import views
 urlpatterns = [
     path('contacts/', views.ContactView.as_view(), name='all_contacts'),
-    path('contacts/<int:pk>/', views.ContactDetailView.as_view(), name="contact_detail")
+    path('contacts/resolve/', views.ContactResolveView.as_view(), name='contact_resolve'),
+    path('contacts/import/', views.ContactImportView.as_view(), name='contact_import'),
+    path('contacts/export/', views.ContactExportView.as_view(), name='contact_export'),
+    path('contacts/<int:pk>/', views.ContactDetailView.as_view(), name="contact_detail"),
+    path('groups/', views.ContactGroupView.as_view(), name='contact_groups'),
+    path('groups/<str:name>/', views.ContactGroupDetailView.as_view(), name='contact_group_detail'),
+    path('groups/<str:name>/expand/', views.ContactGroupExpandView.as_view(), name='contact_group_expand'),
 ]
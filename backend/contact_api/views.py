@@ -1,9 +1,15 @@
+from django.db import transaction
+from django.db.models import Count
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.views import APIView
-from . models import Contacts
-from .serializers import ContactSerializers
+from . models import ContactGroup, ContactGroupMember, Contacts
+from . import bulk, caching, groups, resolve
+from .pagination import ContactCursorPagination
+from .serializers import ContactGroupMembersSerializers, ContactGroupSerializers, ContactSerializers
 from rest_framework.response import Response
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 
 class ContactView(APIView):
@@ -11,9 +17,36 @@ class ContactView(APIView):
     permission_classes=[IsAuthenticated]
 
     def get(self, request):
-        result = Contacts.objects.filter(user=request.user)
-        serializer = ContactSerializers(result, many=True)
-        return Response(serializer.data)
+        """
+        Cursor-paginated contacts: {"next", "previous", "results"}.
+
+        Filters (each backed by a (user, field) index):
+        ?relation=manager  ?email=a@b.com  (exact)
+        ?name=jo  (case-insensitive name prefix)
+        Page size: ?page_size=1..200 (default 50).
+        Pages are cached per user until the user's next contact write.
+        """
+        return Response(caching.contacts.get_or_set(request.user.id, caching.page_key(request),
+                                                    lambda: self._page(request)))
+
+    def _page(self, request):
+        # Plain dicts skip the per-row serializer pass
+        contacts = Contacts.objects.filter(user=request.user).values(*ContactSerializers.Meta.fields)
+        relation = request.query_params.get("relation")
+        email = request.query_params.get("email")
+        name_prefix = request.query_params.get("name")
+        if relation:
+            contacts = contacts.filter(relation=relation)
+        if email:
+            contacts = contacts.filter(email=email)
+        if name_prefix:
+            # UPPER(name) LIKE 'JO%': collation-independent, and served by the
+            # pattern-ops index from migration 0004 on PostgreSQL
+            contacts = contacts.filter(name__istartswith=name_prefix)
+
+        paginator = ContactCursorPagination()
+        page = paginator.paginate_queryset(contacts, request, view=self)
+        return paginator.get_paginated_response(page).data
     
     def post(self,request):
         serializer=ContactSerializers(data=request.data)
@@ -41,4 +74,178 @@ class ContactDetailView(APIView):
     def delete(self, request, pk):
         contact = get_object_or_404(Contacts, pk=pk, user=request.user)
         contact.delete()
-        return Response({"message": "Deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        return Response({"message": "Deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
+
+
+class ContactResolveView(APIView):
+    """
+    Resolve names or relations to the best-matching contacts.
+
+    GET  ?q=John&q=my manager&limit=5
+    POST {"queries": ["John", "colleagues"], "limit": 5}
+    """
+
+    permission_classes=[IsAuthenticated]
+
+    def get(self, request):
+        return self._resolve(request, request.query_params.getlist("q"), request.query_params.get("limit", 5))
+
+    def post(self, request):
+        queries = request.data.get("queries", [])
+        if isinstance(queries, str):
+            queries = [queries]
+        return self._resolve(request, queries, request.data.get("limit", 5))
+
+    def _resolve(self, request, queries, limit):
+        queries = [q for q in queries if isinstance(q, str) and q.strip()]
+        if not queries:
+            return Response({"error": "At least one query is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(1, min(int(limit), 20))
+        except (TypeError, ValueError):
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        index = resolve.get_index(request.user.id)
+        results = []
+        for query in queries:
+            candidates = [
+                {**row, "score": score, "match": match}
+                for score, match, row in index.resolve(query, limit=limit)
+            ]
+            results.append({"query": query, "candidates": candidates})
+        return Response({"results": results})
+
+
+class ContactImportView(APIView):
+    """
+    Upsert contacts from a CSV or JSONL upload, keyed on email.
+
+    POST multipart "file" (CSV with a name,email,relation,tone header, or one
+    JSON object per line); ?type=csv|jsonl overrides detection by file name.
+    Returns {"created", "updated", "failed", "errors": [{"row", "errors"}]}.
+    """
+
+    permission_classes=[IsAuthenticated]
+    parser_classes=[MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"error": "Upload a file in the 'file' field"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            fmt = bulk.detect_format(request.query_params.get("type"), upload.name, upload.content_type)
+            report = bulk.import_contacts(request.user, bulk.read_rows(upload, fmt))
+        except bulk.ImportFormatError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except UnicodeDecodeError:
+            return Response({"error": "The file must be UTF-8 encoded"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_200_OK)
+
+
+class ContactExportView(APIView):
+    """Stream every contact as CSV (default) or JSONL: GET ?type=csv|jsonl"""
+
+    permission_classes=[IsAuthenticated]
+
+    def get(self, request):
+        fmt = request.query_params.get("type", "csv").lower()
+        if fmt not in bulk.FORMATS:
+            return Response({"error": f"type must be one of {', '.join(bulk.FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        content_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+        response = StreamingHttpResponse(bulk.export_lines(request.user, fmt), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="contacts.{fmt}"'
+        return response
+
+
+class ContactGroupView(APIView):
+    """
+    GET  -> {"groups": [{"name", "key", "kind", "size"}, ...]}
+    POST {"name": "Launch team", "contact_ids": [1, 2]} creates a distribution list.
+    Relation groups ("colleague", "family", ...) exist automatically.
+    """
+
+    permission_classes=[IsAuthenticated]
+
+    def get(self, request):
+        def load():
+            rows = (ContactGroup.objects.filter(user=request.user)
+                    .annotate(size=Count("memberships")).order_by("key")
+                    .values("name", "key", "kind", "size"))
+            return {"groups": list(rows)}
+        return Response(caching.contacts.get_or_set(request.user.id, "groups", load))
+
+    def post(self, request):
+        serializer = ContactGroupSerializers(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        name = serializer.validated_data["name"].strip()
+        key = groups.group_key(name)
+        if not key:
+            return Response({"name": ["Enter a group name."]}, status=status.HTTP_400_BAD_REQUEST)
+        if ContactGroup.objects.filter(user=request.user, key=key).exists():
+            return Response({"name": ["A group with this name already exists."]}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            group = ContactGroup.objects.create(user=request.user, name=name, key=key, kind=ContactGroup.LIST)
+            contact_ids = Contacts.objects.filter(user=request.user, id__in=serializer.validated_data["contact_ids"]).values_list("id", flat=True)
+            ContactGroupMember.objects.bulk_create([ContactGroupMember(group=group, contact_id=i) for i in contact_ids])
+        caching.invalidate(request.user.id)
+        return Response({"name": group.name, "key": group.key, "kind": group.kind, "size": len(contact_ids)},
+                        status=status.HTTP_201_CREATED)
+
+
+class ContactGroupDetailView(APIView):
+    """
+    PATCH  {"add": [ids], "remove": [ids]} edits a distribution list.
+    DELETE removes a distribution list (relation groups follow the contacts).
+    """
+
+    permission_classes=[IsAuthenticated]
+
+    def _list_group(self, request, name):
+        group = get_object_or_404(ContactGroup, user=request.user, key=groups.group_key(name))
+        if group.kind != ContactGroup.LIST:
+            return group, Response({"error": "Relation groups follow the contacts' relation and can't be edited"},
+                                   status=status.HTTP_400_BAD_REQUEST)
+        return group, None
+
+    def patch(self, request, name):
+        group, error = self._list_group(request, name)
+        if error:
+            return error
+        serializer = ContactGroupMembersSerializers(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            add = Contacts.objects.filter(user=request.user, id__in=serializer.validated_data["add"]).values_list("id", flat=True)
+            ContactGroupMember.objects.bulk_create([ContactGroupMember(group=group, contact_id=i) for i in add],
+                                                   ignore_conflicts=True)
+            group.memberships.filter(contact_id__in=serializer.validated_data["remove"]).delete()
+        caching.invalidate(request.user.id)
+        return Response({"name": group.name, "key": group.key, "kind": group.kind, "size": group.memberships.count()})
+
+    def delete(self, request, name):
+        group, error = self._list_group(request, name)
+        if error:
+            return error
+        group.delete()
+        caching.invalidate(request.user.id)
+        return Response({"message": "Deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
+
+
+class ContactGroupExpandView(APIView):
+    """
+    Every member of a group, with tone, in one indexed query.
+
+    GET contactapi/groups/colleagues/expand/ -> {"group", "kind", "members": [...]}
+    Names are matched loosely: "my colleagues", "Colleague" and "colleague" are the same group.
+    """
+
+    permission_classes=[IsAuthenticated]
+
+    def get(self, request, name):
+        key = groups.group_key(name)
+        expanded = caching.contacts.get_or_set(request.user.id, caching.expand_key(key),
+                                               lambda: groups.expand(request.user.id, name))
+        if expanded is None:
+            return Response({"error": f"No group named {name!r}"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(expanded)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class GmailapiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gmailapi'
+
+    def ready(self):
+        from . import signals  # noqa: F401
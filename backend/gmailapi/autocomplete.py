@@ -0,0 +1,291 @@
+"""
+Address autocomplete harvested from mail headers
+Views hand the From/To/Cc headers of every message they fetch or send to a
+background harvester, which folds them into AddressBookEntry rows and into a
+per-user in-memory prefix index. Autocomplete lookups are answered from that
+index only and never touch Gmail or, once the index is loaded, the database.
+Every harvest bumps the shared caching.address_book generation, so other
+workers rebuild their copy of the index on their next lookup.
+
+Ranking is frecency: every sighting adds a weight (more for addresses the user
+writes to) and scores halve every AUTOCOMPLETE_HALF_LIFE_DAYS. Scores are kept
+as log2(score) + last_seen / half_life, which orders entries the same way as
+their decayed score at any later time, so nothing is recomputed per query.
+"""
+
+import bisect
+import collections
+import heapq
+import logging
+import math
+import queue
+import re
+import threading
+from datetime import datetime, timezone as dt_timezone
+from email.utils import getaddresses, parsedate_to_datetime
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from . import caching
+from .models import AddressBookEntry
+
+logger = logging.getLogger(__name__)
+
+SENT_WEIGHT = 2.0
+RECEIVED_WEIGHT = 1.0
+SEEN_MESSAGES_PER_USER = 5000
+# Prefixes matching more keys than this are answered by walking entries in rank order
+DENSE_PREFIX_KEYS = 2000
+
+_TOKEN_SPLIT = re.compile(r"[\s._+\-@]+")
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+def _half_life():
+    return settings.AUTOCOMPLETE_HALF_LIFE_DAYS * 86400
+
+
+def rank(score, last_seen_ts):
+    return math.log2(max(score, 1e-9)) + last_seen_ts / _half_life()
+
+
+def add_sighting(score, last_seen_ts, weight, seen_ts):
+    """Fold one sighting into a (score, last_seen) pair, decaying whichever side is older."""
+    if seen_ts >= last_seen_ts:
+        return score * 2 ** (-(seen_ts - last_seen_ts) / _half_life()) + weight, seen_ts
+    return score + weight * 2 ** (-(last_seen_ts - seen_ts) / _half_life()), last_seen_ts
+
+
+def tokens(email, name):
+    """Lowercased keys an entry is found under: the address, its parts, the name and each name word."""
+    email, name = email.lower(), " ".join(name.lower().split())
+    local, _, domain = email.partition("@")
+    keys = {email, domain.split(".")[0], *(t for t in _TOKEN_SPLIT.split(local) if t)}
+    keys.discard("")
+    if name:
+        keys.add(name)
+        keys.update(name.split())
+    return keys
+
+
+class AutocompleteIndex:
+    """
+    Sorted (token, email) keys for prefix search plus each address's name and rank.
+
+    Narrow prefixes collect their matches from the key range and keep the best;
+    broad ones ("a", "j") walk all entries best-first and stop at ``limit``.
+    """
+
+    def __init__(self, rows):
+        self._lock = threading.Lock()
+        self.entries = {}  # email -> [name, score, last_seen_ts, rank, tokens]
+        self.keys = []
+        for row in rows:
+            ts = row["last_seen"].timestamp()
+            entry_tokens = tokens(row["email"], row["name"])
+            self.entries[row["email"]] = [row["name"], row["score"], ts, rank(row["score"], ts), entry_tokens]
+            self.keys.extend((token, row["email"]) for token in entry_tokens)
+        self.keys.sort()
+        self._ranked = None  # emails best first, rebuilt lazily after updates
+
+    def update(self, email, name, score, last_seen_ts):
+        with self._lock:
+            entry = self.entries.get(email)
+            old_tokens = entry[4] if entry else set()
+            new_tokens = tokens(email, name)
+            # Keys for a previous display name stay, so the old name still finds the address
+            self.entries[email] = [name, score, last_seen_ts, rank(score, last_seen_ts), old_tokens | new_tokens]
+            for token in new_tokens - old_tokens:
+                bisect.insort(self.keys, (token, email))
+            self._ranked = None
+
+    def _ranked_emails(self):
+        if self._ranked is None:
+            self._ranked = sorted(self.entries, key=lambda email: -self.entries[email][3])
+        return self._ranked
+
+    def search(self, prefix, limit):
+        prefix = " ".join(prefix.lower().split())
+        with self._lock:
+            start = bisect.bisect_left(self.keys, (prefix, ""))
+            end = bisect.bisect_left(self.keys, (prefix + "\U0010ffff", ""))
+            if end - start > DENSE_PREFIX_KEYS:
+                best = []
+                for email in self._ranked_emails():
+                    if not prefix or any(token.startswith(prefix) for token in self.entries[email][4]):
+                        best.append(email)
+                        if len(best) == limit:
+                            break
+            else:
+                matches = {email for _, email in self.keys[start:end]}
+                best = heapq.nlargest(limit, matches, key=lambda email: self.entries[email][3])
+            return [{"email": email, "name": self.entries[email][0]} for email in best]
+
+
+_lock = threading.Lock()
+_versions = collections.defaultdict(int)
+_indexes = {}
+
+
+def get_index(user_id):
+    # Harvests on other workers only show up as a new generation of the shared cache
+    shared = caching.address_book.generation(user_id)
+    with _lock:
+        version = (_versions[user_id], shared)
+        cached = _indexes.get(user_id)
+        if cached and cached[0] == version:
+            return cached[1]
+    rows = AddressBookEntry.objects.filter(user_id=user_id).values("email", "name", "score", "last_seen")
+    index = AutocompleteIndex(rows)
+    with _lock:
+        # A harvest that landed while we were reading would be missing from this build
+        if _versions[user_id] == version[0]:
+            _indexes[user_id] = (version, index)
+    return index
+
+
+def clear():
+    """Drop every user's index (load tests start each run cold)."""
+    with _lock:
+        _indexes.clear()
+        _versions.clear()
+
+
+def search(user_id, prefix, limit):
+    return get_index(user_id).search(prefix, limit)
+
+
+def _parse_date(value):
+    try:
+        seen = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return datetime.now(dt_timezone.utc)
+    if seen.tzinfo is None:
+        seen = seen.replace(tzinfo=dt_timezone.utc)
+    return min(seen, datetime.now(dt_timezone.utc))
+
+
+def sightings(own_address, messages):
+    """``{email: [name, [(weight, seen_ts), ...]]}`` for a batch of message header dicts."""
+    own_address = (own_address or "").lower()
+    found = {}
+    for message in messages:
+        seen_ts = _parse_date(message.get("date")).timestamp()
+        senders = getaddresses([message.get("from") or ""])
+        sent = bool(own_address) and any(addr.lower() == own_address for _, addr in senders)
+        weight = SENT_WEIGHT if sent else RECEIVED_WEIGHT
+        recipients = getaddresses([message.get("to") or "", message.get("cc") or ""])
+        for name, addr in senders + recipients:
+            addr = addr.strip().lower()
+            if not _EMAIL.match(addr) or addr == own_address:
+                continue
+            name = " ".join(name.split())[:200]
+            events = found.setdefault(addr, [name, []])
+            events[0] = events[0] or name
+            events[1].append((weight, seen_ts))
+    return found
+
+
+class Harvester:
+    """Daemon thread draining a bounded queue of (user_id, own address, messages)."""
+
+    def __init__(self, maxsize):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._seen = collections.defaultdict(collections.OrderedDict)  # user_id -> message ids
+        self.dropped = 0
+
+    def ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="address-harvester", daemon=True)
+                self._thread.start()
+
+    def submit(self, user, messages):
+        """Queue message header dicts (from/to/cc/date, optional id) for harvesting; never blocks."""
+        if not messages:
+            return
+        self.ensure_started()
+        try:
+            self._queue.put_nowait((user.pk, user.email, list(messages)))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logger.warning(f"Address harvester queue full, dropped {len(messages)} messages for user {user.pk}")
+
+    def _run(self):
+        while True:
+            user_id, own_address, messages = self._queue.get()
+            try:
+                close_old_connections()
+                self.harvest(user_id, own_address, messages)
+            except Exception as e:
+                logger.error(f"Address harvest failed for user {user_id}: {e}")
+            finally:
+                close_old_connections()
+                self._queue.task_done()
+
+    def join(self):
+        """Block until everything queued so far has been harvested."""
+        self._queue.join()
+
+    def harvest(self, user_id, own_address, messages):
+        seen = self._seen[user_id]
+        fresh = []
+        for message in messages:
+            message_id = message.get("id")
+            if message_id and message_id in seen:
+                continue  # re-listing the same inbox page shouldn't count twice
+            if message_id:
+                seen[message_id] = None
+                if len(seen) > SEEN_MESSAGES_PER_USER:
+                    seen.popitem(last=False)
+            fresh.append(message)
+        found = sightings(own_address, fresh)
+        if not found:
+            return
+
+        with transaction.atomic():
+            existing = {
+                row.email: row
+                for row in AddressBookEntry.objects.filter(user_id=user_id, email__in=list(found))
+            }
+            rows = []
+            for addr, (name, events) in found.items():
+                row = existing.get(addr) or AddressBookEntry(user_id=user_id, email=addr, score=0.0, count=0,
+                                                             last_seen=datetime.fromtimestamp(0, dt_timezone.utc))
+                score, last_seen_ts = row.score, row.last_seen.timestamp()
+                for weight, seen_ts in events:
+                    score, last_seen_ts = add_sighting(score, last_seen_ts, weight, seen_ts)
+                row.name = name or row.name
+                row.score = score
+                row.count += len(events)
+                row.last_seen = datetime.fromtimestamp(last_seen_ts, dt_timezone.utc)
+                rows.append(row)
+            AddressBookEntry.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=["user", "email"],
+                update_fields=["name", "score", "count", "last_seen"],
+            )
+
+        generation = caching.address_book.invalidate(user_id)
+        with _lock:
+            _versions[user_id] += 1
+            cached = _indexes.pop(user_id, None)
+            # Patch the loaded index in place only if no other worker harvested
+            # since it was built; otherwise the next lookup rebuilds it
+            built_at = cached[0][1] if cached else None
+            if built_at is not None and generation == built_at + 1:
+                _indexes[user_id] = ((_versions[user_id], generation), cached[1])
+            else:
+                cached = None
+        if cached:
+            index = cached[1]
+            for row in rows:
+                index.update(row.email, row.name, row.score, row.last_seen.timestamp())
+
+
+harvester = Harvester(maxsize=settings.AUTOCOMPLETE_QUEUE_SIZE)
@@ -0,0 +1,28 @@
+"""
+Cached Gmail state
+- credentials: the stored token fields, so authenticating a Gmail call skips
+  the GoogleCredentials query; invalidated whenever the row is written.
+- messages: parsed message summaries and details by message id. Message
+  content never changes, so these only age out.
+- listings: the message ids of a listing page, briefly, so paging back and
+  forth doesn't re-list; invalidated when the user sends mail.
+- address_book: holds no entries; its generation is bumped on every harvest so
+  each worker's in-process autocomplete index notices the others' writes.
+"""
+
+import hashlib
+
+from django.conf import settings
+
+from backend.cache import Namespace
+
+credentials = Namespace("gmail.credentials", timeout=settings.CACHE_GMAIL_CREDENTIALS_TIMEOUT)
+messages = Namespace("gmail.messages", timeout=settings.CACHE_GMAIL_MESSAGE_TIMEOUT)
+listings = Namespace("gmail.listings", timeout=settings.CACHE_GMAIL_LIST_TIMEOUT)
+address_book = Namespace("gmail.address_book")
+
+
+def listing_key(query, max_results, page_token):
+    # Hashed: search queries contain spaces, which memcached rejects in keys
+    raw = f"{max_results}:{page_token or ''}:{query or ''}"
+    return "list:" + hashlib.sha1(raw.encode()).hexdigest()
@@ -26,3 +26,22 @@ class GoogleCredentials(models.Model):
             "scopes": json.loads(self.scopes) if isinstance(self.scopes, str) else self.scopes,
             "expiry": self.expiry,
         }
+
+
+class AddressBookEntry(models.Model):
+    """An address seen in the user's mail headers, ranked by frecency (see autocomplete.py)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="address_book")
+    email = models.EmailField()
+    name = models.CharField(max_length=200, blank=True)
+    # Decayed score as of last_seen; every sighting adds its weight
+    score = models.FloatField(default=0.0)
+    count = models.PositiveIntegerField(default=0)
+    last_seen = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "email"], name="address_book_user_email_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} <{self.email}>" if self.name else self.email
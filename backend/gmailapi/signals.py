@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import caching
+from .models import GoogleCredentials
+
+
+@receiver([post_save, post_delete], sender=GoogleCredentials)
+def invalidate_credentials(sender, instance, **kwargs):
+    caching.credentials.invalidate(instance.user_id)
@@ -1,3 +1,143 @@
-from django.test import TestCase
+from datetime import datetime, timedelta, timezone as dt_timezone
+from email.utils import format_datetime
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase
+
+from . import autocomplete, caching
+from .models import AddressBookEntry
+
+DAY = 86400
+HALF_LIFE = 30 * DAY  # settings.AUTOCOMPLETE_HALF_LIFE_DAYS default
+
+
+def row(email, name, score, last_seen):
+    return {"email": email, "name": name, "score": score,
+            "last_seen": datetime.fromtimestamp(last_seen, dt_timezone.utc)}
+
+
+class FrecencyTests(SimpleTestCase):
+    def test_older_score_decays_before_a_new_sighting_is_added(self):
+        self.assertEqual(autocomplete.add_sighting(4.0, 0, 1.0, HALF_LIFE), (3.0, HALF_LIFE))
+
+    def test_out_of_order_sighting_is_decayed_instead(self):
+        self.assertEqual(autocomplete.add_sighting(4.0, HALF_LIFE, 2.0, 0), (5.0, HALF_LIFE))
+
+    def test_rank_orders_like_the_decayed_score(self):
+        # At HALF_LIFE, a (4 at 0) has decayed to 2, ahead of b's fresh 1.5
+        a = autocomplete.rank(4.0, 0)
+        b = autocomplete.rank(1.5, HALF_LIFE)
+        c = autocomplete.rank(2.5, HALF_LIFE)
+        self.assertGreater(a, b)
+        self.assertGreater(c, a)
+
+    def test_tokens_cover_the_address_its_parts_and_the_name(self):
+        self.assertEqual(
+            autocomplete.tokens("Mary-Jane.Doe@Acme.co.uk", " Mary  Jane Doe "),
+            {"mary-jane.doe@acme.co.uk", "mary", "jane", "doe", "acme", "mary jane doe"},
+        )
+
+
+class AutocompleteIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = autocomplete.AutocompleteIndex([
+            row("john@acme.com", "John Smith", 1.0, 0),
+            row("jo.park@example.com", "Jo Park", 8.0, 0),
+            row("ann@acme.com", "Ann Lee", 2.0, HALF_LIFE),
+        ])
+
+    def emails(self, prefix, limit=10):
+        return [match["email"] for match in self.index.search(prefix, limit)]
+
+    def test_prefix_matches_name_words_address_parts_and_domain(self):
+        self.assertEqual(self.emails("jo"), ["jo.park@example.com", "john@acme.com"])
+        self.assertEqual(self.emails("SMI"), ["john@acme.com"])
+        self.assertEqual(self.emails("acme"), ["ann@acme.com", "john@acme.com"])
+        self.assertEqual(self.emails("park@"), [])
+        self.assertEqual(self.emails("jo", limit=1), ["jo.park@example.com"])
+
+    def test_broad_prefixes_walk_entries_in_rank_order(self):
+        narrow = self.emails("")
+        with mock.patch.object(autocomplete, "DENSE_PREFIX_KEYS", 0):
+            self.assertEqual(self.emails(""), narrow)
+            self.assertEqual(self.emails("jo"), ["jo.park@example.com", "john@acme.com"])
+        self.assertEqual(narrow, ["jo.park@example.com", "ann@acme.com", "john@acme.com"])
+
+    def test_update_reranks_and_keeps_the_old_name_searchable(self):
+        self.index.update("john@acme.com", "Johnny Smith", 100.0, HALF_LIFE)
+        self.assertEqual(self.emails("")[0], "john@acme.com")
+        self.assertEqual(self.emails("johnny"), ["john@acme.com"])
+        self.assertEqual(self.index.search("john s", 10), [{"email": "john@acme.com", "name": "Johnny Smith"}])
+
+
+class HarvestTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        autocomplete.clear()
+        self.user = User.objects.create_user("owner", email="me@example.com", password="pw")
+        self.harvester = autocomplete.Harvester(maxsize=10)
+        self.now = datetime.now(dt_timezone.utc).replace(microsecond=0)
+
+    def message(self, message_id, sender, to, cc="", days_ago=0):
+        return {"id": message_id, "from": sender, "to": to, "cc": cc,
+                "date": format_datetime(self.now - timedelta(days=days_ago))}
+
+    def harvest(self, *messages):
+        self.harvester.harvest(self.user.pk, self.user.email, messages)
+
+    def entry(self, email):
+        return AddressBookEntry.objects.get(user=self.user, email=email)
+
+    def test_sightings_weigh_sent_mail_higher_and_skip_the_user(self):
+        found = autocomplete.sightings("Me@Example.com", [
+            self.message("1", "Me <me@example.com>", "Ann Lee <ann@acme.com>, not-an-address"),
+            self.message("2", "Ann <ANN@acme.com>", "me@example.com", cc="Bob <bob@x.io>"),
+        ])
+        self.assertEqual(set(found), {"ann@acme.com", "bob@x.io"})
+        self.assertEqual(found["ann@acme.com"][0], "Ann Lee")
+        self.assertEqual([w for w, _ in found["ann@acme.com"][1]], [autocomplete.SENT_WEIGHT, autocomplete.RECEIVED_WEIGHT])
+        self.assertEqual([w for w, _ in found["bob@x.io"][1]], [autocomplete.RECEIVED_WEIGHT])
+
+    def test_harvest_upserts_entries_and_skips_messages_seen_before(self):
+        self.harvest(self.message("1", "me@example.com", "Ann Lee <ann@acme.com>", days_ago=30))
+        self.harvest(self.message("1", "me@example.com", "Ann Lee <ann@acme.com>", days_ago=30),
+                     self.message("2", "Ann L. <ann@acme.com>", "me@example.com"))
+        ann = self.entry("ann@acme.com")
+        self.assertEqual((ann.name, ann.count), ("Ann L.", 2))
+        # The sent sighting has decayed by one half-life when the received one lands
+        self.assertAlmostEqual(ann.score, autocomplete.SENT_WEIGHT / 2 + autocomplete.RECEIVED_WEIGHT, places=3)
+        self.assertFalse(AddressBookEntry.objects.filter(user=self.user, email="me@example.com").exists())
+
+    def test_frequent_recipients_rank_first(self):
+        self.harvest(self.message("1", "Bob <bob@x.io>", "me@example.com"),
+                     self.message("2", "me@example.com", "Bea <bea@x.io>"))
+        self.assertEqual([m["email"] for m in autocomplete.search(self.user.pk, "b", 10)], ["bea@x.io", "bob@x.io"])
+
+    def test_loaded_index_is_patched_in_place(self):
+        self.harvest(self.message("1", "Ann <ann@acme.com>", "me@example.com"))
+        index = autocomplete.get_index(self.user.pk)
+        self.harvest(self.message("2", "Bob <bob@x.io>", "me@example.com"))
+        with self.assertNumQueries(0):
+            self.assertIs(autocomplete.get_index(self.user.pk), index)
+            self.assertEqual(autocomplete.search(self.user.pk, "bob", 10), [{"email": "bob@x.io", "name": "Bob"}])
+
+    def test_harvest_on_another_worker_rebuilds_the_index(self):
+        self.harvest(self.message("1", "Ann <ann@acme.com>", "me@example.com"))
+        index = autocomplete.get_index(self.user.pk)
+        # Another worker's harvest: a new row plus a bumped shared generation
+        AddressBookEntry.objects.create(user=self.user, email="bob@x.io", name="Bob", score=1.0, count=1)
+        caching.address_book.invalidate(self.user.pk)
+        self.assertIsNot(autocomplete.get_index(self.user.pk), index)
+        self.assertEqual(autocomplete.search(self.user.pk, "bob", 10), [{"email": "bob@x.io", "name": "Bob"}])
+
+    def test_local_harvest_after_a_foreign_one_does_not_patch_a_stale_index(self):
+        self.harvest(self.message("1", "Ann <ann@acme.com>", "me@example.com"))
+        index = autocomplete.get_index(self.user.pk)
+        AddressBookEntry.objects.create(user=self.user, email="bob@x.io", name="Bob", score=1.0, count=1)
+        caching.address_book.invalidate(self.user.pk)
+        self.harvest(self.message("2", "Cy <cy@x.io>", "me@example.com"))
+        rebuilt = autocomplete.get_index(self.user.pk)
+        self.assertIsNot(rebuilt, index)
+        self.assertEqual({m["email"] for m in rebuilt.search("", 10)}, {"ann@acme.com", "bob@x.io", "cy@x.io"})
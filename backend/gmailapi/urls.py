@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import AiCompose, GoogleAuthView, EmailListView, EmailDetailView, SendEmailView, oauth2callback
+from .views import AddressAutocompleteView, AiCompose, GoogleAuthView, EmailListView, EmailDetailView, SendEmailView, oauth2callback
 
 urlpatterns = [
     path("auth/", GoogleAuthView.as_view(), name="google_auth"),
@@ -8,5 +8,6 @@ urlpatterns = [
     path("emails/", EmailListView.as_view(), name="emails"),
     path("emails/<str:email_id>/", EmailDetailView.as_view(), name="email_detail"),
     path("send/", SendEmailView.as_view(), name="send_email"),
+    path("autocomplete/", AddressAutocompleteView.as_view(), name="address_autocomplete"),
     path("aicompose/", AiCompose.as_view(), name="send_email"),
 ]
@@ -29,6 +29,9 @@ from google.auth.transport.requests import Request
 from google.auth.exceptions import RefreshError
 from googleapiclient.errors import HttpError
 
+from backend import timing
+
+from . import autocomplete, caching
 from .models import GoogleCredentials
 
 logger = logging.getLogger(__name__)
@@ -43,24 +46,35 @@ def get_google_credentials(user):
     """
     Retrieves and refreshes Google credentials for a given user from the database.
     Application-specific secrets (client_id, client_secret) are loaded from settings.
+    The stored fields are served from the cache; saving the row invalidates it.
     """
-    token_obj = GoogleCredentials.objects.get(user=user)
-    
+    def load():
+        token_obj = GoogleCredentials.objects.get(user=user)
+        return {
+            "token": token_obj.token,
+            "refresh_token": token_obj.refresh_token,
+            "token_uri": token_obj.token_uri,
+            "scopes": token_obj.scopes.split(),
+            # google-auth compares expiry against naive UTC
+            "expiry": token_obj.expiry.astimezone(timezone.utc).replace(tzinfo=None) if token_obj.expiry else None,
+        }
+
+    stored = caching.credentials.get_or_set(user.pk, "token", load)
     creds = Credentials(
-        token=token_obj.token,
-        refresh_token=token_obj.refresh_token,
-        token_uri=token_obj.token_uri,
         client_id=settings.GOOGLE_CLIENT_ID,  # Loaded from settings for security
         client_secret=settings.GOOGLE_CLIENT_SECRET,  # Loaded from settings
-        scopes=token_obj.scopes.split(),
+        **stored,
     )
 
     # If credentials have expired, refresh them and update the database
     if creds.expired and creds.refresh_token:
-        creds.refresh(Request())
-        token_obj.token = creds.token
-        token_obj.expiry = creds.expiry
-        token_obj.save(update_fields=['token', 'expiry'])
+        with timing.track("gmail"):
+            creds.refresh(Request())
+        GoogleCredentials.objects.filter(user=user).update(
+            token=creds.token, expiry=creds.expiry.replace(tzinfo=timezone.utc)
+        )
+        # update() sends no post_save
+        caching.credentials.invalidate(user.pk)
         logger.info(f"Refreshed token for user {user.pk}")
 
     return creds
@@ -115,7 +129,8 @@ def oauth2callback(request):
     )
     
     try:
-        flow.fetch_token(authorization_response=request.build_absolute_uri())
+        with timing.track("gmail"):
+            flow.fetch_token(authorization_response=request.build_absolute_uri())
         creds = flow.credentials
 
         # Save the user-specific credentials to the database
@@ -137,7 +152,8 @@ def oauth2callback(request):
         try:
             # Build Gmail service with the new credentials
             service = build("gmail", "v1", credentials=creds)
-            profile = service.users().getProfile(userId="me").execute()
+            with timing.track("gmail"):
+                profile = service.users().getProfile(userId="me").execute()
             gmail_address = profile.get("emailAddress")
             if gmail_address:
                 user.email = gmail_address
@@ -186,29 +202,53 @@ class EmailListView(APIView):
             if page_token:
                 list_params["pageToken"] = page_token
                 
-            results = service.users().messages().list(**list_params).execute()
-            messages = results.get("messages", [])
-            next_page_token = results.get("nextPageToken")
+            def list_page():
+                with timing.track("gmail"):
+                    results = service.users().messages().list(**list_params).execute()
+                return {
+                    "ids": [msg["id"] for msg in results.get("messages", [])],
+                    "next_page_token": results.get("nextPageToken"),
+                }
+
+            page = caching.listings.get_or_set(
+                request.user.pk, caching.listing_key(query, max_results, page_token), list_page
+            )
+            message_ids = page["ids"]
+            next_page_token = page["next_page_token"]
             
-            if not messages:
+            if not message_ids:
                 return Response({
                     "emails": [], 
                     "next_page_token": None, 
                     "total_count": 0
                 })
 
+            # Only messages that aren't cached yet are fetched
+            cached = caching.messages.get_many(request.user.pk, [f"summary:{i}" for i in message_ids])
+            missing = [i for i in message_ids if f"summary:{i}" not in cached]
+
             # --- Performance Improvement: Use a Batch Request ---
-            email_data = []
-            batch = service.new_batch_http_request(
-                callback=self._batch_callback_factory(email_data)
-            )
+            if missing:
+                fetched = []
+                batch = service.new_batch_http_request(
+                    callback=self._batch_callback_factory(fetched)
+                )
 
-            for msg in messages:
-                batch.add(service.users().messages().get(userId="me", id=msg["id"], format="full"))
+                for message_id in missing:
+                    batch.add(service.users().messages().get(userId="me", id=message_id, format="full"))
 
-            batch.execute()
+                with timing.track("gmail"):
+                    batch.execute()
+                caching.messages.set_many(request.user.pk, {f"summary:{e['id']}": e for e in fetched})
+                cached.update((f"summary:{e['id']}", e) for e in fetched)
             # --- End of Batch Request ---
 
+            # Listing order, whichever way each message was found
+            email_data = [cached[f"summary:{i}"] for i in message_ids if f"summary:{i}" in cached]
+
+            # Feed the autocomplete index in the background
+            autocomplete.harvester.submit(request.user, email_data)
+
             return Response({
                 "emails": email_data,
                 "next_page_token": next_page_token,
@@ -244,6 +284,7 @@ class EmailListView(APIView):
                     "id": response["id"],
                     "from": get_header("From"),
                     "to": get_header("To"),
+                    "cc": get_header("Cc", ""),
                     "subject": get_header("Subject", "(No Subject)"),
                     "date": get_header("Date"),
                     "message_id": get_header("Message-ID"),
@@ -287,15 +328,20 @@ class EmailDetailView(APIView):
         - email_id: The Gmail message ID
         """
         try:
+            cached = caching.messages.get(request.user.pk, f"detail:{email_id}")
+            if cached is not None:
+                return Response(cached, status=status.HTTP_200_OK)
+
             creds = get_google_credentials(request.user)
             service = build("gmail", "v1", credentials=creds)
             
             # Fetch the specific message
-            message = service.users().messages().get(
-                userId="me", 
-                id=email_id, 
-                format="full"
-            ).execute()
+            with timing.track("gmail"):
+                message = service.users().messages().get(
+                    userId="me", 
+                    id=email_id, 
+                    format="full"
+                ).execute()
             
             # Extract headers
             headers = message["payload"]["headers"]
@@ -309,6 +355,7 @@ class EmailDetailView(APIView):
                 "id": message["id"],
                 "from": get_header("From"),
                 "to": get_header("To"),
+                "cc": get_header("Cc", ""),
                 "subject": get_header("Subject", "(No Subject)"),
                 "date": get_header("Date"),
                 "message_id": get_header("Message-ID"),
@@ -319,6 +366,10 @@ class EmailDetailView(APIView):
                 "labels": message.get("labelIds", []),
                 "thread_id": message.get("threadId", "")
             }
+            # Labels (read, starred, ...) change, so details age out faster than summaries
+            caching.messages.set(request.user.pk, f"detail:{email_id}", email_detail,
+                                 timeout=settings.CACHE_GMAIL_LIST_TIMEOUT)
+            autocomplete.harvester.submit(request.user, [email_detail])
             
             return Response(email_detail, status=status.HTTP_200_OK)
 
@@ -407,6 +458,24 @@ class EmailDetailView(APIView):
         return body
 
 
+class AddressAutocompleteView(APIView):
+    """
+    Prefix autocomplete over addresses harvested from the user's mail headers.
+
+    GET ?q=jo&limit=10 -> {"results": [{"email", "name"}, ...]}, best first.
+    Answered from memory; never calls Gmail.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", settings.AUTOCOMPLETE_MAX_RESULTS)), 50))
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        results = autocomplete.search(request.user.pk, request.query_params.get("q", ""), limit)
+        return Response({"results": results})
+
+
 class SendEmailView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -433,12 +502,17 @@ class SendEmailView(APIView):
             raw = base64.urlsafe_b64encode(message.as_bytes()).decode()
 
             # Send email
-            send_message = (
-                service.users().messages().send(
-                    userId="me",
-                    body={"raw": raw}
-                ).execute()
-            )
+            with timing.track("gmail"):
+                send_message = (
+                    service.users().messages().send(
+                        userId="me",
+                        body={"raw": raw}
+                    ).execute()
+                )
+            # The sent message belongs in the user's listings now
+            caching.listings.invalidate(request.user.pk)
+            # Addresses the user writes to rank highest in autocomplete
+            autocomplete.harvester.submit(request.user, [{"id": send_message["id"], "from": request.user.email, "to": to}])
             return Response({"message_id": send_message["id"]}, status=status.HTTP_200_OK)
         except Exception as e:
             logger.error(f"Failed to send email: {e}")
@@ -455,15 +529,16 @@ class AiCompose(APIView):
     def post(self, request, *args, **kwargs):
         try:
             client = genai.Client()
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=request.data.get("body"),
-                config=types.GenerateContentConfig(
-                    system_instruction=f"You are a helpful email assistant. Always write professional and polite emails based on the user's content. Give with proper format with newline and new tab etc in body and. name = {request.user} to={request.data.get("to")}",
-                    response_mime_type="application/json",
-                    response_schema=Email,
-                ),
-            )
+            with timing.track("genai"):
+                response = client.models.generate_content(
+                    model="gemini-2.5-flash",
+                    contents=request.data.get("body"),
+                    config=types.GenerateContentConfig(
+                        system_instruction=f"You are a helpful email assistant. Always write professional and polite emails based on the user's content. Give with proper format with newline and new tab etc in body and. name = {request.user} to={request.data.get("to")}",
+                        response_mime_type="application/json",
+                        response_schema=Email,
+                    ),
+                )
             
             # Parse the JSON response
             email_data = json.loads(response.text)
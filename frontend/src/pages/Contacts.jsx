@@ -19,29 +19,31 @@ const Contacts = () => {
     const [error, setError] = useState(null)
     const [contacts, setContacts] = useState([])
     const [editingContact, setEditingContact] = useState(false)
-    useEffect(() => {
-        axios.get("http://127.0.0.1:8000/contactapi/contacts/")
+    // Cursor URL of the next page, null once everything is loaded
+    const [nextPage, setNextPage] = useState(null)
+    const [loadingMore, setLoadingMore] = useState(false)
+
+    // Fetch one page; append=false replaces the list (first page / refresh)
+    const loadContacts = (url = "http://127.0.0.1:8000/contactapi/contacts/", append = false) => {
+        setLoadingMore(true);
+        axios.get(url)
         .then(response => {
-            setContacts(response.data);
+            setContacts(prev => append ? [...prev, ...response.data.results] : response.data.results);
+            setNextPage(response.data.next);
         })
         .catch(error => {
             console.error("Failed to fetch contacts:", error);
             setError(error)
-        });
+        })
+        .finally(() => setLoadingMore(false));
+    };
 
+    useEffect(() => {
+        loadContacts();
     }, []);
 
     // Add this function to refresh contacts after creation
-    const refreshContacts = () => {
-        axios.get("http://127.0.0.1:8000/contactapi/contacts/")
-        .then(response => {
-            setContacts(response.data);
-        })
-        .catch(error => {
-            console.error("Failed to fetch contacts:", error);
-            setError(error)
-        });
-    };
+    const refreshContacts = () => loadContacts();
 
     const CreateModal = ({ setEditingContact, onCreated }) => {
         const [contactData, setContactData] = useState({
@@ -149,7 +151,16 @@ const Contacts = () => {
                     ))}
             </ul>
                 ) : (
-                    <p className="text-center p-4">Loading contacts...</p>
+                    <p className="text-center p-4">{loadingMore ? "Loading contacts..." : "No contacts yet."}</p>
+                )}
+                {nextPage && (
+                    <button
+                        className='bg-slate-700 hover:bg-slate-600 w-40 p-2 m-2 rounded-2xl cursor-pointer'
+                        disabled={loadingMore}
+                        onClick={() => loadContacts(nextPage, true)}
+                    >
+                        {loadingMore ? "Loading..." : "Load more"}
+                    </button>
                 )}
             </div>
             )}
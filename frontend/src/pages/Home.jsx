@@ -21,13 +21,22 @@ const Home = () => {
       return;
     }
 
-    axios.get("http://127.0.0.1:8000/contactapi/contacts/")
-      .then(response => {
-        setContacts(response.data);
-      })
-      .catch(error => {
-        console.error("Failed to fetch contacts:", error);
-      });
+    // Contacts come in cursor pages; show the first page right away and
+    // append the rest as they arrive
+    let cancelled = false;
+    const loadPage = (url, append) => {
+      axios.get(url)
+        .then(response => {
+          if (cancelled) return;
+          setContacts(prev => append ? [...prev, ...response.data.results] : response.data.results);
+          if (response.data.next) loadPage(response.data.next, true);
+        })
+        .catch(error => {
+          console.error("Failed to fetch contacts:", error);
+        });
+    };
+    loadPage("http://127.0.0.1:8000/contactapi/contacts/?page_size=200", false);
+    return () => { cancelled = true; };
   }, [loading, isAuthenticated, navigate]);
 
   const handleContactSelect = (email) => {
@@ -0,0 +1,102 @@
+"""
+Shared async HTTP client for the Django backend.
+
+One pooled httpx.AsyncClient serves every run in the process, so concurrent
+runs reuse keep-alive connections instead of blocking a worker on
+synchronous requests. Calls are timed into the running node's trace and
+retried with exponential backoff:
+- connection failures (the request never reached the backend) for any method,
+- read timeouts and 502/503/504 responses for idempotent methods only, so a
+  POST /send/ is never delivered twice.
+"""
+
+import asyncio
+import os
+import time
+
+import httpx
+from dotenv import load_dotenv
+
+from tracing import record_http
+
+load_dotenv()
+
+BACKEND_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000")
+BACKEND_TIMEOUT = float(os.getenv("BACKEND_TIMEOUT", "15"))
+BACKEND_CONNECT_TIMEOUT = float(os.getenv("BACKEND_CONNECT_TIMEOUT", "5"))
+BACKEND_RETRIES = int(os.getenv("BACKEND_RETRIES", "2"))
+BACKEND_RETRY_BACKOFF = float(os.getenv("BACKEND_RETRY_BACKOFF", "0.25"))
+BACKEND_MAX_CONNECTIONS = int(os.getenv("BACKEND_MAX_CONNECTIONS", "50"))
+BACKEND_MAX_KEEPALIVE = int(os.getenv("BACKEND_MAX_KEEPALIVE", "20"))
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {502, 503, 504}
+
+
+class BackendClient:
+    """Pooled async clients, one per event loop that uses them."""
+
+    def __init__(self, base_url: str, timeout: float, connect_timeout: float, retries: int, backoff: float):
+        self.base_url = base_url
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=BACKEND_MAX_CONNECTIONS, max_keepalive_connections=BACKEND_MAX_KEEPALIVE)
+        self.retries = retries
+        self.backoff = backoff
+        self._clients = {}
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        # httpx connections belong to one event loop; a new loop (e.g. a
+        # separate asyncio.run in scripts) gets a pool of its own
+        entry = self._clients.get(loop)
+        if entry is None:
+            client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=self.limits)
+            entry = self._clients[loop] = (client, self._close_on_shutdown(client))
+            await entry[1].asend(None)
+        return entry[0]
+
+    async def _close_on_shutdown(self, client: httpx.AsyncClient):
+        """Park until the loop finalizes its async generators, then close client.
+
+        asyncio.run and the server's runner do that before closing the loop, so
+        each pool is closed on the loop that owns its sockets instead of being
+        leaked when a later loop starts a new one.
+        """
+        try:
+            yield
+        finally:
+            self._clients.pop(asyncio.get_running_loop(), None)
+            await client.aclose()
+
+    async def request(self, method: str, path: str, token: str, **kwargs) -> httpx.Response:
+        method = method.upper()
+        client = await self._get_client()
+        headers = {"Authorization": f"Bearer {token}", **kwargs.pop("headers", {})}
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            status = None
+            try:
+                response = await client.request(method, path, headers=headers, **kwargs)
+                status = response.status_code
+                if status not in RETRY_STATUSES or method not in IDEMPOTENT_METHODS or attempt >= self.retries:
+                    return response
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                if attempt >= self.retries:
+                    raise
+            except httpx.TimeoutException:
+                if method not in IDEMPOTENT_METHODS or attempt >= self.retries:
+                    raise
+            finally:
+                record_http(method, f"{self.base_url}{path}", 1000 * (time.perf_counter() - started), status)
+            attempt += 1
+            print(f"  -> Retrying {method} {path} (attempt {attempt + 1})")
+            await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+
+    async def aclose(self):
+        entry = self._clients.get(asyncio.get_running_loop())
+        if entry is not None:
+            await entry[1].aclose()
+
+
+backend = BackendClient(BACKEND_URL, BACKEND_TIMEOUT, BACKEND_CONNECT_TIMEOUT, BACKEND_RETRIES, BACKEND_RETRY_BACKOFF)
@@ -0,0 +1,196 @@
+"""
+Scripted stand-in for the Gemini chat model.
+
+FakeChatModel answers every prompt the graph sends without a network call,
+after an artificial latency. Structured-output calls (with_structured_output)
+and researcher tool calls are both served as tool calls, the same way a real
+function-calling model answers them. What it answers is driven by the turn
+script registered for the current user message (see corpus.json).
+"""
+
+import asyncio
+import json
+import random
+import re
+import threading
+from collections import Counter
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+
+class FakeChatModel(BaseChatModel):
+    latency: float = 0.2
+    draft_latency: float | None = None  # EmailDraft calls; long outputs take longer than decisions
+    jitter: float = 0.0
+    qa_failure_rate: float = 0.0
+    seed: int = 0
+
+    _scripts: dict = PrivateAttr(default_factory=dict)
+    _calls: Counter = PrivateAttr(default_factory=Counter)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _random: random.Random = PrivateAttr(default=None)
+
+    def model_post_init(self, __context):
+        self._random = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "supermail-fake"
+
+    # --- Scripts and counters ---
+    def register_script(self, user_text: str, turn: dict):
+        self._scripts[user_text] = turn
+
+    def calls(self) -> dict:
+        with self._lock:
+            return dict(self._calls)
+
+    def reset_calls(self):
+        with self._lock:
+            self._calls.clear()
+
+    # --- BaseChatModel API ---
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return self._respond(messages, kwargs.get("tools") or [])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        names = [t["function"]["name"] for t in kwargs.get("tools") or []]
+        latency = self.draft_latency if names == ["EmailDraft"] and self.draft_latency is not None else self.latency
+        with self._lock:
+            delay = latency + self._random.uniform(0, self.jitter)
+        await asyncio.sleep(delay)
+        return self._respond(messages, kwargs.get("tools") or [])
+
+    def _respond(self, messages, tools) -> ChatResult:
+        names = [t["function"]["name"] for t in tools]
+        if len(names) == 1 and names[0][0].isupper():
+            # with_structured_output binds exactly one schema-named tool
+            kind = names[0]
+            message = self._tool_call(kind, self._structured(kind, messages))
+        elif names:
+            kind = "researcher"
+            message = self._researcher(messages)
+        else:
+            kind = "chat"
+            message = AIMessage(content="OK")
+        with self._lock:
+            self._calls[kind] += 1
+        prompt_chars = sum(len(str(m.content)) for m in messages)
+        output_chars = len(str(message.content)) + len(json.dumps(message.tool_calls))
+        message.usage_metadata = {
+            "input_tokens": prompt_chars // 4,
+            "output_tokens": output_chars // 4,
+            "total_tokens": (prompt_chars + output_chars) // 4,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    # --- Scripted answers ---
+    def _turn(self, messages) -> dict:
+        human = [m for m in messages if isinstance(m, HumanMessage)]
+        return self._scripts.get(human[-1].content if human else "", {}) if human else {}
+
+    def _tool_call(self, name: str, args: dict) -> AIMessage:
+        return self._tool_calls([(name, args)])
+
+    def _tool_calls(self, calls: list[tuple[str, dict]]) -> AIMessage:
+        with self._lock:
+            ids = [f"call_{self._random.getrandbits(32):08x}" for _ in calls]
+        return AIMessage(content="", tool_calls=[
+            {"name": name, "args": args, "id": call_id} for (name, args), call_id in zip(calls, ids)
+        ])
+
+    def _structured(self, kind: str, messages) -> dict:
+        turn = self._turn(messages)
+        system = messages[0].content if messages and isinstance(messages[0], SystemMessage) else ""
+        if kind == "TriageDecision":
+            action = turn.get("action", "ask_user")
+            return {
+                "action": action,
+                "response_to_user": "Who should I send this to, and what should it say?" if action == "ask_user" else "",
+                "extracted_info": turn.get("intent", ""),
+                "recipient_hints": turn.get("recipients", []) if action == "send_emails" else [],
+            }
+        if kind == "ApprovalDecision":
+            return {"decision": turn.get("decision", "approve")}
+        if kind == "RecipientList":
+            return {"recipients": self._top_candidates(messages)}
+        if kind == "EmailDraft":
+            name = re.search(r"Recipient: (.+?) <", system)
+            if "{name}" in system:
+                greeting = "Hi {name},"  # speculative draft, contact not resolved yet
+            else:
+                greeting = f"Hi {name.group(1).split()[0]}," if name else "Hi,"
+            return {
+                "subject": turn.get("subject", "Quick update"),
+                "body": f"{greeting}\n\n{turn.get('intent', 'Just a quick note.')}\n\nBest regards,\nAlex",
+            }
+        if kind == "EmailSummaries":
+            emails = json.loads(messages[-1].content)
+            return {"summaries": [
+                {"id": e["id"], "summary": f"{e.get('from')} wrote about {e.get('subject', '').lower()}."}
+                for e in emails
+            ]}
+        if kind == "QAResult":
+            with self._lock:
+                failed = self._random.random() < self.qa_failure_rate
+            if failed:
+                return {"passed": False, "feedback": "Make the opening line more specific."}
+            return {"passed": True, "feedback": "Passed"}
+        raise ValueError(f"FakeChatModel has no script for schema {kind}")
+
+    def _researcher(self, messages) -> AIMessage:
+        last_human = max(i for i, m in enumerate(messages) if isinstance(m, HumanMessage)) if any(
+            isinstance(m, HumanMessage) for m in messages) else -1
+        tool_results = [m for m in messages[last_human + 1:] if isinstance(m, ToolMessage)]
+        turn = self._turn(messages)
+        # The researcher prompt carries the action triage chose (fast path or LLM)
+        action = re.search(r"Current action: (\w+)", messages[0].content if messages else "")
+        reading = (action.group(1) if action else turn.get("action")) == "read_emails"
+        if not tool_results:
+            if reading:
+                return self._tool_call("get_latest_emails", {})
+            # Whole groups are expanded, everyone else is searched, in one round
+            groups = turn.get("groups", [])
+            names = [r for r in turn.get("recipients", []) if r not in groups]
+            calls = [("expand_group", {"group": group}) for group in groups]
+            if names:
+                calls.append(("search_contacts", {"query": ", ".join(names)}))
+            return self._tool_calls(calls)
+        if reading:
+            return AIMessage(content=f"Here is a summary of your latest emails:\n{tool_results[-1].content[:400]}")
+        return AIMessage(content=f"CONTACT_FOUND: {tool_results[-1].content[:400]}")
+
+    @staticmethod
+    def _top_candidates(messages) -> list[dict]:
+        """The best candidate per query, and every group member, from the latest lookups."""
+        last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1)
+        seen, recipients = set(), []
+
+        def add(contact: dict, hint: str):
+            if contact["email"] not in seen:
+                seen.add(contact["email"])
+                recipients.append({"name": contact["name"], "email": contact["email"],
+                                   "tone": contact.get("tone", ""), "hint": hint})
+
+        for message in messages[last_human + 1:]:
+            if not isinstance(message, ToolMessage):
+                continue
+            try:
+                results = json.loads(message.content)
+            except (TypeError, ValueError):
+                continue
+            if isinstance(results, dict):
+                for member in results.get("members", []):
+                    add(member, results.get("group", ""))
+                continue
+            for result in results:
+                for candidate in result.get("candidates", [])[:1]:
+                    add(candidate, result.get("query", ""))
+        return recipients
@@ -0,0 +1,252 @@
+"""
+Offline benchmark for the agent graph.
+
+Replays the conversation corpus through create_graph() with a scripted fake
+LLM and a stub backend (no Gemini or Django needed), at one or more
+concurrency levels, and reports per-node latency, LLM calls and throughput.
+The summary and LLM caches live in a temporary directory, and every level
+starts with them and the tool cache empty.
+
+    cd langgraph_server
+    python -m benchmarks.run --concurrency 1,8,32 --llm-latency 0.3
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --baseline bench.json   # exit 1 on regression
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from benchmarks.fake_llm import FakeChatModel
+from benchmarks.stub_backend import StubBackend
+
+CORPUS_PATH = Path(__file__).parent / "corpus.json"
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def load_graph(backend_url: str, fake: FakeChatModel, cache_dir: str):
+    """Import graph.py against the stub backend, the fake model and throwaway caches."""
+    # Settings are read at import time, so the environment is set first
+    os.environ["BACKEND_URL"] = backend_url
+    # Never write fake summaries or answers into the real cache files
+    os.environ["EMAIL_SUMMARY_CACHE_PATH"] = os.path.join(cache_dir, "email_summaries.sqlite3")
+    os.environ["LLM_CACHE_PATH"] = os.path.join(cache_dir, "llm_cache.sqlite3")
+    os.environ.setdefault("CHECKPOINTER", "memory")
+    os.environ.setdefault("LLM_CACHE_NODES", "")
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+    import graph
+    import models
+
+    models.use_model(fake)
+    return graph.create_graph()
+
+
+def reset_caches():
+    """Empty every cache a level could inherit from the previous one."""
+    import graph
+    import llm_cache
+    import summaries
+
+    graph.tool_cache.clear()
+    summaries.summary_cache.clear()
+    llm_cache.llm_cache.clear()
+
+
+async def run_conversation(app, conversation: dict, thread_id: str) -> dict:
+    config = {"configurable": {"thread_id": thread_id}}
+    turns = []
+    for turn in conversation["turns"]:
+        started = time.perf_counter()
+        error = None
+        state = {}
+        try:
+            state = await app.ainvoke({
+                "messages": [("user", turn["user"])],
+                "user_input": turn["user"],
+                "user_token": "benchmark-token",
+                "user_id": 1,
+            }, config)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        turns.append({
+            "wall_ms": 1000 * (time.perf_counter() - started),
+            "timings": state.get("timings", []),
+            "error": error,
+        })
+    return {"name": conversation["name"], "turns": turns}
+
+
+async def run_level(app, corpus: list[dict], concurrency: int, repeat: int, fake: FakeChatModel, label: str) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    jobs = [(conversation, f"{label}-c{concurrency}-{i}-{conversation['name']}")
+            for i in range(repeat) for conversation in corpus]
+
+    async def bounded(conversation, thread_id):
+        async with semaphore:
+            return await run_conversation(app, conversation, thread_id)
+
+    reset_caches()
+    fake.reset_calls()
+    started = time.perf_counter()
+    results = await asyncio.gather(*(bounded(c, t) for c, t in jobs))
+    elapsed = time.perf_counter() - started
+    return summarize(results, elapsed, concurrency, fake.calls())
+
+
+def summarize(results: list[dict], elapsed: float, concurrency: int, llm_calls: dict) -> dict:
+    node_ms = defaultdict(list)
+    node_llm_calls = defaultdict(int)
+    turn_ms = []
+    errors = []
+    for conversation in results:
+        for turn in conversation["turns"]:
+            turn_ms.append(turn["wall_ms"])
+            if turn["error"]:
+                errors.append(f"{conversation['name']}: {turn['error']}")
+            for record in turn["timings"]:
+                node_ms[record["node"]].append(record["wall_ms"])
+                node_llm_calls[record["node"]] += record.get("llm_calls", 0)
+                if record.get("error"):
+                    errors.append(f"{conversation['name']}/{record['node']}: {record['error']}")
+    nodes = {
+        node: {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "mean_ms": round(statistics.fmean(values), 2),
+            "llm_calls": node_llm_calls[node],
+        }
+        for node, values in sorted(node_ms.items())
+    }
+    return {
+        "concurrency": concurrency,
+        "conversations": len(results),
+        "turns": len(turn_ms),
+        "elapsed_s": round(elapsed, 3),
+        "conversations_per_s": round(len(results) / elapsed, 3),
+        "turns_per_s": round(len(turn_ms) / elapsed, 3),
+        "turn_p50_ms": round(percentile(turn_ms, 50), 2),
+        "turn_p95_ms": round(percentile(turn_ms, 95), 2),
+        "llm_calls": dict(sorted(llm_calls.items())),
+        "llm_calls_total": sum(llm_calls.values()),
+        "nodes": nodes,
+        "errors": errors,
+    }
+
+
+def print_report(levels: list[dict]):
+    for level in levels:
+        print(f"\n=== concurrency {level['concurrency']}: {level['conversations']} conversations, "
+              f"{level['turns']} turns in {level['elapsed_s']}s ===")
+        print(f"throughput: {level['conversations_per_s']} conv/s, {level['turns_per_s']} turns/s | "
+              f"turn p50 {level['turn_p50_ms']}ms p95 {level['turn_p95_ms']}ms")
+        print(f"LLM calls: {level['llm_calls_total']} {level['llm_calls']}")
+        print(f"{'node':<20}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}{'llm':>6}")
+        for node, stats in level["nodes"].items():
+            print(f"{node:<20}{stats['count']:>7}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+                  f"{stats['mean_ms']:>10}{stats['llm_calls']:>6}")
+        if level["errors"]:
+            print(f"errors ({len(level['errors'])}): {level['errors'][:5]}")
+
+
+def compare(levels: list[dict], baseline: dict, tolerance: float) -> list[str]:
+    """Regressions against a previous --output file."""
+    previous = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    regressions = []
+    for level in levels:
+        old = previous.get(level["concurrency"])
+        if old is None:
+            continue
+        c = level["concurrency"]
+        if level["conversations_per_s"] < old["conversations_per_s"] * (1 - tolerance):
+            regressions.append(f"c={c}: throughput {old['conversations_per_s']} -> {level['conversations_per_s']} conv/s")
+        if level["turn_p95_ms"] > old["turn_p95_ms"] * (1 + tolerance):
+            regressions.append(f"c={c}: turn p95 {old['turn_p95_ms']} -> {level['turn_p95_ms']} ms")
+        if level["llm_calls_total"] > old["llm_calls_total"] * (1 + tolerance):
+            regressions.append(f"c={c}: LLM calls {old['llm_calls_total']} -> {level['llm_calls_total']}")
+        if len(level["errors"]) > len(old.get("errors", [])):
+            regressions.append(f"c={c}: errors {len(old.get('errors', []))} -> {len(level['errors'])}")
+    return regressions
+
+
+async def main(args) -> int:
+    corpus = json.loads(Path(args.corpus).read_text())
+    fake = FakeChatModel(latency=args.llm_latency, draft_latency=args.draft_latency, jitter=args.llm_jitter,
+                         qa_failure_rate=args.qa_failure_rate, seed=args.seed)
+    for conversation in corpus:
+        for turn in conversation["turns"]:
+            fake.register_script(turn["user"], turn)
+
+    backend = StubBackend(latency=args.backend_latency).start()
+    cache_dir = tempfile.TemporaryDirectory()
+    try:
+        app = load_graph(backend.url, fake, cache_dir.name)
+        label = f"bench{int(time.time())}"
+        levels = []
+        for concurrency in args.concurrency:
+            levels.append(await run_level(app, corpus, concurrency, args.repeat, fake, label))
+    finally:
+        backend.stop()
+        cache_dir.cleanup()
+
+    print_report(levels)
+    report = {
+        "settings": {
+            "llm_latency": args.llm_latency,
+            "draft_latency": args.draft_latency,
+            "llm_jitter": args.llm_jitter,
+            "backend_latency": args.backend_latency,
+            "qa_failure_rate": args.qa_failure_rate,
+            "repeat": args.repeat,
+            "corpus": str(args.corpus),
+        },
+        "backend_requests": dict(backend.requests),
+        "levels": levels,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"\nWrote {args.output}")
+    if args.baseline:
+        regressions = compare(levels, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS:\n" + "\n".join(f"  - {r}" for r in regressions))
+            return 1
+        print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark for the SuperMail agent graph")
+    parser.add_argument("--corpus", default=str(CORPUS_PATH))
+    parser.add_argument("--concurrency", type=lambda s: [int(c) for c in s.split(",")], default=[1, 4, 16],
+                        help="comma-separated concurrency levels (default 1,4,16)")
+    parser.add_argument("--repeat", type=int, default=3, help="corpus replays per level")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per fake LLM call")
+    parser.add_argument("--draft-latency", type=float, default=None,
+                        help="seconds per fake copywriter (EmailDraft) call (default: --llm-latency)")
+    parser.add_argument("--llm-jitter", type=float, default=0.05, help="extra random seconds per LLM call")
+    parser.add_argument("--backend-latency", type=float, default=0.02, help="seconds per stub backend request")
+    parser.add_argument("--qa-failure-rate", type=float, default=0.1, help="share of QA reviews that request a rewrite")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the full report as JSON")
+    parser.add_argument("--baseline", help="compare against an earlier --output file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression (default 0.2)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,166 @@
+"""
+Local stub of the Django endpoints the graph calls.
+
+Serves /emails/, /contactapi/contacts/, /contactapi/contacts/resolve/,
+/contactapi/groups/<name>/expand/ and /send/ from fixture data in a background thread, with the same response
+shapes as the real backend and a configurable per-request latency.
+"""
+
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+CONTACTS = [
+    {"id": 1, "name": "Priya Sharma", "email": "priya.sharma@example.com", "relation": "manager", "tone": "formal"},
+    {"id": 2, "name": "Daniel Okafor", "email": "daniel.okafor@example.com", "relation": "colleague", "tone": "friendly"},
+    {"id": 3, "name": "Mei Chen", "email": "mei.chen@example.com", "relation": "colleague", "tone": "friendly"},
+    {"id": 4, "name": "Lucas Martin", "email": "lucas.martin@example.com", "relation": "client", "tone": "professional"},
+    {"id": 5, "name": "Sara Lindqvist", "email": "sara.lindqvist@example.com", "relation": "hr", "tone": "formal"},
+    {"id": 6, "name": "Tom Becker", "email": "tom.becker@example.com", "relation": "friend", "tone": "casual"},
+    {"id": 7, "name": "Anna Rossi", "email": "anna.rossi@example.com", "relation": "family", "tone": "warm"},
+]
+
+EMAILS = [
+    {
+        "id": f"18c{i:05x}",
+        "from": CONTACTS[i % len(CONTACTS)]["email"],
+        "to": "me@example.com",
+        "subject": subject,
+        "date": f"Mon, {i + 1} Sep 2025 09:{i:02d}:00 +0000",
+        "message_id": f"<msg{i}@example.com>",
+        "body": f"{subject}. " + "Please see the details below and let me know what you think. " * 8,
+        "snippet": f"{subject}. Please see the details below",
+    }
+    for i, subject in enumerate([
+        "Quarterly planning", "Invoice #4821", "Team lunch on Friday", "Design review notes",
+        "Contract renewal", "Weekend plans", "Benefits enrollment", "Release checklist",
+        "Customer feedback summary", "Travel itinerary", "Budget approval", "Onboarding schedule",
+    ])
+]
+
+
+def resolve(query: str, limit: int = 5) -> list[dict]:
+    """Crude name/relation matching, enough to exercise the graph."""
+    words = [w.rstrip("s") for w in query.lower().replace("my ", "").split()]
+    scored = []
+    for contact in CONTACTS:
+        name = contact["name"].lower()
+        if query.lower() == contact["email"]:
+            score, match = 1.0, "email"
+        elif any(w and w == contact["relation"] for w in words):
+            score, match = 0.95, "relation"
+        elif any(w and (w in name.split() or name.startswith(w)) for w in words):
+            score, match = 0.9, "name"
+        else:
+            continue
+        scored.append({**contact, "score": score, "match": match})
+    scored.sort(key=lambda c: -c["score"])
+    return scored[:limit]
+
+
+# Relation groups by the names the corpus uses; the real name matching is
+# contact_api.groups.group_key on the backend
+GROUPS = {"colleagues": "colleague", "family": "family", "clients": "client", "friends": "friend"}
+
+
+def expand(group: str) -> dict | None:
+    """Relation groups only, shaped like the backend's expand response."""
+    relation = GROUPS.get(group.strip().lower())
+    members = [c for c in CONTACTS if c["relation"] == relation]
+    if not members:
+        return None
+    return {"group": relation, "kind": "relation", "members": members}
+
+
+class StubBackend:
+    """Threaded HTTP server; ``url`` is what BACKEND_URL should point to."""
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.requests = Counter()
+        self.sent = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubBackend":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-backend", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _record(self, method: str, path: str, payload: dict | None = None):
+        with self._lock:
+            self.requests[f"{method} {path}"] += 1
+            if payload is not None:
+                self.sent.append(payload)
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: dict):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = parse_qs(url.query)
+                stub._record("GET", url.path)
+                time.sleep(stub.latency)
+                if not self.headers.get("Authorization", "").startswith("Bearer "):
+                    return self._reply(401, {"detail": "Authentication credentials were not provided."})
+                if url.path == "/emails/":
+                    count = min(int(params.get("max_results", ["10"])[0]), 100)
+                    emails = EMAILS[:count]
+                    return self._reply(200, {"emails": emails, "next_page_token": None, "total_count": len(emails)})
+                if url.path == "/contactapi/contacts/":
+                    # Single cursor page, same shape as the real endpoint
+                    return self._reply(200, {"next": None, "previous": None, "results": CONTACTS})
+                if url.path.startswith("/contactapi/groups/") and url.path.endswith("/expand/"):
+                    group = expand(unquote(url.path[len("/contactapi/groups/"):-len("/expand/")]))
+                    if group is None:
+                        return self._reply(404, {"error": "No such group"})
+                    return self._reply(200, group)
+                if url.path == "/contactapi/contacts/resolve/":
+                    limit = int(params.get("limit", ["5"])[0])
+                    results = [{"query": q, "candidates": resolve(q, limit)} for q in params.get("q", [])]
+                    if not results:
+                        return self._reply(400, {"error": "At least one query is required"})
+                    return self._reply(200, {"results": results})
+                return self._reply(404, {"detail": "Not found."})
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                stub._record("POST", url.path, payload if url.path == "/send/" else None)
+                time.sleep(stub.latency)
+                if url.path == "/send/":
+                    if not all(payload.get(k) for k in ("to", "subject", "body")):
+                        return self._reply(400, {"error": "to, subject and body are required"})
+                    return self._reply(200, {"message": "Email sent successfully", "id": f"sent-{len(stub.sent)}"})
+                return self._reply(404, {"detail": "Not found."})
+
+        return Handler
@@ -0,0 +1,236 @@
+"""
+Durable checkpoint storage for agent threads.
+
+CHECKPOINTER selects the backend:
+- "none": compile without a checkpointer; the default under the LangGraph
+  server (langgraph dev / LangGraph Platform), which persists threads itself,
+- "memory": in-process InMemorySaver (lost on restart); the default when the
+  graph is imported standalone (tests, benchmarks), so importing it never
+  creates files or background threads,
+- "sqlite": PruningSqliteSaver at CHECKPOINT_DB_PATH, so pending approvals
+  survive restarts of a standalone deployment.
+
+The SQLite saver zlib-compresses checkpoint blobs above a small size, and a
+background sweep deletes threads idle for longer than CHECKPOINT_TTL
+(CHECKPOINT_PENDING_TTL while a preview is still awaiting approval). Every
+checkpoint of a live thread is kept, so history and time travel keep working;
+setting CHECKPOINT_KEEP_PER_THREAD opts into keeping only the newest N (older
+ones, their pending writes and finished subgraph branches are pruned on every
+save).
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+try:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+except ImportError:  # langgraph-checkpoint-sqlite not installed
+    SqliteSaver = None
+
+# The LangGraph server sets LANGSERVE_GRAPHS before it loads the graphs
+UNDER_SERVER = "LANGSERVE_GRAPHS" in os.environ
+CHECKPOINTER = os.getenv("CHECKPOINTER", "none" if UNDER_SERVER else "memory").lower()
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", str(Path(__file__).parent / ".checkpoints.sqlite3"))
+CHECKPOINT_KEEP_PER_THREAD = int(os.getenv("CHECKPOINT_KEEP_PER_THREAD", "0"))  # 0 keeps every checkpoint
+CHECKPOINT_TTL = float(os.getenv("CHECKPOINT_TTL", "86400"))
+CHECKPOINT_PENDING_TTL = float(os.getenv("CHECKPOINT_PENDING_TTL", "604800"))
+CHECKPOINT_CLEANUP_INTERVAL = float(os.getenv("CHECKPOINT_CLEANUP_INTERVAL", "600"))
+COMPRESS_MIN_BYTES = int(os.getenv("CHECKPOINT_COMPRESS_MIN_BYTES", "512"))
+
+_ZLIB_PREFIX = "zlib+"
+
+
+class CompressedSerializer:
+    """JsonPlusSerializer whose larger payloads are stored zlib-compressed."""
+
+    def __init__(self, serde=None, min_bytes: int = COMPRESS_MIN_BYTES):
+        self.serde = serde or JsonPlusSerializer()
+        self.min_bytes = min_bytes
+
+    def dumps_typed(self, obj) -> tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(obj)
+        if len(data) >= self.min_bytes:
+            compressed = zlib.compress(data, 6)
+            if len(compressed) < len(data):
+                return _ZLIB_PREFIX + type_, compressed
+        return type_, data
+
+    def loads_typed(self, data: tuple[str, bytes]):
+        type_, payload = data
+        if type_.startswith(_ZLIB_PREFIX):
+            return self.serde.loads_typed((type_[len(_ZLIB_PREFIX):], zlib.decompress(payload)))
+        return self.serde.loads_typed(data)
+
+
+if SqliteSaver is not None:
+
+    class PruningSqliteSaver(SqliteSaver):
+        """
+        SqliteSaver that prunes superseded checkpoints and expires idle threads.
+
+        Async methods run the sync implementation in a worker thread; SQLite
+        writes are local and short, and this keeps one connection (and one
+        lock) for both the sync and async paths.
+        """
+
+        def __init__(self, conn: sqlite3.Connection, *, keep: int = CHECKPOINT_KEEP_PER_THREAD,
+                     ttl: float = CHECKPOINT_TTL, pending_ttl: float = CHECKPOINT_PENDING_TTL,
+                     cleanup_interval: float = CHECKPOINT_CLEANUP_INTERVAL):
+            super().__init__(conn, serde=CompressedSerializer())
+            self.keep = max(0, keep)
+            self.ttl = ttl
+            self.pending_ttl = pending_ttl
+            self.cleanup_interval = cleanup_interval
+            self.pruned = 0
+            self.expired_threads = 0
+            self._cleanup_thread = None
+            self._cleanup_lock = threading.Lock()
+
+        @classmethod
+        def from_path(cls, path: str, **kwargs) -> "PruningSqliteSaver":
+            conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            return cls(conn, **kwargs)
+
+        def setup(self) -> None:
+            if self.is_setup:
+                return
+            super().setup()
+            self.conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS thread_activity (
+                    thread_id TEXT PRIMARY KEY,
+                    updated REAL NOT NULL,
+                    pending INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS thread_activity_updated ON thread_activity (updated);
+                """
+            )
+
+        def put(self, config, checkpoint, metadata, new_versions):
+            saved = super().put(config, checkpoint, metadata, new_versions)
+            thread_id = str(config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+            with self.cursor() as cur:
+                self._prune(cur, thread_id, checkpoint_ns)
+                if checkpoint_ns == "":
+                    pending = bool(checkpoint.get("channel_values", {}).get("awaiting_approval"))
+                    cur.execute(
+                        "INSERT OR REPLACE INTO thread_activity (thread_id, updated, pending) VALUES (?, ?, ?)",
+                        (thread_id, time.time(), int(pending))
+                    )
+            self.ensure_cleanup_started()
+            return saved
+
+        def _prune(self, cur: sqlite3.Cursor, thread_id: str, checkpoint_ns: str):
+            """Drop all but the newest ``keep`` checkpoints (ids are time-ordered)."""
+            if not self.keep:
+                return
+            row = cur.execute(
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+                (thread_id, checkpoint_ns, self.keep - 1)
+            ).fetchone()
+            if row is None:
+                return
+            oldest_kept = row[0]
+            # Subgraph branches (checkpoint_ns != '') that finished before the
+            # oldest kept root checkpoint can no longer be resumed either
+            ns_clause = "checkpoint_ns = ?" if checkpoint_ns else "(checkpoint_ns = ? OR checkpoint_ns != '')"
+            params = (thread_id, checkpoint_ns, oldest_kept)
+            cur.execute(f"DELETE FROM checkpoints WHERE thread_id = ? AND {ns_clause} AND checkpoint_id < ?", params)
+            self.pruned += cur.rowcount
+            cur.execute(f"DELETE FROM writes WHERE thread_id = ? AND {ns_clause} AND checkpoint_id < ?", params)
+
+        def cleanup_expired(self, now: float | None = None) -> int:
+            """Delete threads idle past their TTL. Returns how many were removed."""
+            now = time.time() if now is None else now
+            with self.cursor() as cur:
+                rows = cur.execute(
+                    "SELECT thread_id FROM thread_activity "
+                    "WHERE (pending = 0 AND updated < ?) OR (pending = 1 AND updated < ?)",
+                    (now - self.ttl, now - self.pending_ttl)
+                ).fetchall()
+            for (thread_id,) in rows:
+                self.delete_thread(thread_id)
+            if rows:
+                print(f"  -> Checkpointer expired {len(rows)} idle thread(s)")
+            self.expired_threads += len(rows)
+            return len(rows)
+
+        def delete_thread(self, thread_id: str) -> None:
+            super().delete_thread(thread_id)
+            with self.cursor() as cur:
+                cur.execute("DELETE FROM thread_activity WHERE thread_id = ?", (str(thread_id),))
+
+        def ensure_cleanup_started(self):
+            if self._cleanup_thread is not None or self.cleanup_interval <= 0:
+                return
+            with self._cleanup_lock:
+                if self._cleanup_thread is None:
+                    self._cleanup_thread = threading.Thread(
+                        target=self._cleanup_loop, name="checkpoint-cleanup", daemon=True
+                    )
+                    self._cleanup_thread.start()
+
+        def _cleanup_loop(self):
+            while True:
+                try:
+                    self.cleanup_expired()
+                except sqlite3.Error as e:
+                    print(f"  -> Checkpoint cleanup failed: {e}")
+                time.sleep(self.cleanup_interval)
+
+        def stats(self) -> dict:
+            with self.cursor(transaction=False) as cur:
+                (threads,) = cur.execute("SELECT COUNT(*) FROM thread_activity").fetchone()
+                (checkpoints,) = cur.execute("SELECT COUNT(*) FROM checkpoints").fetchone()
+            return {
+                "threads": threads,
+                "checkpoints": checkpoints,
+                "pruned": self.pruned,
+                "expired_threads": self.expired_threads,
+            }
+
+        # --- Async API (delegates to the sync implementation) ---
+        async def aget_tuple(self, config):
+            return await asyncio.to_thread(self.get_tuple, config)
+
+        async def alist(self, config, *, filter=None, before=None, limit=None):
+            items = await asyncio.to_thread(
+                lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+            )
+            for item in items:
+                yield item
+
+        async def aput(self, config, checkpoint, metadata, new_versions):
+            return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+        async def aput_writes(self, config, writes, task_id, task_path=""):
+            return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+        async def adelete_thread(self, thread_id):
+            return await asyncio.to_thread(self.delete_thread, thread_id)
+
+else:
+    PruningSqliteSaver = None
+
+
+def get_checkpointer():
+    """Build the checkpointer selected by CHECKPOINTER (None disables it)."""
+    if CHECKPOINTER == "none":
+        return None
+    if CHECKPOINTER == "memory":
+        return InMemorySaver()
+    if PruningSqliteSaver is None:
+        print("[Checkpointer] langgraph-checkpoint-sqlite is not installed; using the in-memory checkpointer")
+        return InMemorySaver()
+    return PruningSqliteSaver.from_path(CHECKPOINT_DB_PATH)
@@ -0,0 +1,168 @@
+"""
+Conversation history compaction.
+
+Two layers keep prompts flat in long conversations:
+- fold_old_turns() moves turns beyond HISTORY_KEEP_TURNS out of the graph
+  state into a rolling text summary (called once per turn by triage).
+- compact_messages() fits what is left into a per-node token budget when a
+  node builds its prompt: older tool outputs are replaced by short stubs
+  first, then older turns are summarized, and the current turn is only
+  truncated as a last resort.
+
+Summaries are extractive (no LLM call), so compaction itself is free.
+"""
+
+import json
+import os
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, RemoveMessage, SystemMessage, ToolMessage
+
+HISTORY_KEEP_TURNS = int(os.getenv("HISTORY_KEEP_TURNS", "6"))
+PROMPT_KEEP_TURNS = int(os.getenv("PROMPT_KEEP_TURNS", "2"))
+SUMMARY_MAX_CHARS = int(os.getenv("HISTORY_SUMMARY_MAX_CHARS", "2000"))
+TOOL_STUB_CHARS = 160
+
+# Token budgets for the conversation history each node puts in its prompt
+DEFAULT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+NODE_TOKEN_BUDGETS = {
+    "triage": int(os.getenv("PROMPT_TOKEN_BUDGET_TRIAGE", "2000")),
+    "researcher": int(os.getenv("PROMPT_TOKEN_BUDGET_RESEARCHER", "8000")),
+    "select_recipients": int(os.getenv("PROMPT_TOKEN_BUDGET_SELECT_RECIPIENTS", "4000")),
+    "copywriter": int(os.getenv("PROMPT_TOKEN_BUDGET_COPYWRITER", "3000")),
+}
+
+
+def estimate_tokens(message: BaseMessage) -> int:
+    """Rough token count (~4 characters per token plus per-message overhead)."""
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+    size = len(content)
+    for call in getattr(message, "tool_calls", None) or []:
+        size += len(call.get("name", "")) + len(json.dumps(call.get("args", {})))
+    return size // 4 + 4
+
+
+def _total(messages) -> int:
+    return sum(estimate_tokens(m) for m in messages)
+
+
+def _text(message: BaseMessage) -> str:
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+    return " ".join(content.split())
+
+
+def split_turns(messages: list[BaseMessage]) -> list[list[BaseMessage]]:
+    """Group messages into turns, each starting at a human message."""
+    turns = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return turns
+
+
+def summarize_turn(turn: list[BaseMessage]) -> str:
+    """One-line extractive summary of a turn."""
+    user = next((_text(m) for m in turn if isinstance(m, HumanMessage)), "")
+    replies = [_text(m) for m in turn if isinstance(m, AIMessage) and _text(m)]
+    tools = sum(isinstance(m, ToolMessage) for m in turn)
+    parts = []
+    if user:
+        parts.append(f"User: {user[:200]}")
+    if tools:
+        parts.append(f"({tools} tool lookup{'s' if tools != 1 else ''})")
+    if replies:
+        parts.append(f"Assistant: {replies[-1][:200]}")
+    return " ".join(parts)
+
+
+def merge_summary(summary: str, new_lines: list[str]) -> str:
+    """Append to a rolling summary, dropping the oldest lines past the size cap."""
+    lines = [line for line in (summary or "").split("\n") if line] + [l for l in new_lines if l]
+    while lines and len("\n".join(lines)) > SUMMARY_MAX_CHARS:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def _stub_tool_message(message: ToolMessage) -> ToolMessage:
+    content = _text(message)
+    if len(content) <= TOOL_STUB_CHARS:
+        return message
+    stub = f"[earlier tool result, {len(content)} chars, truncated] {content[:TOOL_STUB_CHARS]}..."
+    return ToolMessage(content=stub, tool_call_id=message.tool_call_id, id=message.id)
+
+
+def _truncate_tool_message(message: ToolMessage, max_chars: int) -> ToolMessage:
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+    if len(content) <= max_chars:
+        return message
+    truncated = content[:max_chars] + f"\n[truncated {len(content) - max_chars} chars to fit the prompt budget]"
+    return ToolMessage(content=truncated, tool_call_id=message.tool_call_id, id=message.id)
+
+
+def fold_old_turns(messages: list[BaseMessage], summary: str, keep_turns: int = HISTORY_KEEP_TURNS):
+    """
+    Move turns older than the last ``keep_turns`` out of state.
+
+    Returns ``(removals, new_summary)``; ``removals`` are RemoveMessage
+    updates for the add_messages reducer. Returns ``([], summary)`` when
+    there is nothing to fold.
+    """
+    turns = split_turns(messages)
+    if len(turns) <= keep_turns:
+        return [], summary
+    old = turns[:-keep_turns]
+    removals = [RemoveMessage(id=m.id) for turn in old for m in turn if m.id]
+    return removals, merge_summary(summary, [summarize_turn(turn) for turn in old])
+
+
+def compact_messages(messages: list[BaseMessage], budget: int, summary: str = "",
+                     keep_turns: int = PROMPT_KEEP_TURNS) -> tuple[list[BaseMessage], str]:
+    """
+    Fit ``messages`` into ``budget`` tokens for one prompt.
+
+    Returns the messages to send and the summary text covering whatever was
+    left out (to be placed in the system prompt). Messages are never
+    reordered and tool calls always keep their tool results.
+    """
+    turns = split_turns(messages)
+    summary_lines = []
+
+    # 1. Turns beyond the recent window are always summarized
+    if len(turns) > keep_turns:
+        summary_lines += [summarize_turn(turn) for turn in turns[:-keep_turns]]
+        turns = turns[-keep_turns:]
+
+    def flat():
+        return [m for turn in turns for m in turn]
+
+    # 2. Tool outputs from earlier turns become short stubs
+    if _total(flat()) > budget and len(turns) > 1:
+        turns = [
+            [_stub_tool_message(m) if isinstance(m, ToolMessage) else m for m in turn]
+            for turn in turns[:-1]
+        ] + [turns[-1]]
+
+    # 3. Summarize whole turns, oldest first, keeping at least the current one
+    while _total(flat()) > budget and len(turns) > 1:
+        summary_lines.append(summarize_turn(turns.pop(0)))
+
+    # 4. Last resort: shrink the current turn's tool outputs evenly
+    current = turns[-1] if turns else []
+    overflow = _total(current) - budget
+    tool_messages = [m for m in current if isinstance(m, ToolMessage)]
+    if overflow > 0 and tool_messages:
+        tool_chars = sum(len(_text(m)) for m in tool_messages)
+        allowed = max(TOOL_STUB_CHARS, (tool_chars - overflow * 4) // len(tool_messages))
+        turns[-1] = [_truncate_tool_message(m, allowed) if isinstance(m, ToolMessage) else m for m in current]
+
+    return flat(), merge_summary(summary, summary_lines)
+
+
+def build_prompt(system_prompt: str, messages: list[BaseMessage], node: str, summary: str = "") -> list[BaseMessage]:
+    """System prompt plus the node's compacted history."""
+    budget = NODE_TOKEN_BUDGETS.get(node, DEFAULT_TOKEN_BUDGET)
+    kept, summary = compact_messages(list(messages), budget, summary)
+    if summary:
+        system_prompt = f"{system_prompt}\n\nSummary of earlier conversation:\n{summary}"
+    return [SystemMessage(content=system_prompt)] + kept
@@ -3,32 +3,57 @@ LangGraph Multi-Agent System
 Features Triage, Researcher, Copywriter, and QA Agents.
 """
 
+import asyncio
+import contextvars
 import os
+import re
+import unicodedata
+import uuid
 from typing import TypedDict, Annotated, Sequence, Literal
 from langgraph.graph import StateGraph, END, START
 from langgraph.graph.message import add_messages
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langgraph.types import Send
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, ToolMessage
-from langchain_core.tools import tool
-import requests
 import json
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 
+from backend_client import backend
+from checkpointer import get_checkpointer
+from compaction import build_prompt, fold_old_turns
+from intent import classify_approval, classify_intent, fast_path_stats
+from lint import lint_draft
+from llm_cache import structured_invoke
+from models import get_model
+from tool_cache import TTLCache
+from tools import TOOLS, execute_tool
+from tracing import merge_timings, metrics, tool_span, traced_node
+
 load_dotenv()
 
 # Configuration
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-BACKEND_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000")
+TOOL_CACHE_TTL = float(os.getenv("TOOL_CACHE_TTL", "60"))
+MAX_QA_ROUNDS = int(os.getenv("MAX_QA_ROUNDS", "3"))
+SPECULATIVE_DRAFTING = os.getenv("SPECULATIVE_DRAFTING", "true").lower() in ("1", "true", "yes")
+SPECULATIVE_MAX_RECIPIENTS = int(os.getenv("SPECULATIVE_MAX_RECIPIENTS", "5"))
+SPECULATION_TTL = 300  # seconds an unclaimed speculation is kept
 
-# Initialize LLM
-llm = ChatGoogleGenerativeAI(
-    model="gemini-flash-latest",
-    google_api_key=GOOGLE_API_KEY,
-    temperature=0.7
-)
+# Tool results shared across runs (keyed by user + tool + arguments)
+tool_cache = TTLCache(ttl=TOOL_CACHE_TTL)
 
 # --- State Definition ---
+def merge_dict(left: dict | None, right: dict | None) -> dict:
+    """Merge dict updates key by key; an explicit None resets the dict."""
+    if right is None:
+        return {}
+    return {**(left or {}), **right}
+
+def merge_drafts(left: list | None, right: list | None) -> list:
+    """Collect drafts from parallel copywriter branches; an explicit None resets them."""
+    if right is None:
+        return []
+    return (left or []) + right
+
 class AgentState(TypedDict):
     """Global state for the multi-agent workflow"""
     messages: Annotated[list[BaseMessage], add_messages]
@@ -39,38 +64,102 @@ class AgentState(TypedDict):
     # Agent Communication Fields
     action_type: str
     extracted_info: str
-    draft_email: dict
-    qa_feedback: str
+    recipients: list
+    drafts: Annotated[list, merge_drafts]
     emails_to_send: list
     awaiting_approval: bool
 
+    # Tool results already fetched during the current run
+    tool_memo: Annotated[dict, merge_dict]
+
+    # Rolling summary of turns folded out of `messages`
+    history_summary: str
+
+    # Revision rounds each recipient's draft needed (keyed by address)
+    qa_rounds: Annotated[dict, merge_dict]
+
+    # Recipients as the user named them, the background task drafting for
+    # them while contacts are resolved, and its drafts (keyed by hint)
+    recipient_hints: list
+    speculation: str
+    speculative_drafts: Annotated[dict, merge_dict]
+
+    # Per-node timing/token records for the latest run (see tracing.py)
+    timings: Annotated[list, merge_timings]
+
 # --- 1. Triage Agent ---
 class TriageDecision(BaseModel):
     action: Literal["ask_user", "read_emails", "send_emails"]
     response_to_user: str = Field(description="Message to the user if asking for more info.")
     extracted_info: str = Field(description="Summary of the user's intent and any extracted details (names, dates, subjects).")
+    recipient_hints: list[str] = Field(default_factory=list, description="For send_emails: each recipient exactly as the user referred to them (a name or a relation such as 'my manager').")
 
-def triage_node(state: AgentState):
+def latest_user_text(state: AgentState) -> str:
+    """The current user turn: the last human message, else the raw user_input."""
+    messages = state.get("messages") or []
+    if messages and isinstance(messages[-1], HumanMessage):
+        return messages[-1].content
+    return state.get("user_input", "")
+
+async def triage_node(state: AgentState):
     print("[Triage Agent] Analyzing request...")
+    user_text = latest_user_text(state)
+    # Fold turns beyond the history window into the rolling summary
+    removals, history_summary = fold_old_turns(state.get("messages", []), state.get("history_summary", ""))
+    
+    fast = classify_intent(user_text)
+    if fast.action:
+        # High-confidence local classification, no LLM round-trip needed
+        print(f"  -> Fast path: {fast.action} ({fast.confidence:.2f}) {fast_path_stats()}")
+        update = {
+            "action_type": fast.action,
+            "extracted_info": user_text,
+            "tool_memo": None,
+            "messages": removals,
+            "history_summary": history_summary
+        }
+        if fast.action == "ask_user":
+            update["messages"] = removals + [AIMessage(content=fast.response_to_user)]
+        return update
+
     sys_msg = """You are the Triage Agent. Your job is to chat with the user, figure out if they want to read or send emails, and gather missing info.
 If they want to read emails, set action='read_emails'.
 If they want to send an email, ensure you know WHO to send it to and WHAT the core message is. If this information is missing, set action='ask_user' and ask them in 'response_to_user'.
 If all info is present for sending, set action='send_emails'."""
     
-    response = llm.with_structured_output(TriageDecision).invoke([SystemMessage(content=sys_msg)] + state["messages"])
+    prompt = build_prompt(sys_msg, state["messages"], "triage", state.get("history_summary", ""))
+    response = await structured_invoke(get_model("triage"), TriageDecision, prompt, "triage")
     
     if response.action == "ask_user":
         print(f"  -> Need more info: {response.response_to_user}")
         return {
             "action_type": "ask_user", 
-            "messages": [AIMessage(content=response.response_to_user)], 
-            "extracted_info": response.extracted_info
+            "messages": removals + [AIMessage(content=response.response_to_user)], 
+            "extracted_info": response.extracted_info,
+            "tool_memo": None,
+            "history_summary": history_summary
         }
     else:
         print(f"  -> Routing to: {response.action}")
+        hints = response.recipient_hints if response.action == "send_emails" else []
+        speculation = ""
+        if hints and SPECULATIVE_DRAFTING:
+            removed = {m.id for m in removals}
+            speculation = start_speculative_drafts({
+                "messages": [m for m in state["messages"] if m.id not in removed],
+                "extracted_info": response.extracted_info,
+                "recipient_hints": hints,
+                "history_summary": history_summary
+            })
         return {
             "action_type": response.action, 
-            "extracted_info": response.extracted_info
+            "extracted_info": response.extracted_info,
+            "recipient_hints": hints,
+            "speculation": speculation,
+            "speculative_drafts": None,
+            "tool_memo": None,
+            "messages": removals,
+            "history_summary": history_summary
         }
 
 def triage_router(state: AgentState):
@@ -81,83 +170,77 @@ def triage_router(state: AgentState):
     return END
 
 # --- 2. Researcher Agent ---
-def researcher_node(state: AgentState):
-    print("[Researcher Agent] Gathering data...")
-    
-    # Dynamically create tools so they have access to the current state (like user_token)
-    @tool
-    def get_latest_emails() -> str:
-        """Fetch the user's latest emails from the inbox."""
-        print("  -> Tool called: get_latest_emails")
-        try:
-            headers = {"Authorization": f"Bearer {state.get('user_token', '')}"}
-            response = requests.get(f"{BACKEND_URL}/emails/", headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            return json.dumps(data.get("results", [])[:10])
-        except Exception as e:
-            return f"Error fetching emails: {e}"
-            
-    @tool
-    def search_contacts() -> str:
-        """Fetch the user's contacts to find email addresses."""
-        print("  -> Tool called: search_contacts")
+async def run_tool(state: AgentState, name: str, args: dict) -> tuple[str, dict]:
+    """
+    Execute a researcher tool (see tools.py), reusing earlier results when possible.
+
+    Looks in the run memo (graph state) first, then in the short-TTL
+    cross-run cache, and only then calls the backend. Returns the result and
+    the memo entries to merge into state. Errors are never cached.
+    """
+    memo_key = f"{name}:{json.dumps(args, sort_keys=True)}"
+    with tool_span(name) as span:
+        memo = state.get("tool_memo") or {}
+        if memo_key in memo:
+            print(f"  -> Tool memo hit: {name}")
+            span["source"] = "memo"
+            return memo[memo_key], {}
+
+        user_key = state.get("user_id") or state.get("user_token", "")
+        cache_key = (user_key, memo_key)
+        cached = tool_cache.get(cache_key)
+        if cached is not None:
+            print(f"  -> Tool cache hit: {name}")
+            span["source"] = "cache"
+            return cached, {memo_key: cached}
+
         try:
-            headers = {"Authorization": f"Bearer {state.get('user_token', '')}"}
-            response = requests.get(f"{BACKEND_URL}/contactapi/contacts/", headers=headers)
-            response.raise_for_status()
-            return json.dumps(response.json())
+            result = await execute_tool(name, args, {"token": state.get("user_token", ""), "model": get_model("email_summary")})
         except Exception as e:
-            return f"Error fetching contacts: {e}"
+            span["source"] = "error"
+            return f"{TOOLS[name].error_prefix}: {e}", {}
+        span["source"] = "backend"
+        tool_cache.set(cache_key, result)
+        return result, {memo_key: result}
 
+async def researcher_node(state: AgentState):
+    print("[Researcher Agent] Gathering data...")
     sys_msg = f"""You are the Researcher Agent. You have access to backend tools.
 Current action: {state.get('action_type')}
 Extracted info: {state.get('extracted_info', '')}
 
-If action is 'read_emails': Use the get_latest_emails tool. Once you receive the data, write a beautifully formatted summary of the emails to the user and DO NOT call tools anymore.
-If action is 'send_emails': Use the search_contacts tool to find the email address for the recipient mentioned in the extracted info. Once found, simply output 'CONTACT_FOUND: <email details>' and DO NOT call tools anymore.
+If action is 'read_emails': Use the get_latest_emails tool. It returns each email with a short summary; once you receive the data, write a beautifully formatted digest of the emails from those summaries and DO NOT call tools anymore.
+If action is 'send_emails': Use the search_contacts tool with the recipient names or relations mentioned in the extracted info (comma separated) to find their email addresses. Prefer the highest scoring candidates. When the user addresses a whole group ("all my colleagues", "the family", a named list), call expand_group for that group instead; both tools can be called together. Once found, simply output 'CONTACT_FOUND: <email details>' and DO NOT call tools anymore.
 """
-    bound_llm = llm.bind_tools([get_latest_emails, search_contacts])
-    response = bound_llm.invoke([SystemMessage(content=sys_msg)] + state["messages"])
+    # Tool signatures for the LLM; execution happens in researcher_tools_node
+    bound_llm = get_model("researcher").bind_tools([spec.tool for spec in TOOLS.values()])
+    response = await bound_llm.ainvoke(build_prompt(sys_msg, state["messages"], "researcher", state.get("history_summary", "")))
     return {"messages": [response]}
 
-def researcher_tools_node(state: AgentState):
+async def researcher_tools_node(state: AgentState):
     print("[Researcher Tools] Executing tool...")
     last_msg = state["messages"][-1]
     
-    # Re-define tools for execution
-    def execute_get_latest_emails():
-        try:
-            headers = {"Authorization": f"Bearer {state.get('user_token', '')}"}
-            response = requests.get(f"{BACKEND_URL}/emails/", headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            return json.dumps(data.get("results", [])[:10])
-        except Exception as e:
-            return f"Error fetching emails: {e}"
-            
-    def execute_search_contacts():
-        try:
-            headers = {"Authorization": f"Bearer {state.get('user_token', '')}"}
-            response = requests.get(f"{BACKEND_URL}/contactapi/contacts/", headers=headers)
-            response.raise_for_status()
-            return json.dumps(response.json())
-        except Exception as e:
-            return f"Error fetching contacts: {e}"
-
-    tool_map = {
-        "get_latest_emails": execute_get_latest_emails, 
-        "search_contacts": execute_search_contacts
-    }
+    # Identical calls in one turn are executed once; distinct calls run concurrently
+    calls = [c for c in last_msg.tool_calls if c["name"] in TOOLS]
+    unique = {}
+    for tool_call in calls:
+        print(f"  -> Tool called: {tool_call['name']}")
+        key = (tool_call["name"], json.dumps(tool_call.get("args") or {}, sort_keys=True))
+        unique.setdefault(key, tool_call)
+    outcomes = await asyncio.gather(*(
+        run_tool(state, tool_call["name"], tool_call.get("args") or {}) for tool_call in unique.values()
+    ))
+    results = dict(zip(unique, outcomes))
     
     tool_messages = []
-    for tool_call in last_msg.tool_calls:
-        tool_fn = tool_map.get(tool_call["name"])
-        if tool_fn:
-            result = tool_fn()
-            tool_messages.append(ToolMessage(content=result, tool_call_id=tool_call["id"]))
+    memo_updates = {}
+    for tool_call in calls:
+        result, memo = results[(tool_call["name"], json.dumps(tool_call.get("args") or {}, sort_keys=True))]
+        memo_updates.update(memo)
+        tool_messages.append(ToolMessage(content=result, tool_call_id=tool_call["id"]))
             
-    return {"messages": tool_messages}
+    return {"messages": tool_messages, "tool_memo": memo_updates}
 
 def researcher_router(state: AgentState):
     last_message = state["messages"][-1]
@@ -167,43 +250,312 @@ def researcher_router(state: AgentState):
     if state.get("action_type") == "read_emails":
         return END
     else:
-        return "copywriter"
+        return "select_recipients"
+
+class Recipient(BaseModel):
+    name: str
+    email: str
+    tone: str = Field(default="", description="The contact's preferred tone, from the contact record.")
+    hint: str = Field(default="", description="Which of the user's recipient hints this contact was found for, copied exactly.")
+
+class RecipientList(BaseModel):
+    recipients: list[Recipient] = Field(description="Every contact the email should be sent to. Empty if none were found.")
+
+# A name match is taken without the LLM only when it is this good and this
+# far ahead of the runner-up (contact_api/resolve.py scores)
+LOOKUP_MIN_SCORE = 0.8
+LOOKUP_MIN_MARGIN = 0.1
+
+def lookup_candidate(result: dict, hints: set) -> dict | None:
+    """The one contact a search_contacts result clearly names, or None if it is ambiguous."""
+    query = result.get("query", "")
+    candidates = result.get("candidates") or []
+    if not candidates or (hints and recipient_key(query) not in hints):
+        return None
+    top = candidates[0]
+    runner_up = candidates[1]["score"] if len(candidates) > 1 else 0.0
+    if top.get("match") == "relation":
+        # "my manager" is one person; several colleagues may mean one or all of them
+        return top if len(candidates) == 1 else None
+    if top["score"] < LOOKUP_MIN_SCORE or top["score"] - runner_up < LOOKUP_MIN_MARGIN:
+        return None
+    return top
+
+def lookup_recipients(state: AgentState) -> list | None:
+    """
+    Recipients straight from this turn's contact lookups: every member of an
+    expanded group and the clear top candidate of each search. None when any
+    lookup is ambiguous or failed (or the turn used other tools) and the LLM
+    has to choose.
+    """
+    messages = state.get("messages") or []
+    start = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1) + 1
+    calls = {}
+    for message in messages[start:]:
+        for call in getattr(message, "tool_calls", None) or []:
+            calls[call["id"]] = call
+    if not calls or any(call["name"] not in ("expand_group", "search_contacts") for call in calls.values()):
+        return None
+    hints = set(state.get("recipient_hints") or [])
+    hint_keys = {recipient_key(hint) for hint in hints}
+    recipients, seen = [], set()
+
+    def add(contact: dict, hint: str):
+        if contact["email"] not in seen:
+            seen.add(contact["email"])
+            recipients.append({"name": contact["name"], "email": contact["email"], "tone": contact.get("tone", ""),
+                               "hint": hint})
+
+    for message in messages[start:]:
+        if not isinstance(message, ToolMessage) or message.tool_call_id not in calls:
+            continue
+        call = calls[message.tool_call_id]
+        try:
+            looked_up = json.loads(message.content)
+            if call["name"] == "expand_group":
+                requested = call["args"].get("group", "")
+                # The backend already matched the name; pair on what it resolved to
+                hint = requested if requested in hints else looked_up.get("group") or requested
+                for member in looked_up["members"]:
+                    add(member, hint)
+                continue
+            for result in looked_up:
+                contact = lookup_candidate(result, hint_keys)
+                if contact is None:
+                    return None
+                add(contact, result["query"])
+        except (TypeError, ValueError, KeyError, AttributeError):
+            # Tool errors come back as plain text
+            return None
+    return recipients
+
+async def select_recipients_node(state: AgentState):
+    print("[Researcher Agent] Selecting recipients...")
+    recipients = lookup_recipients(state)
+    if recipients:
+        # Unambiguous lookups need no judgement: take them as they are
+        print(f"  -> {len(recipients)} recipient(s) from contact lookups")
+        metrics.inc("agent_recipient_selection_total", {"path": "lookup"})
+        speculated = await claim_speculative_drafts(state, recipients)
+        return {**speculated, "recipients": recipients, "drafts": None, "qa_rounds": None}
+    metrics.inc("agent_recipient_selection_total", {"path": "llm"})
+    sys_msg = f"""From the contact lookups in the conversation, list every contact the user wants to email.
+Extracted info: {state.get('extracted_info', '')}
+Recipient hints: {state.get('recipient_hints') or 'None'}
+Use the exact name, email and tone from the contact records. Do not invent addresses."""
+    
+    prompt = build_prompt(sys_msg, state["messages"], "select_recipients", state.get("history_summary", ""))
+    response = await structured_invoke(get_model("select_recipients"), RecipientList, prompt, "select_recipients")
+    recipients = [r.model_dump() for r in response.recipients if r.email]
+    print(f"  -> {len(recipients)} recipient(s)")
+    
+    speculated = await claim_speculative_drafts(state, recipients)
+    if not recipients:
+        return {
+            **speculated,
+            "action_type": "ask_user",
+            "recipients": [],
+            "messages": [AIMessage(content="I couldn't find a matching contact. Who should I send this to?")]
+        }
+    return {**speculated, "recipients": recipients, "drafts": None, "qa_rounds": None}
+
+def fan_out_drafts(state: AgentState):
+    """Start one copywriter + QA branch per recipient; they run in parallel."""
+    if not state.get("recipients"):
+        return END
+    speculative = {recipient_key(hint): draft for hint, draft in (state.get("speculative_drafts") or {}).items()}
+    sends = []
+    for recipient in state["recipients"]:
+        branch = {
+            "recipient": recipient,
+            "extracted_info": state.get("extracted_info", ""),
+            "messages": state["messages"],
+            "history_summary": state.get("history_summary", ""),
+            "revisions": 0
+        }
+        draft = reconcile_speculative_draft(speculative.get(recipient_key(recipient.get("hint", ""))), recipient)
+        if draft:
+            # Branch starts at lint; the copywriter call is skipped
+            branch["draft_email"] = draft
+        sends.append(Send("draft_recipient", branch))
+    return sends
+
+# --- 2b. Speculative drafting ---
+SPECULATIVE_TONE = "professional"
+NAME_PLACEHOLDER = "{name}"
+_HINT_FILLERS = {"my", "our", "the", "all", "to", "and", "of", "a", "an", "every", "everyone", "in"}
+
+def recipient_key(text: str) -> str:
+    """
+    'All my Colleagues' -> 'colleague'. The backend's resolve normalization
+    (contact_api/resolve.py), so a triage hint pairs with however the
+    researcher phrased the lookup that found the recipient.
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = re.sub(r"[^a-z0-9@._ ]+", " ", "".join(c for c in text if not unicodedata.combining(c)).lower())
+    words = []
+    for word in text.split():
+        if word in _HINT_FILLERS:
+            continue
+        if len(word) > 3 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return " ".join(words)
+
+def tone_key(tone: str) -> str:
+    """Tones a neutral professional draft already satisfies compare equal."""
+    tone = (tone or "").strip().lower()
+    return SPECULATIVE_TONE if tone in ("", "neutral", "formal", SPECULATIVE_TONE) else tone
+
+async def speculative_draft_node(state: AgentState):
+    """Draft one email per recipient hint before the contacts are resolved."""
+    hints = (state.get("recipient_hints") or [])[:SPECULATIVE_MAX_RECIPIENTS]
+    print(f"[Copywriter Agent] Speculatively drafting for {hints}...")
+
+    async def draft_for(hint: str):
+        sys_msg = f"""You are the Copywriter Agent.
+Your job is to write an email draft based on the user's request.
+Extracted info: {state.get('extracted_info', '')}
+Recipient: {hint} (contact details are still being looked up)
+Tone: {SPECULATIVE_TONE}
+
+Review the conversation and write the email for this recipient only.
+Wherever the recipient's name belongs (e.g. the greeting), write {NAME_PLACEHOLDER} literally; it is filled in later."""
+        prompt = build_prompt(sys_msg, state["messages"], "copywriter", state.get("history_summary", ""))
+        try:
+            response = await structured_invoke(get_model("copywriter"), EmailDraft, prompt, "copywriter")
+        except Exception as e:
+            print(f"  -> Speculative draft for {hint} failed: {e}")
+            return hint, None
+        return hint, {"subject": response.subject, "body": response.body, "tone": SPECULATIVE_TONE}
+
+    results = await asyncio.gather(*(draft_for(hint) for hint in hints))
+    return {"speculative_drafts": {hint: draft for hint, draft in results if draft}}
+
+# Speculations run off the graph: a parallel branch would hold the researcher's
+# tool round-trips at each superstep barrier until the drafts finished
+_speculations: dict[str, asyncio.Task] = {}
+
+def start_speculative_drafts(snapshot: dict) -> str:
+    """Start speculative_draft_node in the background; returns the key to claim it by."""
+    key = uuid.uuid4().hex
+    node = traced_node("speculative_draft", speculative_draft_node)
+    # A fresh context keeps the triage node's trace and run config out of the task
+    task = asyncio.create_task(node(snapshot), context=contextvars.Context())
+    # Unclaimed results (a run that ended early) are dropped after a while
+    task.add_done_callback(lambda t: t.get_loop().call_later(SPECULATION_TTL, _speculations.pop, key, None))
+    _speculations[key] = task
+    return key
+
+async def claim_speculative_drafts(state: AgentState, recipients: list) -> dict:
+    """
+    The state update from this run's speculation: awaited when a recipient
+    could use one of its drafts, cancelled otherwise.
+    """
+    task = _speculations.pop(state.get("speculation") or "", None)
+    if task is None:
+        return {}
+    hinted = {recipient_key(hint) for hint in (state.get("recipient_hints") or [])[:SPECULATIVE_MAX_RECIPIENTS]}
+    usable = any(
+        tone_key(r.get("tone")) == SPECULATIVE_TONE and recipient_key(r.get("hint", "")) in hinted
+        for r in recipients
+    )
+    if not usable:
+        if task.cancel():
+            metrics.inc("agent_speculative_drafts_total", {"outcome": "cancelled"})
+        return {}
+    try:
+        return await task
+    except Exception as e:
+        print(f"  -> Speculative drafting failed: {e}")
+        return {}
+
+def reconcile_speculative_draft(draft: dict | None, recipient: dict) -> dict | None:
+    """Address a speculative draft to the resolved contact, or None to redraft."""
+    if not draft:
+        return None
+    if tone_key(recipient.get("tone")) != tone_key(draft["tone"]):
+        print(f"  -> Speculative draft redrafted for {recipient['name']} (tone '{recipient.get('tone')}')")
+        metrics.inc("agent_speculative_drafts_total", {"outcome": "redrafted"})
+        return None
+    first_name = recipient["name"].split()[0] if recipient.get("name") else ""
+    metrics.inc("agent_speculative_drafts_total", {"outcome": "used"})
+    return {
+        "subject": draft["subject"].replace(NAME_PLACEHOLDER, first_name),
+        "body": draft["body"].replace(NAME_PLACEHOLDER, first_name),
+        "to": recipient["email"],
+        "to_name": recipient["name"]
+    }
 
 # --- 3. Copywriter Agent ---
+class DraftState(TypedDict):
+    """State of a single per-recipient drafting branch"""
+    messages: list[BaseMessage]
+    recipient: dict
+    extracted_info: str
+    history_summary: str
+    draft_email: dict
+    qa_feedback: str
+    revisions: int
+    drafts: Annotated[list, merge_drafts]
+    timings: Annotated[list, merge_timings]
+
+class DraftOutput(TypedDict):
+    drafts: Annotated[list, merge_drafts]
+    qa_rounds: Annotated[dict, merge_dict]
+    timings: Annotated[list, merge_timings]
+
 class EmailDraft(BaseModel):
     subject: str
     body: str
-    to_email: str
-    to_name: str
 
-def copywriter_node(state: AgentState):
-    print("[Copywriter Agent] Drafting email...")
+async def copywriter_node(state: DraftState):
+    recipient = state["recipient"]
+    print(f"[Copywriter Agent] Drafting email to {recipient['name']}...")
     sys_msg = f"""You are the Copywriter Agent.
 Your job is to write an email draft based on the user's request.
 Extracted info: {state.get('extracted_info', '')}
+Recipient: {recipient['name']} <{recipient['email']}>
+Recipient's preferred tone: {recipient.get('tone') or 'professional'}
 QA Feedback (if any): {state.get('qa_feedback', 'None')}
 
-Review the conversation and the contact info found by the Researcher.
-Write a professional email. 
+Review the conversation and write the email for this recipient only, in their preferred tone.
 CRITICAL: If QA Feedback is present, you MUST adjust your draft to fix the issues mentioned by the QA agent!"""
     
-    response = llm.with_structured_output(EmailDraft).invoke([SystemMessage(content=sys_msg)] + state["messages"])
+    prompt = build_prompt(sys_msg, state["messages"], "copywriter", state.get("history_summary", ""))
+    response = await structured_invoke(get_model("copywriter"), EmailDraft, prompt, "copywriter")
     
     draft = {
         "subject": response.subject,
         "body": response.body,
-        "to": response.to_email,
-        "to_name": response.to_name
+        "to": recipient["email"],
+        "to_name": recipient["name"]
     }
     print(f"  -> Drafted email to {draft['to_name']}")
     return {"draft_email": draft}
 
 # --- 4. QA / Reviewer Agent ---
+def lint_node(state: DraftState):
+    """Cheap local checks before spending an LLM call on QA"""
+    issues = lint_draft(state["draft_email"])
+    if not issues:
+        return {"qa_feedback": ""}
+    print(f"  -> Lint failed: {issues}")
+    metrics.inc("agent_qa_lint_failures_total", {})
+    return {"qa_feedback": " ".join(issues), "revisions": state.get("revisions", 0) + 1}
+
+def lint_router(state: DraftState):
+    if not state.get("qa_feedback"):
+        return "qa"
+    return "finalize_draft" if state["revisions"] >= MAX_QA_ROUNDS else "copywriter"
+
 class QAResult(BaseModel):
     passed: bool = Field(description="True if the email is perfect, False if it needs rewriting.")
     feedback: str = Field(description="Detailed feedback if passed is False. Say 'Passed' if True.")
 
-def qa_node(state: AgentState):
+async def qa_node(state: DraftState):
     print("[QA Agent] Reviewing draft...")
     draft = state.get("draft_email", {})
     sys_msg = f"""You are the QA / Reviewer Agent.
@@ -221,28 +573,79 @@ Criteria:
 
 If it fails any of these, provide specific feedback on what needs to change. If it is perfect, set passed to True."""
     
-    response = llm.with_structured_output(QAResult).invoke([SystemMessage(content=sys_msg)])
+    response = await structured_invoke(get_model("qa"), QAResult, [SystemMessage(content=sys_msg)], "qa")
     
+    metrics.inc("agent_qa_llm_reviews_total", {})
     if response.passed:
         print("  -> Status: PASSED")
         return {"qa_feedback": "Passed"}
     else:
         print(f"  -> Status: FAILED. Feedback: {response.feedback}")
-        return {"qa_feedback": response.feedback}
+        return {"qa_feedback": response.feedback, "revisions": state.get("revisions", 0) + 1}
 
-def qa_router(state: AgentState):
-    if state.get("qa_feedback") == "Passed":
-        return "create_preview"
+def qa_router(state: DraftState):
+    if state.get("qa_feedback") == "Passed" or state.get("revisions", 0) >= MAX_QA_ROUNDS:
+        return "finalize_draft"
     else:
         return "copywriter"
 
+def finalize_draft_node(state: DraftState):
+    draft = state["draft_email"]
+    rounds = state.get("revisions", 0)
+    metrics.inc("agent_qa_drafts_total", {"rounds": str(rounds)})
+    metrics.inc("agent_qa_revision_rounds_total", {}, rounds)
+    if state.get("qa_feedback") != "Passed":
+        # Round cap reached: ship the last draft rather than loop forever
+        metrics.inc("agent_qa_round_cap_hits_total", {})
+        print(f"  -> QA round cap ({MAX_QA_ROUNDS}) reached for {draft['to_name']}")
+    return {"drafts": [draft], "qa_rounds": {draft["to"]: rounds}}
+
+def draft_entry_router(state: DraftState):
+    # A reconciled speculative draft goes straight to review
+    return "lint" if state.get("draft_email") else "copywriter"
+
+def create_draft_graph():
+    """Per-recipient copywriter -> lint -> QA loop, run once per recipient via Send"""
+    branch = StateGraph(DraftState, output_schema=DraftOutput)
+    branch.add_node("copywriter", traced_node("copywriter", copywriter_node))
+    branch.add_node("lint", traced_node("lint", lint_node))
+    branch.add_node("qa", traced_node("qa", qa_node))
+    branch.add_node("finalize_draft", traced_node("finalize_draft", finalize_draft_node))
+    branch.add_conditional_edges(START, draft_entry_router, ["copywriter", "lint"])
+    branch.add_edge("copywriter", "lint")
+    branch.add_conditional_edges(
+        "lint",
+        lint_router,
+        {
+            "qa": "qa",
+            "copywriter": "copywriter",
+            "finalize_draft": "finalize_draft"
+        }
+    )
+    branch.add_conditional_edges(
+        "qa",
+        qa_router,
+        {
+            "copywriter": "copywriter",
+            "finalize_draft": "finalize_draft"
+        }
+    )
+    branch.add_edge("finalize_draft", END)
+    return branch.compile()
+
 # --- 5. Output / Action Nodes ---
 def create_preview(state: AgentState):
     print("[System] Creating preview for user...")
-    draft = state.get("draft_email", {})
-    preview_text = f"**Email Preview**\n\n**To:** {draft.get('to_name')} ({draft.get('to')})\n**Subject:** {draft.get('subject')}\n**Body:**\n{draft.get('body')}\n\n---\n✅ Type **'send'** to send\n❌ Type **'cancel'** to cancel\n✏️ Type **'edit'** to make changes"
+    # Branches finish in any order; present drafts in recipient order
+    order = {r["email"]: i for i, r in enumerate(state.get("recipients", []))}
+    emails_to_send = sorted(state.get("drafts", []), key=lambda d: order.get(d["to"], len(order)))
     
-    emails_to_send = [draft]
+    sections = [
+        f"**To:** {draft.get('to_name')} ({draft.get('to')})\n**Subject:** {draft.get('subject')}\n**Body:**\n{draft.get('body')}"
+        for draft in emails_to_send
+    ]
+    title = "**Email Preview**" if len(sections) == 1 else f"**Email Preview ({len(sections)} emails)**"
+    preview_text = f"{title}\n\n" + "\n\n---\n\n".join(sections) + "\n\n---\n✅ Type **'send'** to send\n❌ Type **'cancel'** to cancel\n✏️ Type **'edit'** to make changes"
     
     return {
         "messages": [AIMessage(content=preview_text)], 
@@ -250,28 +653,30 @@ def create_preview(state: AgentState):
         "emails_to_send": emails_to_send
     }
 
-def send_emails_node(state: AgentState):
+async def send_email(token: str, email: dict) -> str:
+    try:
+        response = await backend.request(
+            "POST",
+            "/send/",
+            token,
+            json={
+                "to": email["to"],
+                "subject": email["subject"],
+                "body": email["body"]
+            }
+        )
+        response.raise_for_status()
+        print(f"  -> Success: {email['to']}")
+        return f"✓ Sent to {email['to_name']} ({email['to']})"
+    except Exception as e:
+        print(f"  -> Failed: {e}")
+        return f"✗ Failed to send to {email.get('to_name')}: {e}"
+
+async def send_emails_node(state: AgentState):
     print("[System] Sending emails...")
-    results = []
-    headers = {"Authorization": f"Bearer {state.get('user_token', '')}"}
-    
-    for email in state.get("emails_to_send", []):
-        try:
-            response = requests.post(
-                f"{BACKEND_URL}/send/",
-                json={
-                    "to": email["to"],
-                    "subject": email["subject"],
-                    "body": email["body"]
-                },
-                headers=headers
-            )
-            response.raise_for_status()
-            results.append(f"✓ Sent to {email['to_name']} ({email['to']})")
-            print(f"  -> Success: {email['to']}")
-        except Exception as e:
-            results.append(f"✗ Failed to send to {email.get('to_name')}: {e}")
-            print(f"  -> Failed: {e}")
+    token = state.get("user_token", "")
+    # Sent concurrently; results keep the preview order
+    results = await asyncio.gather(*(send_email(token, email) for email in state.get("emails_to_send", [])))
             
     return {"messages": [AIMessage(content="\n".join(results))], "awaiting_approval": False}
 
@@ -280,12 +685,22 @@ def cancel_node(state: AgentState):
     return {"messages": [AIMessage(content="Email action cancelled.")], "awaiting_approval": False}
 
 # --- Entry Router ---
-def entry_router(state: AgentState):
+class ApprovalDecision(BaseModel):
+    decision: Literal["approve", "cancel", "edit"] = Field(description="approve to send the previewed emails as they are, cancel to drop them, edit for anything else (changes, questions, new requests).")
+
+async def entry_router(state: AgentState):
     if state.get("awaiting_approval"):
-        last_msg = state["messages"][-1].content.lower().strip()
-        if last_msg in ["send", "yes", "approve", "confirm", "ok"]:
+        user_text = latest_user_text(state)
+        decision = classify_approval(user_text)
+        if decision is None:
+            # Not an explicit command; let the model read the reply
+            sys_msg = "The user was shown email drafts and asked whether to send them. Classify their reply."
+            prompt = [SystemMessage(content=sys_msg), HumanMessage(content=user_text)]
+            response = await structured_invoke(get_model("approval"), ApprovalDecision, prompt, "approval")
+            decision = response.decision if response else "edit"
+        if decision == "approve":
             return "send_emails"
-        elif last_msg in ["cancel", "no", "stop"]:
+        elif decision == "cancel":
             return "cancel_node"
         else:
             # Assume they want to edit the draft, pass back to Triage
@@ -302,16 +717,16 @@ def create_graph():
     """Create and compile the Multi-Agent LangGraph workflow"""
     workflow = StateGraph(AgentState)
     
-    # Add nodes
-    workflow.add_node("triage", triage_node)
-    workflow.add_node("researcher", researcher_node)
-    workflow.add_node("researcher_tools", researcher_tools_node)
-    workflow.add_node("copywriter", copywriter_node)
-    workflow.add_node("qa", qa_node)
-    workflow.add_node("create_preview", create_preview)
-    workflow.add_node("send_emails", send_emails_node)
-    workflow.add_node("cancel_node", cancel_node)
-    workflow.add_node("prepare_edit", prepare_edit_node)
+    # Add nodes (each wrapped for per-node timing; entry nodes start a new run record)
+    workflow.add_node("triage", traced_node("triage", triage_node, run_start=True))
+    workflow.add_node("researcher", traced_node("researcher", researcher_node))
+    workflow.add_node("researcher_tools", traced_node("researcher_tools", researcher_tools_node))
+    workflow.add_node("select_recipients", traced_node("select_recipients", select_recipients_node))
+    workflow.add_node("draft_recipient", create_draft_graph())
+    workflow.add_node("create_preview", traced_node("create_preview", create_preview))
+    workflow.add_node("send_emails", traced_node("send_emails", send_emails_node, run_start=True))
+    workflow.add_node("cancel_node", traced_node("cancel_node", cancel_node, run_start=True))
+    workflow.add_node("prepare_edit", traced_node("prepare_edit", prepare_edit_node))
     
     # Entry Point & Routing
     workflow.add_conditional_edges(
@@ -340,29 +755,23 @@ def create_graph():
         researcher_router,
         {
             "researcher_tools": "researcher_tools",
-            "copywriter": "copywriter",
+            "select_recipients": "select_recipients",
             END: END
         }
     )
     workflow.add_edge("researcher_tools", "researcher")
     
-    # Copywriter & QA Flow
-    workflow.add_edge("copywriter", "qa")
-    workflow.add_conditional_edges(
-        "qa",
-        qa_router,
-        {
-            "copywriter": "copywriter",
-            "create_preview": "create_preview"
-        }
-    )
+    # Copywriter & QA Flow: one parallel branch per recipient, reduced into one preview
+    workflow.add_conditional_edges("select_recipients", fan_out_drafts, ["draft_recipient", END])
+    workflow.add_edge("draft_recipient", "create_preview")
     
     # Output Nodes
     workflow.add_edge("create_preview", END)
     workflow.add_edge("send_emails", END)
     workflow.add_edge("cancel_node", END)
     
-    return workflow.compile()
+    # None under the LangGraph server, which persists threads itself (see checkpointer.py)
+    return workflow.compile(checkpointer=get_checkpointer())
 
 # Export the graph for LangGraph Studio
 graph = create_graph()
@@ -0,0 +1,104 @@
+"""
+Cheap local intent classification that runs before the triage LLM.
+Rules and keyword patterns only; anything below the confidence threshold is
+left to the LLM.
+"""
+
+import os
+import re
+import threading
+from collections import Counter
+from typing import NamedTuple
+
+FAST_PATH_THRESHOLD = float(os.getenv("FAST_PATH_THRESHOLD", "0.9"))
+
+
+class IntentResult(NamedTuple):
+    action: str | None  # "read_emails", "ask_user" or None when unsure
+    confidence: float
+    response_to_user: str = ""
+
+
+# --- Approval phrases (used while a preview is awaiting approval) ---
+# Only explicit send commands; anything softer ("ok thanks", "great") is left
+# to the LLM, since a false approve sends mail
+_APPROVE = re.compile(
+    r"^(?:send(?: it| them| the emails?)?|approve|yes,? send(?: it| them)?|go ahead(?:,? send(?: it| them)?)?)"
+    r"(?:[\s,!.]+(?:please|now))*[\s!.]*$"
+)
+_CANCEL = re.compile(
+    r"^(?:no|nope|cancel|stop|abort|never ?mind|forget it|don'?t send(?: it)?|do not send(?: it)?|discard|❌)"
+    r"(?:[\s,!.]+(?:it|that|please|thanks?|the emails?))*[\s!.]*$"
+)
+
+# --- Top-level intents ---
+# Stems, so "drafted", "replying" or "wrote" also count as send intent
+_SEND_WORDS = re.compile(
+    r"\b(?:send|sent|writ|wrote|draft|compos|repl|forward|tell|inform|notif|e-?mail (?:to|my)|let .+ know)\w*"
+)
+_READ_WORDS = re.compile(r"\b(show|read|list|summari[sz]e|what'?s new|any new|latest|recent|unread|fetch)\b")
+_MAIL_WORDS = re.compile(r"\b(e-?mails?|inbox|mails?)\b")
+# Whole-utterance inbox requests; only these skip the LLM
+_READ_REQUEST = re.compile(
+    r"^(?:(?:please|can you|could you) )?(?:show|read|list|summari[sz]e|fetch|check|open)(?: me)?(?: my| the)?"
+    r"(?: (?:latest|recent|new|unread|last|top|\d+))*(?: e-?mails?| mails?| inbox| messages)"
+    r"(?: please)?[\s?!.]*$"
+    r"|^(?:what'?s new|anything new|any new (?:e-?mails?|mails?|messages))(?: in my (?:inbox|e-?mails?|mail))?[\s?!.]*$"
+)
+_GREETING = re.compile(r"^(?:hi|hello|hey|good (?:morning|afternoon|evening)|thanks|thank you)[\s!.]*$")
+
+GREETING_RESPONSE = "Hi! I can summarize your latest emails or draft and send emails for you. What would you like to do?"
+
+_lock = threading.Lock()
+_stats = Counter()
+
+
+def _normalize(text: str) -> str:
+    return " ".join((text or "").lower().strip().split())
+
+
+def classify_approval(text: str) -> str | None:
+    """Return "approve", "cancel" or None (treat as an edit request)."""
+    text = _normalize(text)
+    if _APPROVE.match(text):
+        decision = "approve"
+    elif _CANCEL.match(text):
+        decision = "cancel"
+    else:
+        decision = None
+    _record("approval", decision is not None)
+    return decision
+
+
+def classify_intent(text: str) -> IntentResult:
+    """Classify a user turn; returns action=None when the LLM should decide."""
+    text = _normalize(text)
+    result = IntentResult(None, 0.0)
+    if _GREETING.match(text):
+        result = IntentResult("ask_user", 0.95, GREETING_RESPONSE)
+    elif _READ_REQUEST.match(text):
+        # Short, unambiguous inbox requests ("show my latest emails")
+        result = IntentResult("read_emails", 0.95)
+    elif _MAIL_WORDS.search(text) and _READ_WORDS.search(text) and not _SEND_WORDS.search(text):
+        # Keywords alone are only a hint; kept below the threshold
+        result = IntentResult("read_emails", 0.7)
+
+    if result.confidence < FAST_PATH_THRESHOLD:
+        result = IntentResult(None, result.confidence)
+    _record("triage", result.action is not None)
+    return result
+
+
+def _record(stage: str, hit: bool):
+    with _lock:
+        _stats[f"{stage}_{'hit' if hit else 'fallback'}"] += 1
+
+
+def fast_path_stats() -> dict:
+    """Hit counts and hit rates of the local classifier, per stage."""
+    with _lock:
+        stats = dict(_stats)
+    for stage in ("approval", "triage"):
+        total = stats.get(f"{stage}_hit", 0) + stats.get(f"{stage}_fallback", 0)
+        stats[f"{stage}_hit_rate"] = round(stats.get(f"{stage}_hit", 0) / total, 3) if total else 0.0
+    return stats
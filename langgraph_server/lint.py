@@ -0,0 +1,91 @@
+"""
+Local pre-QA checks for email drafts.
+Catches cheap failures (empty fields, bad addresses, placeholders, common
+misspellings, length limits) without spending an LLM call.
+"""
+
+import os
+import re
+
+MAX_SUBJECT_CHARS = int(os.getenv("LINT_MAX_SUBJECT_CHARS", "150"))
+MAX_BODY_CHARS = int(os.getenv("LINT_MAX_BODY_CHARS", "5000"))
+MIN_BODY_CHARS = int(os.getenv("LINT_MIN_BODY_CHARS", "10"))
+
+BANNED_PHRASES = [
+    phrase.strip().lower()
+    for phrase in os.getenv(
+        "LINT_BANNED_PHRASES",
+        "lorem ipsum,as an ai,language model,todo,insert name,your name here"
+    ).split(",")
+    if phrase.strip()
+]
+
+COMMON_MISSPELLINGS = {
+    "recieve": "receive",
+    "recieved": "received",
+    "teh": "the",
+    "definately": "definitely",
+    "seperate": "separate",
+    "occured": "occurred",
+    "untill": "until",
+    "wich": "which",
+    "adress": "address",
+    "accomodate": "accommodate",
+    "tommorow": "tomorrow",
+    "tomorow": "tomorrow",
+    "begining": "beginning",
+    "beleive": "believe",
+    "calender": "calendar",
+    "collegue": "colleague",
+    "collegues": "colleagues",
+    "goverment": "government",
+    "immediatly": "immediately",
+    "neccessary": "necessary",
+    "occassion": "occasion",
+    "recomend": "recommend",
+    "sincerly": "sincerely",
+    "thier": "their",
+    "wierd": "weird",
+}
+
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[a-zA-Z]{2,}$")
+_PLACEHOLDER = re.compile(r"\[[^\]\n]{1,40}\]|\{\{[^}]*\}\}|<[A-Z][A-Za-z ]{1,30}>")
+_WORD = re.compile(r"[A-Za-z']+")
+_REPEATED_WORD = re.compile(r"\b(\w+)\s+\1\b", re.IGNORECASE)
+
+
+def lint_draft(draft: dict) -> list[str]:
+    """Return a list of problems with the draft; empty when it looks fine."""
+    issues = []
+    subject = (draft.get("subject") or "").strip()
+    body = (draft.get("body") or "").strip()
+    to = (draft.get("to") or "").strip()
+
+    if not subject:
+        issues.append("Subject is empty.")
+    elif len(subject) > MAX_SUBJECT_CHARS:
+        issues.append(f"Subject is too long ({len(subject)} chars, max {MAX_SUBJECT_CHARS}).")
+    if len(body) < MIN_BODY_CHARS:
+        issues.append("Body is empty or too short.")
+    elif len(body) > MAX_BODY_CHARS:
+        issues.append(f"Body is too long ({len(body)} chars, max {MAX_BODY_CHARS}).")
+    if not _EMAIL.match(to):
+        issues.append(f"Recipient address '{to}' is not a valid email address.")
+
+    text = f"{subject}\n{body}"
+    lowered = text.lower()
+    for phrase in BANNED_PHRASES:
+        if re.search(rf"\b{re.escape(phrase)}\b", lowered):
+            issues.append(f"Remove the phrase '{phrase}'.")
+    placeholder = _PLACEHOLDER.search(text)
+    if placeholder:
+        issues.append(f"Fill in or remove the placeholder '{placeholder.group(0)}'.")
+
+    misspelled = sorted({w.lower() for w in _WORD.findall(text) if w.lower() in COMMON_MISSPELLINGS})
+    if misspelled:
+        fixes = ", ".join(f"'{w}' -> '{COMMON_MISSPELLINGS[w]}'" for w in misspelled)
+        issues.append(f"Fix spelling: {fixes}.")
+    repeated = _REPEATED_WORD.search(text)
+    if repeated:
+        issues.append(f"Repeated word: '{repeated.group(0)}'.")
+    return issues
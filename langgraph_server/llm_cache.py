@@ -0,0 +1,143 @@
+"""
+Persistent cache for structured-output LLM calls.
+
+Entries are keyed by a hash of (model, temperature, messages, output schema)
+and stored in SQLite, so identical prompts across retries, re-runs and
+processes are answered without a Gemini round-trip. Caching is opt-in per
+node through LLM_CACHE_NODES (e.g. "triage,qa").
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", str(Path(__file__).parent / ".llm_cache.sqlite3"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_NODES = {n.strip() for n in os.getenv("LLM_CACHE_NODES", "").split(",") if n.strip()}
+
+
+class SQLiteLLMCache:
+    """Key/value store with TTL expiry and least-recently-used eviction."""
+
+    def __init__(self, path: str, ttl: float, max_entries: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT value, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    conn.commit()
+                self.misses += 1
+                return None
+            conn.execute("UPDATE llm_cache SET accessed = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            conn.execute("DELETE FROM llm_cache WHERE created < ?", (now - self.ttl,))
+            (count,) = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+            if count > self.max_entries:
+                overflow = count - self.max_entries
+                conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY accessed LIMIT ?)",
+                    (overflow,)
+                )
+                self.evictions += overflow
+            conn.commit()
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM llm_cache")
+            conn.commit()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+llm_cache = SQLiteLLMCache(LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES)
+
+
+def cache_key(model, schema, messages) -> str:
+    payload = {
+        "model": getattr(model, "model", type(model).__name__),
+        "temperature": getattr(model, "temperature", None),
+        "schema": schema.model_json_schema(),
+        # Tool call ids are random per run, so only names and arguments count
+        "messages": [
+            {
+                "type": m.type,
+                "content": m.content,
+                "tool_calls": [
+                    {"name": c["name"], "args": c["args"]} for c in getattr(m, "tool_calls", None) or []
+                ],
+            }
+            for m in messages
+        ],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+async def structured_invoke(model, schema, messages, node: str):
+    """
+    ``await model.with_structured_output(schema).ainvoke(messages)``, served
+    from the cache when ``node`` is listed in LLM_CACHE_NODES.
+    """
+    if node not in LLM_CACHE_NODES:
+        return await model.with_structured_output(schema).ainvoke(messages)
+
+    key = cache_key(model, schema, messages)
+    # SQLite access is blocking; keep it off the event loop
+    cached = await asyncio.to_thread(llm_cache.get, key)
+    if cached is not None:
+        print(f"  -> LLM cache hit ({node}) {llm_cache.stats()}")
+        return schema.model_validate_json(cached)
+    result = await model.with_structured_output(schema).ainvoke(messages)
+    if result is not None:
+        await asyncio.to_thread(llm_cache.put, key, result.model_dump_json())
+    return result
@@ -0,0 +1,33 @@
+"""
+Custom HTTP routes mounted into the LangGraph server (see "http" in
+langgraph.json). Serves the agent's metrics in Prometheus text format.
+"""
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from intent import fast_path_stats
+from llm_cache import llm_cache
+from summaries import summary_cache
+from tracing import metrics
+
+
+def _gauges() -> str:
+    lines = ["# TYPE agent_fast_path gauge"]
+    for key, value in sorted(fast_path_stats().items()):
+        lines.append(f'agent_fast_path{{stat="{key}"}} {value}')
+    lines.append("# TYPE agent_llm_cache gauge")
+    for key, value in sorted(llm_cache.stats().items()):
+        lines.append(f'agent_llm_cache{{stat="{key}"}} {value}')
+    lines.append("# TYPE agent_email_summary_cache gauge")
+    for key, value in sorted(summary_cache.stats().items()):
+        lines.append(f'agent_email_summary_cache{{stat="{key}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+async def prometheus_metrics(request):
+    return PlainTextResponse(metrics.render() + _gauges(), media_type="text/plain; version=0.0.4")
+
+
+app = Starlette(routes=[Route("/metrics", prometheus_metrics)])
@@ -0,0 +1,137 @@
+"""
+Per-node model routing.
+
+Each LLM call site asks get_model(node) for its model. Nodes map to a tier
+("fast" or "smart") and a temperature:
+- classification and structured decisions (triage, approval replies,
+  researcher tool choice, recipient selection, QA, email summaries) run
+  deterministic at temperature 0, and all but the researcher run on the
+  fast tier,
+- the copywriter keeps the smart tier and a creative temperature.
+
+Every tier has its own model, timeout, retry count and fallback models, and
+everything is overridable through env:
+
+    LLM_FAST_MODEL=gemini-flash-lite-latest   LLM_SMART_MODEL=gemini-flash-latest
+    LLM_FAST_TIMEOUT=20                       LLM_SMART_TIMEOUT=60
+    LLM_FAST_FALLBACKS=gemini-flash-latest    LLM_SMART_FALLBACKS=
+    LLM_TIER_QA=smart                         LLM_TEMPERATURE_COPYWRITER=0.9
+"""
+
+import os
+from functools import lru_cache
+from typing import NamedTuple
+
+from dotenv import load_dotenv
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+load_dotenv()
+
+
+class Tier(NamedTuple):
+    model: str
+    timeout: float
+    max_retries: int
+    fallbacks: tuple[str, ...]
+
+
+def _tier(name: str, model: str, timeout: str, fallbacks: str) -> Tier:
+    prefix = f"LLM_{name.upper()}"
+    return Tier(
+        model=os.getenv(f"{prefix}_MODEL", model),
+        timeout=float(os.getenv(f"{prefix}_TIMEOUT", timeout)),
+        max_retries=int(os.getenv(f"{prefix}_MAX_RETRIES", "2")),
+        fallbacks=tuple(m.strip() for m in os.getenv(f"{prefix}_FALLBACKS", fallbacks).split(",") if m.strip()),
+    )
+
+
+TIERS = {
+    "fast": _tier("fast", "gemini-flash-lite-latest", "20", "gemini-flash-latest"),
+    "smart": _tier("smart", "gemini-flash-latest", "60", ""),
+}
+
+# node -> (tier, temperature)
+NODE_DEFAULTS = {
+    "triage": ("fast", 0.0),
+    "approval": ("fast", 0.0),
+    "researcher": ("smart", 0.0),
+    "select_recipients": ("fast", 0.0),
+    "copywriter": ("smart", 0.7),
+    "qa": ("fast", 0.0),
+    "email_summary": ("fast", 0.0),
+}
+DEFAULT_NODE = ("smart", 0.7)
+
+
+def node_config(node: str) -> tuple[str, float]:
+    tier, temperature = NODE_DEFAULTS.get(node, DEFAULT_NODE)
+    key = node.upper()
+    tier = os.getenv(f"LLM_TIER_{key}", tier)
+    if tier not in TIERS:
+        raise ValueError(f"LLM_TIER_{key}={tier!r}: expected one of {sorted(TIERS)}")
+    return tier, float(os.getenv(f"LLM_TEMPERATURE_{key}", temperature))
+
+
+class TieredModel:
+    """
+    A tier's primary model plus its fallbacks.
+
+    Exposes the two entry points the graph uses, with_structured_output()
+    and bind_tools(); each builds the runnable for the primary model and the
+    same runnable for every fallback model, tried in order on any error
+    (including timeouts).
+    """
+
+    def __init__(self, primary, fallbacks: list):
+        self.primary = primary
+        self.fallbacks = fallbacks
+        # Read by llm_cache.cache_key
+        self.model = getattr(primary, "model", type(primary).__name__)
+        self.temperature = getattr(primary, "temperature", None)
+
+    def _chain(self, build):
+        runnable = build(self.primary)
+        if not self.fallbacks:
+            return runnable
+        return runnable.with_fallbacks([build(model) for model in self.fallbacks])
+
+    def with_structured_output(self, schema, **kwargs):
+        return self._chain(lambda model: model.with_structured_output(schema, **kwargs))
+
+    def bind_tools(self, tools, **kwargs):
+        return self._chain(lambda model: model.bind_tools(tools, **kwargs))
+
+
+def _chat_model(model: str, tier: Tier, temperature: float) -> ChatGoogleGenerativeAI:
+    return ChatGoogleGenerativeAI(
+        model=model,
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+        temperature=temperature,
+        timeout=tier.timeout,
+        max_retries=tier.max_retries
+    )
+
+
+@lru_cache(maxsize=None)
+def _tiered_model(tier_name: str, temperature: float) -> TieredModel:
+    tier = TIERS[tier_name]
+    return TieredModel(
+        _chat_model(tier.model, tier, temperature),
+        [_chat_model(model, tier, temperature) for model in tier.fallbacks]
+    )
+
+
+_override = None
+
+
+def use_model(model):
+    """Serve every node from ``model`` (benchmarks, tests); None restores routing."""
+    global _override
+    _override = model
+
+
+def get_model(node: str):
+    """The model the given node should call."""
+    if _override is not None:
+        return _override
+    return _tiered_model(*node_config(node))
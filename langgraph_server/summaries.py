@@ -0,0 +1,100 @@
+"""
+Per-message summary cache for inbox digests.
+
+get_latest_emails returns one short summary per email instead of the raw
+bodies. Summaries are cached in SQLite keyed by Gmail message id plus a hash
+of the message content, so repeated "what's new?" requests only summarize
+messages that are new or changed. Missing summaries are filled lazily in
+small batches (EMAIL_SUMMARY_BATCH emails per LLM call, batches in parallel).
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from pydantic import BaseModel, Field
+
+from llm_cache import SQLiteLLMCache, structured_invoke
+
+EMAIL_SUMMARY_CACHE_PATH = os.getenv(
+    "EMAIL_SUMMARY_CACHE_PATH", str(Path(__file__).parent / ".email_summaries.sqlite3")
+)
+EMAIL_SUMMARY_TTL = float(os.getenv("EMAIL_SUMMARY_TTL", str(30 * 86400)))
+EMAIL_SUMMARY_MAX_ENTRIES = int(os.getenv("EMAIL_SUMMARY_MAX_ENTRIES", "20000"))
+EMAIL_SUMMARY_BATCH = int(os.getenv("EMAIL_SUMMARY_BATCH", "5"))
+EMAIL_SUMMARY_BODY_CHARS = int(os.getenv("EMAIL_SUMMARY_BODY_CHARS", "3000"))
+
+summary_cache = SQLiteLLMCache(EMAIL_SUMMARY_CACHE_PATH, EMAIL_SUMMARY_TTL, EMAIL_SUMMARY_MAX_ENTRIES)
+
+
+class EmailSummary(BaseModel):
+    id: str = Field(description="The id of the email being summarized.")
+    summary: str = Field(description="One or two sentences: what the email is about and any ask, deadline or decision.")
+
+
+class EmailSummaries(BaseModel):
+    summaries: list[EmailSummary]
+
+
+def message_key(email: dict) -> str:
+    """Gmail id plus a content hash, so an edited/replaced message is re-summarized."""
+    content = json.dumps([email.get("from"), email.get("subject"), email.get("date"), email.get("body")])
+    return f"{email.get('id')}:{hashlib.sha256(content.encode()).hexdigest()[:16]}"
+
+
+async def _summarize_batch(model, batch: list[dict]) -> dict[str, str]:
+    sys_msg = """Summarize each email below in one or two sentences for an inbox digest.
+Say what it is about and call out any request, deadline or decision. Return one summary per email id."""
+    payload = [
+        {
+            "id": email.get("id"),
+            "from": email.get("from"),
+            "subject": email.get("subject"),
+            "body": (email.get("body") or email.get("snippet") or "")[:EMAIL_SUMMARY_BODY_CHARS],
+        }
+        for email in batch
+    ]
+    response = await structured_invoke(
+        model, EmailSummaries, [SystemMessage(content=sys_msg), HumanMessage(content=json.dumps(payload))], "email_summary"
+    )
+    return {s.id: s.summary for s in response.summaries} if response else {}
+
+
+async def summarize_emails(model, emails: list[dict]) -> dict[str, str]:
+    """Summary per email id, from the cache where possible."""
+    keys = {email.get("id"): message_key(email) for email in emails}
+    cached = await asyncio.gather(*(asyncio.to_thread(summary_cache.get, key) for key in keys.values()))
+    summaries = {email_id: summary for email_id, summary in zip(keys, cached) if summary is not None}
+
+    missing = [email for email in emails if email.get("id") not in summaries]
+    if missing:
+        print(f"  -> Summarizing {len(missing)} of {len(emails)} email(s)")
+        batches = [missing[i:i + EMAIL_SUMMARY_BATCH] for i in range(0, len(missing), EMAIL_SUMMARY_BATCH)]
+        results = await asyncio.gather(*(_summarize_batch(model, batch) for batch in batches), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"  -> Email summary batch failed: {result}")
+                continue
+            for email_id, summary in result.items():
+                if email_id in keys:
+                    summaries[email_id] = summary
+                    await asyncio.to_thread(summary_cache.put, keys[email_id], summary)
+    return summaries
+
+
+async def build_digest(model, emails: list[dict]) -> list[dict]:
+    """Compact inbox digest; emails without a summary fall back to their snippet (not cached)."""
+    summaries = await summarize_emails(model, emails)
+    return [
+        {
+            "id": email.get("id"),
+            "from": email.get("from"),
+            "subject": email.get("subject"),
+            "date": email.get("date"),
+            "summary": summaries.get(email.get("id")) or email.get("snippet", ""),
+        }
+        for email in emails
+    ]
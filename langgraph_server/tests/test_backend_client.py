@@ -0,0 +1,37 @@
+import asyncio
+import unittest
+
+from backend_client import BackendClient
+
+
+class BackendClientTests(unittest.TestCase):
+    def setUp(self):
+        self.backend = BackendClient("http://backend.test", timeout=1, connect_timeout=1, retries=0, backoff=0)
+
+    def test_one_pool_per_loop(self):
+        async def twice():
+            return await self.backend._get_client(), await self.backend._get_client()
+
+        first, again = asyncio.run(twice())
+        self.assertIs(first, again)
+        second, _ = asyncio.run(twice())
+        self.assertIsNot(second, first)
+
+    def test_pool_is_closed_when_its_loop_shuts_down(self):
+        client = asyncio.run(self.backend._get_client())
+        self.assertTrue(client.is_closed)
+        self.assertEqual(self.backend._clients, {})
+
+    def test_aclose_closes_the_running_loops_pool(self):
+        async def scenario():
+            client = await self.backend._get_client()
+            await self.backend.aclose()
+            return client, await self.backend._get_client()
+
+        closed, fresh = asyncio.run(scenario())
+        self.assertTrue(closed.is_closed)
+        self.assertIsNot(fresh, closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
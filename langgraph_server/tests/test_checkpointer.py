@@ -0,0 +1,121 @@
+import os
+import time
+import unittest
+from unittest import mock
+
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.memory import InMemorySaver
+
+import checkpointer
+from checkpointer import CompressedSerializer, PruningSqliteSaver
+
+
+def put(saver, thread_id, ns="", **values):
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = values
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns}}
+    saved = saver.put(config, checkpoint, {}, {})
+    saver.put_writes(saved, [("messages", "write")], task_id="task")
+    return checkpoint["id"]
+
+
+@unittest.skipIf(PruningSqliteSaver is None, "langgraph-checkpoint-sqlite is not installed")
+class PruningSqliteSaverTests(unittest.TestCase):
+    def saver(self, **kwargs):
+        saver = PruningSqliteSaver.from_path(":memory:", cleanup_interval=0, **kwargs)
+        self.addCleanup(saver.conn.close)
+        return saver
+
+    def ids(self, saver, table, thread_id, ns=""):
+        rows = saver.conn.execute(
+            f"SELECT DISTINCT checkpoint_id FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id",
+            (thread_id, ns)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def test_keep_zero_keeps_every_checkpoint(self):
+        saver = self.saver(keep=0)
+        ids = [put(saver, "t") for _ in range(4)]
+        self.assertEqual(self.ids(saver, "checkpoints", "t"), ids)
+        self.assertEqual(saver.pruned, 0)
+
+    def test_prune_keeps_the_newest_checkpoints_and_their_writes(self):
+        saver = self.saver(keep=2)
+        ids = [put(saver, "t") for _ in range(4)]
+        other = put(saver, "other")
+        self.assertEqual(self.ids(saver, "checkpoints", "t"), ids[-2:])
+        self.assertEqual(self.ids(saver, "writes", "t"), ids[-2:])
+        self.assertEqual(self.ids(saver, "checkpoints", "other"), [other])
+        self.assertEqual(saver.pruned, 2)
+
+    def test_root_prune_drops_subgraph_branches_older_than_the_kept_checkpoints(self):
+        saver = self.saver(keep=1)
+        put(saver, "t")
+        put(saver, "t", ns="draft_recipient:1")
+        put(saver, "t")
+        self.assertEqual(self.ids(saver, "checkpoints", "t", ns="draft_recipient:1"), [])
+
+    def test_subgraph_prune_leaves_root_checkpoints_alone(self):
+        saver = self.saver(keep=1)
+        root = put(saver, "t")
+        put(saver, "t", ns="draft_recipient:1")
+        branch = put(saver, "t", ns="draft_recipient:1")
+        self.assertEqual(self.ids(saver, "checkpoints", "t"), [root])
+        self.assertEqual(self.ids(saver, "checkpoints", "t", ns="draft_recipient:1"), [branch])
+
+    def test_cleanup_expires_idle_threads_but_keeps_pending_approvals_longer(self):
+        saver = self.saver(ttl=100, pending_ttl=1000)
+        put(saver, "idle")
+        put(saver, "pending", awaiting_approval=True)
+        put(saver, "fresh")
+        now = time.time()
+        saver.conn.execute("UPDATE thread_activity SET updated = ? WHERE thread_id != 'fresh'", (now - 500,))
+
+        self.assertEqual(saver.cleanup_expired(now), 1)
+        self.assertIsNone(saver.get_tuple({"configurable": {"thread_id": "idle"}}))
+        self.assertIsNotNone(saver.get_tuple({"configurable": {"thread_id": "pending"}}))
+        self.assertEqual(self.ids(saver, "writes", "idle"), [])
+
+        self.assertEqual(saver.cleanup_expired(now + 600), 2)
+        self.assertEqual(saver.stats()["threads"], 0)
+        self.assertEqual(saver.expired_threads, 3)
+
+    def test_approval_clears_the_pending_flag(self):
+        saver = self.saver(ttl=100, pending_ttl=1000)
+        put(saver, "t", awaiting_approval=True)
+        put(saver, "t", awaiting_approval=False)
+        (pending,) = saver.conn.execute("SELECT pending FROM thread_activity WHERE thread_id = 't'").fetchone()
+        self.assertEqual(pending, 0)
+
+    def test_large_blobs_are_stored_compressed(self):
+        saver = self.saver()
+        put(saver, "t", summary="x" * 5000)
+        (type_,) = saver.conn.execute("SELECT type FROM checkpoints WHERE thread_id = 't'").fetchone()
+        self.assertTrue(type_.startswith("zlib+"))
+        state = saver.get_tuple({"configurable": {"thread_id": "t"}}).checkpoint
+        self.assertEqual(state["channel_values"]["summary"], "x" * 5000)
+
+
+class CompressedSerializerTests(unittest.TestCase):
+    def test_small_payloads_are_stored_as_is(self):
+        serde = CompressedSerializer(min_bytes=512)
+        type_, data = serde.dumps_typed({"a": 1})
+        self.assertFalse(type_.startswith("zlib+"))
+        self.assertEqual(serde.loads_typed((type_, data)), {"a": 1})
+
+
+class GetCheckpointerTests(unittest.TestCase):
+    def test_backends(self):
+        with mock.patch.object(checkpointer, "CHECKPOINTER", "none"):
+            self.assertIsNone(checkpointer.get_checkpointer())
+        with mock.patch.object(checkpointer, "CHECKPOINTER", "memory"):
+            self.assertIsInstance(checkpointer.get_checkpointer(), InMemorySaver)
+
+    @unittest.skipIf("CHECKPOINTER" in os.environ, "CHECKPOINTER is set explicitly")
+    def test_standalone_default_creates_no_files(self):
+        # Importing graph.py for tests must not open .checkpoints.sqlite3
+        self.assertEqual(checkpointer.CHECKPOINTER, "memory")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+from unittest import mock
+
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, SystemMessage, ToolMessage
+
+import compaction
+from compaction import build_prompt, compact_messages, estimate_tokens, fold_old_turns, merge_summary
+
+
+def turn(n, tool_chars=0):
+    """One user turn; with tool_chars, the assistant looks something up first."""
+    messages = [HumanMessage(content=f"question {n}", id=f"h{n}")]
+    if tool_chars:
+        call = {"id": f"call-{n}", "name": "get_latest_emails", "args": {}}
+        messages += [AIMessage(content="", tool_calls=[call], id=f"c{n}"),
+                     ToolMessage(content="x" * tool_chars, tool_call_id=f"call-{n}", id=f"t{n}")]
+    return messages + [AIMessage(content=f"answer {n}", id=f"a{n}")]
+
+
+def history(*turns):
+    return [m for t in turns for m in t]
+
+
+class FoldOldTurnsTests(unittest.TestCase):
+    def test_nothing_to_fold(self):
+        messages = history(turn(1), turn(2))
+        self.assertEqual(fold_old_turns(messages, "earlier", keep_turns=2), ([], "earlier"))
+
+    def test_old_turns_move_into_the_summary(self):
+        removals, summary = fold_old_turns(history(turn(1, tool_chars=10), turn(2), turn(3)), "earlier", keep_turns=2)
+        self.assertTrue(all(isinstance(r, RemoveMessage) for r in removals))
+        self.assertEqual([r.id for r in removals], ["h1", "c1", "t1", "a1"])
+        self.assertEqual(summary, "earlier\nUser: question 1 (1 tool lookup) Assistant: answer 1")
+
+    def test_summary_drops_its_oldest_lines_past_the_cap(self):
+        with mock.patch.object(compaction, "SUMMARY_MAX_CHARS", 12):
+            self.assertEqual(merge_summary("first\nsecond", ["third"]), "second\nthird")
+
+
+class CompactMessagesTests(unittest.TestCase):
+    def test_history_within_budget_is_kept_whole(self):
+        messages = history(turn(1, tool_chars=100), turn(2))
+        self.assertEqual(compact_messages(messages, budget=1000, keep_turns=2), (messages, ""))
+
+    def test_turns_beyond_the_window_are_summarized(self):
+        kept, summary = compact_messages(history(turn(1), turn(2), turn(3)), budget=1000, keep_turns=2)
+        self.assertEqual(kept[0].id, "h2")
+        self.assertEqual(summary, "User: question 1 Assistant: answer 1")
+
+    def test_earlier_tool_output_is_stubbed_before_any_turn_is_dropped(self):
+        kept, summary = compact_messages(history(turn(1, tool_chars=2000), turn(2)), budget=200, keep_turns=2)
+        self.assertEqual(summary, "")
+        stub = next(m for m in kept if isinstance(m, ToolMessage))
+        self.assertTrue(stub.content.startswith("[earlier tool result, 2000 chars, truncated]"))
+        self.assertEqual(stub.tool_call_id, "call-1")
+
+    def test_older_turns_are_summarized_when_stubs_are_not_enough(self):
+        kept, summary = compact_messages(history(turn(1, tool_chars=2000), turn(2)), budget=20, keep_turns=2)
+        self.assertEqual([m.id for m in kept], ["h2", "a2"])
+        self.assertEqual(summary, "User: question 1 (1 tool lookup) Assistant: answer 1")
+
+    def test_current_turn_tool_output_is_truncated_last(self):
+        kept, _ = compact_messages(turn(1, tool_chars=8000), budget=500)
+        self.assertEqual([m.id for m in kept], ["h1", "c1", "t1", "a1"])
+        self.assertLessEqual(sum(estimate_tokens(m) for m in kept), 520)
+        self.assertIn("to fit the prompt budget", kept[2].content)
+
+
+class BuildPromptTests(unittest.TestCase):
+    def test_each_node_uses_its_own_budget(self):
+        messages = history(turn(1, tool_chars=10000), turn(2, tool_chars=10000))
+        triage = build_prompt("sys", messages, "triage")
+        researcher = build_prompt("sys", messages, "researcher")
+        self.assertLess(sum(map(estimate_tokens, triage)), sum(map(estimate_tokens, researcher)))
+        self.assertLessEqual(sum(map(estimate_tokens, triage[1:])), compaction.NODE_TOKEN_BUDGETS["triage"] + 50)
+
+    def test_summary_goes_into_the_system_prompt(self):
+        prompt = build_prompt("sys", turn(3), "copywriter", summary="User: hello")
+        self.assertIsInstance(prompt[0], SystemMessage)
+        self.assertEqual(prompt[0].content, "sys\n\nSummary of earlier conversation:\nUser: hello")
+        self.assertEqual(prompt[1:], turn(3))
+
+
+if __name__ == "__main__":
+    unittest.main()
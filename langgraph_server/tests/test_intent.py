@@ -0,0 +1,55 @@
+import unittest
+
+from intent import FAST_PATH_THRESHOLD, classify_approval, classify_intent
+
+
+class ClassifyApprovalTests(unittest.TestCase):
+    def test_explicit_send_commands_approve(self):
+        for text in ["send", "Send it", "approve", "yes, send", "yes send them", "go ahead", "send it please!"]:
+            with self.subTest(text=text):
+                self.assertEqual(classify_approval(text), "approve")
+
+    def test_cancel_phrases(self):
+        for text in ["cancel", "no", "don't send it", "never mind, thanks"]:
+            with self.subTest(text=text):
+                self.assertEqual(classify_approval(text), "cancel")
+
+    def test_soft_replies_fall_back_to_llm(self):
+        for text in ["ok thanks", "great", "sure", "perfect", "yes", "looks good", "send it to Tom instead"]:
+            with self.subTest(text=text):
+                self.assertIsNone(classify_approval(text))
+
+
+class ClassifyIntentTests(unittest.TestCase):
+    def test_inbox_requests_hit(self):
+        for text in ["show my latest emails", "Check my inbox", "summarize my unread emails", "what's new in my inbox?"]:
+            with self.subTest(text=text):
+                result = classify_intent(text)
+                self.assertEqual(result.action, "read_emails")
+                self.assertGreaterEqual(result.confidence, FAST_PATH_THRESHOLD)
+
+    def test_greeting_hits(self):
+        result = classify_intent("hi!")
+        self.assertEqual(result.action, "ask_user")
+        self.assertTrue(result.response_to_user)
+
+    def test_ambiguous_requests_fall_back(self):
+        for text in [
+            "get me my manager's email address",
+            "check the email I drafted to Priya",
+            "open a new message to Tom",
+            "reply to the latest email from Lucas",
+            "Anything important I missed? Go through my mail and tell me",
+        ]:
+            with self.subTest(text=text):
+                self.assertIsNone(classify_intent(text).action)
+
+    def test_keyword_only_match_stays_below_threshold(self):
+        result = classify_intent("show me the emails from last week about the budget")
+        self.assertIsNone(result.action)
+        self.assertLess(result.confidence, FAST_PATH_THRESHOLD)
+        self.assertGreater(result.confidence, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import graph
+from lint import lint_draft
+
+
+def draft(**fields):
+    return {"subject": "Quarterly report", "body": "Hi Ann, the report is attached.", "to": "ann@example.com", **fields}
+
+
+class LintDraftTests(unittest.TestCase):
+    def test_clean_draft_passes(self):
+        self.assertEqual(lint_draft(draft()), [])
+
+    def test_missing_fields_and_bad_address(self):
+        self.assertEqual(lint_draft({"subject": " ", "body": "Hi", "to": "ann@example"}), [
+            "Subject is empty.",
+            "Body is empty or too short.",
+            "Recipient address 'ann@example' is not a valid email address.",
+        ])
+
+    def test_length_limits(self):
+        issues = lint_draft(draft(subject="s" * 151, body="b" * 5001))
+        self.assertEqual(issues, ["Subject is too long (151 chars, max 150).", "Body is too long (5001 chars, max 5000)."])
+
+    def test_banned_phrases_match_whole_words_only(self):
+        self.assertEqual(lint_draft(draft(body="As an AI, I cannot attend.")), ["Remove the phrase 'as an ai'."])
+        self.assertEqual(lint_draft(draft(body="Please check the todos list.")), [])
+
+    def test_placeholders(self):
+        for placeholder in ["[Your Name]", "{{date}}", "<Manager Name>"]:
+            with self.subTest(placeholder):
+                self.assertEqual(lint_draft(draft(body=f"Best regards, {placeholder}")),
+                                 [f"Fill in or remove the placeholder '{placeholder}'."])
+
+    def test_misspellings_and_repeated_words(self):
+        self.assertEqual(lint_draft(draft(body="I will recieve thier reply the the next day.")), [
+            "Fix spelling: 'recieve' -> 'receive', 'thier' -> 'their'.",
+            "Repeated word: 'the the'.",
+        ])
+
+
+class DraftLoopTests(unittest.TestCase):
+    def run_branch(self, copywriter, qa):
+        with mock.patch.object(graph, "copywriter_node", copywriter), mock.patch.object(graph, "qa_node", qa):
+            branch = graph.create_draft_graph()
+        recipient = {"name": "Ann", "email": "ann@example.com", "tone": "formal"}
+        return asyncio.run(branch.ainvoke({"messages": [], "recipient": recipient, "revisions": 0}))
+
+    def test_lint_failure_skips_qa_and_stops_at_the_round_cap(self):
+        copywriter = mock.AsyncMock(return_value={"draft_email": draft(body="TODO", to_name="Ann")})
+        qa = mock.AsyncMock()
+        result = self.run_branch(copywriter, qa)
+        qa.assert_not_awaited()
+        self.assertEqual(copywriter.await_count, graph.MAX_QA_ROUNDS)
+        self.assertEqual(result["qa_rounds"], {"ann@example.com": graph.MAX_QA_ROUNDS})
+        self.assertEqual(len(result["drafts"]), 1)
+
+    def test_clean_draft_goes_to_qa(self):
+        copywriter = mock.AsyncMock(return_value={"draft_email": draft(to_name="Ann")})
+        qa = mock.AsyncMock(return_value={"qa_feedback": "Passed"})
+        result = self.run_branch(copywriter, qa)
+        qa.assert_awaited_once()
+        self.assertEqual(result["qa_rounds"], {"ann@example.com": 0})
+
+    def test_routers_respect_the_round_cap(self):
+        cap = graph.MAX_QA_ROUNDS
+        self.assertEqual(graph.lint_router({"qa_feedback": ""}), "qa")
+        self.assertEqual(graph.lint_router({"qa_feedback": "Subject is empty.", "revisions": cap - 1}), "copywriter")
+        self.assertEqual(graph.lint_router({"qa_feedback": "Subject is empty.", "revisions": cap}), "finalize_draft")
+        self.assertEqual(graph.qa_router({"qa_feedback": "Too casual.", "revisions": cap - 1}), "copywriter")
+        self.assertEqual(graph.qa_router({"qa_feedback": "Too casual.", "revisions": cap}), "finalize_draft")
+
+
+if __name__ == "__main__":
+    unittest.main()
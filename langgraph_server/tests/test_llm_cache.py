@@ -0,0 +1,107 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from langchain_core.messages import AIMessage, HumanMessage
+from pydantic import BaseModel
+
+import llm_cache
+from llm_cache import SQLiteLLMCache, cache_key, structured_invoke
+
+
+class Verdict(BaseModel):
+    passed: bool
+
+
+class FakeModel:
+    model = "fake-model"
+    temperature = 0
+
+    def __init__(self):
+        self.ainvoke = mock.AsyncMock(return_value=Verdict(passed=True))
+
+    def with_structured_output(self, schema):
+        return self
+
+
+class SQLiteLLMCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("llm_cache.time.time", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def cache(self, **kwargs):
+        cache = SQLiteLLMCache(":memory:", **{"ttl": 60, "max_entries": 10, **kwargs})
+        self.addCleanup(lambda: cache._conn and cache._conn.close())
+        return cache
+
+    def test_entries_expire_after_the_ttl(self):
+        cache = self.cache()
+        cache.put("k", "v")
+        self.now += 60
+        self.assertEqual(cache.get("k"), "v")
+        self.now += 1
+        self.assertIsNone(cache.get("k"))
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1, "evictions": 0, "hit_rate": 0.5})
+
+    def test_least_recently_read_entry_is_evicted(self):
+        cache = self.cache(max_entries=2)
+        cache.put("a", "1")
+        self.now += 1
+        cache.put("b", "2")
+        self.now += 1
+        cache.get("a")
+        self.now += 1
+        cache.put("c", "3")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.get("a"), cache.get("c")), ("1", "3"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_expired_entries_are_purged_on_write(self):
+        cache = self.cache()
+        cache.put("old", "1")
+        self.now += 61
+        cache.put("new", "2")
+        (count,) = cache._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        self.assertEqual(count, 1)
+
+
+class CacheKeyTests(unittest.TestCase):
+    def test_tool_call_ids_do_not_change_the_key(self):
+        def messages(call_id):
+            call = {"id": call_id, "name": "search_contacts", "args": {"query": "ann"}}
+            return [HumanMessage(content="email ann"), AIMessage(content="", tool_calls=[call])]
+
+        model = FakeModel()
+        self.assertEqual(cache_key(model, Verdict, messages("a")), cache_key(model, Verdict, messages("b")))
+        self.assertNotEqual(cache_key(model, Verdict, messages("a")),
+                            cache_key(model, Verdict, [HumanMessage(content="email bob")]))
+
+
+class StructuredInvokeTests(unittest.TestCase):
+    def setUp(self):
+        cache = SQLiteLLMCache(":memory:", ttl=60, max_entries=10)
+        self.addCleanup(lambda: cache._conn and cache._conn.close())
+        for patcher in (mock.patch.object(llm_cache, "llm_cache", cache),
+                        mock.patch.object(llm_cache, "LLM_CACHE_NODES", {"qa"})):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.model = FakeModel()
+
+    def invoke(self, node):
+        return asyncio.run(structured_invoke(self.model, Verdict, [HumanMessage(content="review")], node))
+
+    def test_listed_node_is_answered_from_the_cache(self):
+        self.assertEqual(self.invoke("qa"), Verdict(passed=True))
+        self.assertEqual(self.invoke("qa"), Verdict(passed=True))
+        self.model.ainvoke.assert_awaited_once()
+
+    def test_other_nodes_always_call_the_model(self):
+        self.invoke("copywriter")
+        self.invoke("copywriter")
+        self.assertEqual(self.model.ainvoke.await_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import unittest
+from unittest import mock
+
+from langchain_core.runnables import RunnableLambda
+
+import models
+from models import TieredModel, get_model, node_config
+
+
+class FakeChatModel:
+    def __init__(self, name, fail=False):
+        self.model = name
+        self.temperature = 0.0
+        self.fail = fail
+
+    def with_structured_output(self, schema, **kwargs):
+        def answer(prompt):
+            if self.fail:
+                raise TimeoutError(self.model)
+            return f"{self.model}: {prompt}"
+
+        return RunnableLambda(answer)
+
+
+class NodeConfigTests(unittest.TestCase):
+    def test_defaults(self):
+        self.assertEqual(node_config("triage"), ("fast", 0.0))
+        self.assertEqual(node_config("researcher"), ("smart", 0.0))
+        self.assertEqual(node_config("copywriter"), ("smart", 0.7))
+        self.assertEqual(node_config("unknown_node"), models.DEFAULT_NODE)
+
+    @mock.patch.dict(os.environ, {"LLM_TIER_QA": "smart", "LLM_TEMPERATURE_QA": "0.2"})
+    def test_env_overrides_tier_and_temperature(self):
+        self.assertEqual(node_config("qa"), ("smart", 0.2))
+
+    @mock.patch.dict(os.environ, {"LLM_TIER_QA": "huge"})
+    def test_unknown_tier_is_rejected(self):
+        with self.assertRaisesRegex(ValueError, "LLM_TIER_QA='huge'"):
+            node_config("qa")
+
+    @mock.patch.dict(os.environ, {"LLM_FAST_MODEL": "m1", "LLM_FAST_TIMEOUT": "5", "LLM_FAST_FALLBACKS": "m2, ,m3"})
+    def test_tier_settings_come_from_env(self):
+        self.assertEqual(models._tier("fast", "default", "20", ""), models.Tier("m1", 5.0, 2, ("m2", "m3")))
+
+
+class GetModelTests(unittest.TestCase):
+    def setUp(self):
+        models._tiered_model.cache_clear()
+        self.addCleanup(models._tiered_model.cache_clear)
+        patcher = mock.patch.object(models, "_chat_model", lambda model, tier, temperature: (model, temperature))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_nodes_share_one_model_per_tier_and_temperature(self):
+        self.assertIs(get_model("triage"), get_model("qa"))
+        self.assertIsNot(get_model("triage"), get_model("copywriter"))
+        smart = get_model("copywriter")
+        self.assertEqual(smart.primary, (models.TIERS["smart"].model, 0.7))
+        self.assertEqual(len(smart.fallbacks), len(models.TIERS["smart"].fallbacks))
+
+    def test_use_model_overrides_every_node(self):
+        fake = object()
+        models.use_model(fake)
+        self.addCleanup(models.use_model, None)
+        self.assertIs(get_model("triage"), fake)
+        self.assertIs(get_model("copywriter"), fake)
+
+
+class TieredModelTests(unittest.TestCase):
+    def test_fallback_answers_when_the_primary_fails(self):
+        model = TieredModel(FakeChatModel("lite", fail=True), [FakeChatModel("flash")])
+        self.assertEqual(model.model, "lite")
+        self.assertEqual(model.with_structured_output(dict).invoke("hi"), "flash: hi")
+
+    def test_without_fallbacks_the_error_propagates(self):
+        with self.assertRaises(TimeoutError):
+            TieredModel(FakeChatModel("lite", fail=True), []).with_structured_output(dict).invoke("hi")
+
+
+if __name__ == "__main__":
+    unittest.main()
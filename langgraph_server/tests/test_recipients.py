@@ -0,0 +1,74 @@
+import json
+import unittest
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+import graph
+
+
+def contact(name, score, match="name", tone="friendly"):
+    email = f"{name.split()[0].lower()}@example.com"
+    return {"name": name, "email": email, "tone": tone, "score": score, "match": match}
+
+
+def lookup_state(hints, *lookups):
+    """A turn whose researcher made one tool call per (tool, args, result)."""
+    calls = [{"id": f"call-{i}", "name": tool, "args": args} for i, (tool, args, _) in enumerate(lookups)]
+    results = [
+        ToolMessage(content=result if isinstance(result, str) else json.dumps(result), tool_call_id=f"call-{i}")
+        for i, (_, _, result) in enumerate(lookups)
+    ]
+    messages = [HumanMessage(content="email them"), AIMessage(content="", tool_calls=calls), *results]
+    return {"messages": messages, "recipient_hints": hints}
+
+
+def search(query, *candidates):
+    return "search_contacts", {"query": query}, [{"query": query, "candidates": list(candidates)}]
+
+
+class LookupRecipientsTests(unittest.TestCase):
+    def recipients(self, state):
+        found = graph.lookup_recipients(state)
+        return found if found is None else [(r["name"], r["hint"]) for r in found]
+
+    def test_clear_top_candidates_and_group_members(self):
+        members = {"group": "colleague", "kind": "relation",
+                   "members": [{"name": "Mei Chen", "email": "mei@example.com", "tone": "casual"}]}
+        state = lookup_state(
+            ["Priya", "my manager", "colleagues"],
+            search("priya", contact("Priya Natarajan", 0.8), contact("Pria Nair", 0.45)),
+            search("manager", contact("John Smith", 0.95, "relation")),
+            ("expand_group", {"group": "colleagues"}, members),
+        )
+        self.assertEqual(self.recipients(state),
+                         [("Priya Natarajan", "priya"), ("John Smith", "manager"), ("Mei Chen", "colleagues")])
+
+    def test_close_runner_up_is_ambiguous(self):
+        state = lookup_state(["Jo"], search("jo", contact("John Smith", 0.8), contact("Johanna Berg", 0.8)))
+        self.assertIsNone(self.recipients(state))
+
+    def test_weak_or_missing_match_is_ambiguous(self):
+        self.assertIsNone(self.recipients(lookup_state(["Jon"], search("jon", contact("John Smith", 0.6)))))
+        self.assertIsNone(self.recipients(lookup_state(["Zed"], search("zed"))))
+
+    def test_several_relation_matches_are_ambiguous(self):
+        state = lookup_state(["a colleague"], search("colleague", contact("Mei Chen", 0.95, "relation"),
+                                                     contact("Dan Okafor", 0.95, "relation")))
+        self.assertIsNone(self.recipients(state))
+
+    def test_search_for_something_the_user_did_not_ask_for_is_ambiguous(self):
+        state = lookup_state(["Priya"], search("Lucas", contact("Lucas Martin", 1.0)))
+        self.assertIsNone(self.recipients(state))
+
+    def test_tool_errors_and_other_tools_fall_back(self):
+        error = ("search_contacts", {"query": "priya"}, "Error fetching contacts: 500")
+        self.assertIsNone(self.recipients(lookup_state(["Priya"], error)))
+        inbox = ("get_latest_emails", {}, [])
+        self.assertIsNone(self.recipients(lookup_state(["Priya"], inbox)))
+
+    def test_no_lookups_this_turn_falls_back(self):
+        self.assertIsNone(self.recipients({"messages": [HumanMessage(content="send")], "recipient_hints": []}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import graph
+
+
+class RecipientKeyTests(unittest.TestCase):
+    def test_fillers_case_accents_and_plurals_collapse(self):
+        self.assertEqual(graph.recipient_key("All my Colleagues"), "colleague")
+        self.assertEqual(graph.recipient_key("colleague"), "colleague")
+        self.assertEqual(graph.recipient_key("the Companies"), "company")
+        self.assertEqual(graph.recipient_key("Zoë  Müller!"), "zoe muller")
+
+    def test_emails_are_kept_whole(self):
+        self.assertEqual(graph.recipient_key("Priya@Example.com"), "priya@example.com")
+
+
+class FanOutDraftsTests(unittest.TestCase):
+    def test_speculative_draft_pairs_with_a_differently_phrased_hint(self):
+        draft = {"subject": "Hello", "body": "Hi {name}, see you.", "tone": "professional"}
+        state = {
+            "messages": [],
+            "recipients": [{"name": "Mei Chen", "email": "mei@example.com", "tone": "formal", "hint": "colleagues"}],
+            "speculative_drafts": {"my colleague": draft},
+        }
+        [send] = graph.fan_out_drafts(state)
+        self.assertEqual(send.arg["draft_email"]["body"], "Hi Mei, see you.")
+        self.assertEqual(send.arg["draft_email"]["to"], "mei@example.com")
+
+
+class ClaimSpeculativeDraftsTests(unittest.TestCase):
+    def run_claim(self, recipients):
+        async def scenario():
+            drafted = asyncio.Event()
+
+            async def fake_node(state):
+                drafted.set()
+                await asyncio.sleep(0.01)
+                return {"speculative_drafts": {"priya": {"subject": "s", "body": "b", "tone": "professional"}}}
+
+            with mock.patch.object(graph, "speculative_draft_node", fake_node):
+                key = graph.start_speculative_drafts({"recipient_hints": ["Priya"]})
+            await drafted.wait()
+            state = {"speculation": key, "recipient_hints": ["Priya"]}
+            update = await graph.claim_speculative_drafts(state, recipients)
+            self.assertNotIn(key, graph._speculations)
+            return update
+
+        return asyncio.run(scenario())
+
+    def test_usable_speculation_is_awaited(self):
+        update = self.run_claim([{"name": "Priya N", "email": "p@example.com", "tone": "formal", "hint": "priya"}])
+        self.assertEqual(list(update["speculative_drafts"]), ["priya"])
+        self.assertEqual([t["node"] for t in update["timings"]], ["speculative_draft"])
+
+    def test_tone_mismatch_cancels_the_speculation(self):
+        update = self.run_claim([{"name": "Priya N", "email": "p@example.com", "tone": "warm", "hint": "priya"}])
+        self.assertEqual(update, {})
+
+    def test_missing_speculation_is_a_no_op(self):
+        update = asyncio.run(graph.claim_speculative_drafts({"speculation": "gone"}, []))
+        self.assertEqual(update, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
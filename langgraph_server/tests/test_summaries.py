@@ -0,0 +1,70 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+import summaries
+from llm_cache import SQLiteLLMCache
+from summaries import EmailSummaries, EmailSummary, build_digest, message_key
+
+
+def email(email_id, body="Can we meet on Friday?"):
+    return {"id": email_id, "from": "ann@example.com", "subject": "Meeting", "date": "Mon", "body": body,
+            "snippet": f"snippet {email_id}"}
+
+
+async def fake_summarize(model, schema, messages, node):
+    batch = json.loads(messages[-1].content)
+    return EmailSummaries(summaries=[EmailSummary(id=e["id"], summary=f"summary of {e['body']}") for e in batch])
+
+
+class SummarizeEmailsTests(unittest.TestCase):
+    def setUp(self):
+        cache = SQLiteLLMCache(":memory:", ttl=60, max_entries=100)
+        self.addCleanup(lambda: cache._conn and cache._conn.close())
+        self.llm = mock.AsyncMock(side_effect=fake_summarize)
+        for patcher in (mock.patch.object(summaries, "summary_cache", cache),
+                        mock.patch.object(summaries, "structured_invoke", self.llm),
+                        mock.patch.object(summaries, "EMAIL_SUMMARY_BATCH", 2)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def digest(self, emails):
+        return {d["id"]: d["summary"] for d in asyncio.run(build_digest("model", emails))}
+
+    def test_misses_are_summarized_in_batches(self):
+        digest = self.digest([email("1"), email("2"), email("3")])
+        self.assertEqual(digest["3"], "summary of Can we meet on Friday?")
+        self.assertEqual(self.llm.await_count, 2)
+
+    def test_hits_skip_the_llm(self):
+        self.digest([email("1"), email("2")])
+        self.llm.reset_mock()
+        self.assertEqual(self.digest([email("1"), email("2")])["2"], "summary of Can we meet on Friday?")
+        self.llm.assert_not_awaited()
+        self.assertEqual(summaries.summary_cache.stats()["hits"], 2)
+
+    def test_only_new_or_changed_messages_are_summarized(self):
+        self.digest([email("1"), email("2")])
+        self.llm.reset_mock()
+        digest = self.digest([email("1"), email("2", body="Moved to Monday."), email("3")])
+        self.assertEqual(digest["2"], "summary of Moved to Monday.")
+        [call] = self.llm.await_args_list
+        self.assertEqual([e["id"] for e in json.loads(call.args[2][-1].content)], ["2", "3"])
+
+    def test_failed_batch_falls_back_to_the_snippet_uncached(self):
+        self.llm.side_effect = RuntimeError("quota")
+        self.assertEqual(self.digest([email("1")]), {"1": "snippet 1"})
+        self.llm.side_effect = fake_summarize
+        self.assertEqual(self.digest([email("1")]), {"1": "summary of Can we meet on Friday?"})
+
+
+class MessageKeyTests(unittest.TestCase):
+    def test_key_changes_with_the_content(self):
+        self.assertEqual(message_key(email("1")), message_key(email("1")))
+        self.assertNotEqual(message_key(email("1")), message_key(email("1", body="Edited")))
+        self.assertTrue(message_key(email("1")).startswith("1:"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from langchain_core.messages import AIMessage
+
+import graph
+from tool_cache import TTLCache
+
+
+class TTLCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+        patcher = mock.patch("tool_cache.time.monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_entries_expire_after_the_ttl(self):
+        cache = TTLCache(ttl=30)
+        cache.set("k", "v")
+        self.now += 29
+        self.assertEqual(cache.get("k"), "v")
+        self.now += 2
+        self.assertIsNone(cache.get("k"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TTLCache(ttl=30, max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.get("a"), cache.get("c")), (1, 3))
+
+    def test_zero_ttl_disables_the_cache(self):
+        cache = TTLCache(ttl=0)
+        cache.set("k", "v")
+        self.assertIsNone(cache.get("k"))
+
+
+class RunToolTests(unittest.TestCase):
+    def setUp(self):
+        graph.tool_cache.clear()
+        self.addCleanup(graph.tool_cache.clear)
+        patcher = mock.patch.object(graph, "execute_tool", mock.AsyncMock(return_value="[contacts]"))
+        self.execute = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_tool(self, state, args=None):
+        return asyncio.run(graph.run_tool(state, "search_contacts", args or {"query": "priya"}))
+
+    def test_memo_hit_skips_the_cache_and_the_backend(self):
+        memo = {'search_contacts:{"query": "priya"}': "[memo]"}
+        self.assertEqual(self.run_tool({"tool_memo": memo}), ("[memo]", {}))
+        self.execute.assert_not_called()
+
+    def test_backend_result_is_memoized_and_cached_per_user(self):
+        result, memo = self.run_tool({"user_id": 1}, {"query": "priya"})
+        self.assertEqual((result, memo), ("[contacts]", {'search_contacts:{"query": "priya"}': "[contacts]"}))
+        self.assertEqual(self.run_tool({"user_id": 1})[0], "[contacts]")
+        self.execute.assert_awaited_once()
+        self.run_tool({"user_id": 2})
+        self.assertEqual(self.execute.await_count, 2)
+
+    def test_argument_order_does_not_change_the_key(self):
+        self.run_tool({"user_id": 1}, {"query": "priya", "limit": 5})
+        self.run_tool({"user_id": 1}, {"limit": 5, "query": "priya"})
+        self.execute.assert_awaited_once()
+
+    def test_errors_are_not_cached(self):
+        self.execute.side_effect = [RuntimeError("down"), "[contacts]"]
+        result, memo = self.run_tool({"user_id": 1})
+        self.assertTrue(result.startswith(graph.TOOLS["search_contacts"].error_prefix))
+        self.assertEqual(memo, {})
+        self.assertEqual(self.run_tool({"user_id": 1})[0], "[contacts]")
+
+
+class ResearcherToolsNodeTests(unittest.TestCase):
+    def test_identical_calls_in_one_turn_run_once(self):
+        calls = [
+            {"id": "a", "name": "search_contacts", "args": {"query": "priya"}},
+            {"id": "b", "name": "search_contacts", "args": {"query": "priya"}},
+            {"id": "c", "name": "expand_group", "args": {"group": "family"}},
+        ]
+        run_tool = mock.AsyncMock(side_effect=lambda state, name, args: (f"{name} result", {name: "memo"}))
+        with mock.patch.object(graph, "run_tool", run_tool):
+            update = asyncio.run(graph.researcher_tools_node({"messages": [AIMessage(content="", tool_calls=calls)]}))
+        self.assertEqual(run_tool.await_count, 2)
+        self.assertEqual([(m.tool_call_id, m.content) for m in update["messages"]],
+                         [("a", "search_contacts result"), ("b", "search_contacts result"), ("c", "expand_group result")])
+        self.assertEqual(update["tool_memo"], {"search_contacts": "memo", "expand_group": "memo"})
+
+
+if __name__ == "__main__":
+    unittest.main()
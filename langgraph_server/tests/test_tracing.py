@@ -0,0 +1,96 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import tracing
+from tracing import Metrics, merge_timings, record_http, tool_span, traced_node
+
+try:
+    from starlette.testclient import TestClient
+
+    import metrics_app
+except ImportError:  # starlette ships with the LangGraph server
+    metrics_app = None
+
+
+class MergeTimingsTests(unittest.TestCase):
+    def test_records_append_within_a_run(self):
+        self.assertEqual(merge_timings([{"node": "a"}], [{"node": "b"}]), [{"node": "a"}, {"node": "b"}])
+        self.assertEqual(merge_timings(None, [{"node": "a"}]), [{"node": "a"}])
+        self.assertEqual(merge_timings([{"node": "a"}], None), [{"node": "a"}])
+
+    def test_run_start_replaces_the_previous_run(self):
+        new_run = [{"node": "triage", "run_start": True}]
+        self.assertEqual(merge_timings([{"node": "a"}, {"node": "b"}], new_run), new_run)
+
+
+class MetricsTests(unittest.TestCase):
+    def test_render_counters_and_cumulative_histograms(self):
+        registry = Metrics()
+        registry.inc("runs_total", {"node": "qa"})
+        registry.inc("runs_total", {"node": "qa"}, 2)
+        registry.observe("wall_ms", {}, 7)
+        registry.observe("wall_ms", {}, 40000)
+        lines = registry.render().splitlines()
+        self.assertEqual(lines[:2], ["# TYPE runs_total counter", 'runs_total{node="qa"} 3'])
+        self.assertIn("# TYPE wall_ms histogram", lines)
+        self.assertIn('wall_ms_bucket{le="5"} 0', lines)
+        self.assertIn('wall_ms_bucket{le="10"} 1', lines)
+        self.assertIn('wall_ms_bucket{le="30000"} 1', lines)
+        self.assertIn('wall_ms_bucket{le="+Inf"} 2', lines)
+        self.assertEqual(lines[-2:], ["wall_ms_sum 40007.0", "wall_ms_count 2"])
+
+
+class TracedNodeTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(tracing, "metrics", Metrics())
+        self.metrics = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_sync_node_record_collects_http_and_tool_calls(self):
+        def node(state):
+            record_http("GET", "http://backend/emails/?max_results=10", 12.345, 200)
+            with tool_span("get_latest_emails") as span:
+                span["source"] = "cache"
+            return {"answer": 42, "timings": [{"node": "background"}]}
+
+        update = traced_node("researcher", node, run_start=True)({})
+        background, record = update["timings"]
+        self.assertEqual((update["answer"], background), (42, {"node": "background"}))
+        self.assertEqual((record["node"], record["run_start"]), ("researcher", True))
+        self.assertEqual(record["http"], [{"method": "GET", "path": "/emails/", "status": 200, "ms": 12.35}])
+        self.assertEqual([(t["tool"], t["source"]) for t in record["tools"]], [("get_latest_emails", "cache")])
+
+    def test_failed_async_node_is_counted_and_reraised(self):
+        async def node(state):
+            raise ValueError("bad draft")
+
+        with self.assertLogs("supermail.trace", "INFO") as logs, self.assertRaises(ValueError):
+            asyncio.run(traced_node("qa", node)({}))
+        self.assertIn('"error": "ValueError"', logs.output[0])
+        self.assertIn('agent_node_errors_total{node="qa"} 1', self.metrics.render())
+
+    def test_non_dict_updates_are_returned_untouched(self):
+        self.assertEqual(traced_node("router", lambda state: ["send"])({}), ["send"])
+
+    def test_calls_outside_a_node_only_feed_metrics(self):
+        record_http("POST", "http://backend/send/", 5, 200)
+        self.assertIn('agent_backend_http_ms_count{method="POST",path="/send/"} 1', self.metrics.render())
+
+
+@unittest.skipIf(metrics_app is None, "starlette is not installed")
+class MetricsAppTests(unittest.TestCase):
+    def test_metrics_route_serves_prometheus_text(self):
+        registry = Metrics()
+        registry.inc("agent_node_runs_total", {"node": "triage"})
+        with mock.patch.object(metrics_app, "metrics", registry):
+            response = TestClient(metrics_app.app).get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn('agent_node_runs_total{node="triage"} 1', response.text)
+        for gauge in ("agent_fast_path", "agent_llm_cache", "agent_email_summary_cache"):
+            self.assertIn(f"# TYPE {gauge} gauge", response.text)
+
+
+if __name__ == "__main__":
+    unittest.main()
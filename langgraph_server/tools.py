@@ -0,0 +1,74 @@
+"""
+Researcher tool registry.
+
+Each backend tool is defined once: an async function whose signature and
+docstring are what the LLM sees (context such as the user's token or the
+chat model is injected at call time and hidden from the model), registered
+with the error prefix returned to the LLM when the call fails. The
+researcher binds TOOLS directly and graph.run_tool executes them by name.
+"""
+
+import inspect
+import json
+from typing import Annotated, Any, NamedTuple
+from urllib.parse import quote
+
+from langchain_core.tools import BaseTool, InjectedToolArg, tool
+
+from backend_client import backend
+from summaries import build_digest
+
+
+class BackendTool(NamedTuple):
+    tool: BaseTool
+    error_prefix: str
+    context: frozenset  # injected parameters, filled in by execute_tool
+
+
+TOOLS: dict[str, BackendTool] = {}
+
+
+def backend_tool(error_prefix: str):
+    """Register an async tool function; InjectedToolArg parameters become its context."""
+    def register(fn):
+        registered = tool(fn)
+        context = frozenset(inspect.signature(fn).parameters) - frozenset(registered.tool_call_schema.model_fields)
+        TOOLS[registered.name] = BackendTool(registered, error_prefix, context)
+        return registered
+    return register
+
+
+async def execute_tool(name: str, args: dict, context: dict) -> str:
+    """Run a registered tool with the context it declares; raises on backend or validation errors."""
+    spec = TOOLS[name]
+    return await spec.tool.ainvoke({**args, **{k: v for k, v in context.items() if k in spec.context}})
+
+
+@backend_tool("Error fetching emails")
+async def get_latest_emails(token: Annotated[str, InjectedToolArg], model: Annotated[Any, InjectedToolArg]) -> str:
+    """Fetch the user's latest emails from the inbox, each with a short summary."""
+    response = await backend.request("GET", "/emails/", token, params={"max_results": 10})
+    response.raise_for_status()
+    emails = response.json().get("emails", [])[:10]
+    return json.dumps(await build_digest(model, emails))
+
+
+@backend_tool("Error fetching contacts")
+async def search_contacts(query: str, token: Annotated[str, InjectedToolArg]) -> str:
+    """Find contacts matching names or relations, e.g. "John, my manager, colleagues".
+    Separate multiple recipients with commas. Returns the best candidates with match scores."""
+    # Server-side fuzzy resolution returns only the top candidates per name/relation
+    queries = [q.strip() for q in query.split(",") if q.strip()]
+    response = await backend.request("GET", "/contactapi/contacts/resolve/", token, params={"q": queries})
+    response.raise_for_status()
+    return json.dumps(response.json().get("results", []))
+
+
+@backend_tool("Error expanding group")
+async def expand_group(group: str, token: Annotated[str, InjectedToolArg]) -> str:
+    """Get every member of a contact group, with their tone. Groups are relations such as
+    "colleagues", "family" or "clients", or distribution lists the user created. Use this when
+    the user addresses a whole group ("all my colleagues"), one call per group."""
+    response = await backend.request("GET", f"/contactapi/groups/{quote(group.strip(), safe='')}/expand/", token)
+    response.raise_for_status()
+    return json.dumps(response.json())
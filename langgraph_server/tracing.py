@@ -0,0 +1,250 @@
+"""
+Per-node tracing for the agent graph.
+
+traced_node() wraps every node: it records wall time, LLM calls, input and
+output tokens, retries, backend HTTP calls and tool calls made while the node
+runs. Each node's record is
+- appended to the run's `timings` in graph state (the per-run breakdown),
+- logged as one JSON line on the "supermail.trace" logger, and
+- aggregated into process-wide metrics served in Prometheus text format by
+  metrics_app.py.
+"""
+
+import inspect
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+logger = logging.getLogger("supermail.trace")
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+def merge_timings(left: list | None, right: list | None) -> list:
+    """Append node records; a record flagged run_start begins a new run."""
+    if not right:
+        return left or []
+    if right[0].get("run_start"):
+        return list(right)
+    return (left or []) + right
+
+
+# --- Process-wide metrics ---
+class Metrics:
+    """Minimal counter/histogram registry rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name: str, labels: dict, value: float = 1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, labels: dict, value: float):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            buckets, total, count = self._histograms.get(key, ([0] * len(LATENCY_BUCKETS_MS), 0.0, 0))
+            buckets = [b + (value <= bound) for b, bound in zip(buckets, LATENCY_BUCKETS_MS)]
+            self._histograms[key] = (buckets, total + value, count + 1)
+
+    def render(self) -> str:
+        def fmt(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}" if pairs else ""
+
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+        for name in sorted({n for (n, _), _ in counters}):
+            lines.append(f"# TYPE {name} counter")
+            lines += [f"{n}{fmt(labels)} {value}" for (n, labels), value in counters if n == name]
+        for name in sorted({n for (n, _), _ in histograms}):
+            lines.append(f"# TYPE {name} histogram")
+            for (n, labels), (buckets, total, count) in histograms:
+                if n != name:
+                    continue
+                for bound, cumulative in zip(LATENCY_BUCKETS_MS, buckets):
+                    lines.append(f"{n}_bucket{fmt(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{n}_bucket{fmt(labels, [('le', '+Inf')])} {count}")
+                lines.append(f"{n}_sum{fmt(labels)} {round(total, 3)}")
+                lines.append(f"{n}_count{fmt(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+# --- Per-node collection ---
+class NodeTrace:
+    def __init__(self, node: str):
+        self.node = node
+        self.llm_calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.retries = 0
+        self.llm_errors = 0
+        self.http = []
+        self.tools = []
+        self._lock = threading.Lock()
+
+    def to_record(self, wall_ms: float, run_start: bool, error: str | None) -> dict:
+        record = {
+            "node": self.node,
+            "wall_ms": round(wall_ms, 2),
+            "llm_calls": self.llm_calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "retries": self.retries,
+            "http": self.http,
+            "tools": self.tools,
+        }
+        if self.llm_errors:
+            record["llm_errors"] = self.llm_errors
+        if error:
+            record["error"] = error
+        if run_start:
+            record["run_start"] = True
+        return record
+
+
+_current = ContextVar("supermail_node_trace", default=None)
+
+
+class UsageCallback(BaseCallbackHandler):
+    """Feeds LLM token usage and retries into the active NodeTrace."""
+
+    def __init__(self, trace: NodeTrace):
+        self.trace = trace
+
+    def on_llm_end(self, response, **kwargs):
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+        with self.trace._lock:
+            self.trace.llm_calls += 1
+            self.trace.input_tokens += input_tokens
+            self.trace.output_tokens += output_tokens
+
+    def on_llm_error(self, error, **kwargs):
+        with self.trace._lock:
+            self.trace.llm_errors += 1
+
+    def on_retry(self, retry_state, **kwargs):
+        with self.trace._lock:
+            self.trace.retries += 1
+
+
+# Any LLM call made while this var is set gets the handler attached automatically
+_usage_handler = ContextVar("supermail_usage_handler", default=None)
+register_configure_hook(_usage_handler, inheritable=True)
+
+
+def record_http(method: str, url: str, elapsed_ms: float, status: int | None):
+    """Attribute a backend HTTP call to the running node."""
+    path = "/" + url.split("://", 1)[-1].split("/", 1)[-1].split("?", 1)[0]
+    metrics.observe("agent_backend_http_ms", {"method": method, "path": path}, elapsed_ms)
+    trace = _current.get()
+    if trace is not None:
+        with trace._lock:
+            trace.http.append({"method": method, "path": path, "status": status, "ms": round(elapsed_ms, 2)})
+
+
+@contextmanager
+def tool_span(name: str):
+    """Time a tool execution inside the running node. Yields a dict for extra fields."""
+    extra = {}
+    started = time.perf_counter()
+    try:
+        yield extra
+    finally:
+        elapsed_ms = 1000 * (time.perf_counter() - started)
+        metrics.observe("agent_tool_ms", {"tool": name}, elapsed_ms)
+        trace = _current.get()
+        if trace is not None:
+            with trace._lock:
+                trace.tools.append({"tool": name, "ms": round(elapsed_ms, 2), **extra})
+
+
+def traced_node(name: str, fn, run_start: bool = False):
+    """
+    Wrap a graph node so its timings land in state["timings"].
+
+    ``run_start`` marks nodes that begin a run (the entry points); their
+    record replaces the previous run's timings instead of appending.
+    Coroutine nodes get an async wrapper so they stay on the event loop.
+    """
+    if inspect.iscoroutinefunction(fn):
+        @wraps(fn)
+        async def async_wrapper(state, *args, **kwargs):
+            trace = NodeTrace(name)
+            trace_token = _current.set(trace)
+            handler_token = _usage_handler.set(UsageCallback(trace))
+            started = time.perf_counter()
+            try:
+                update = await fn(state, *args, **kwargs)
+                return _attach(update, trace, started, run_start, None)
+            except Exception as e:
+                _finish(trace, started, run_start, type(e).__name__)
+                raise
+            finally:
+                _usage_handler.reset(handler_token)
+                _current.reset(trace_token)
+
+        return async_wrapper
+
+    @wraps(fn)
+    def wrapper(state, *args, **kwargs):
+        trace = NodeTrace(name)
+        trace_token = _current.set(trace)
+        handler_token = _usage_handler.set(UsageCallback(trace))
+        started = time.perf_counter()
+        try:
+            update = fn(state, *args, **kwargs)
+            return _attach(update, trace, started, run_start, None)
+        except Exception as e:
+            _finish(trace, started, run_start, type(e).__name__)
+            raise
+        finally:
+            _usage_handler.reset(handler_token)
+            _current.reset(trace_token)
+
+    return wrapper
+
+
+def _finish(trace: NodeTrace, started: float, run_start: bool, error: str | None) -> dict:
+    wall_ms = 1000 * (time.perf_counter() - started)
+    record = trace.to_record(wall_ms, run_start, error)
+    labels = {"node": trace.node}
+    metrics.observe("agent_node_wall_ms", labels, wall_ms)
+    metrics.inc("agent_node_runs_total", labels)
+    metrics.inc("agent_llm_calls_total", labels, trace.llm_calls)
+    metrics.inc("agent_llm_input_tokens_total", labels, trace.input_tokens)
+    metrics.inc("agent_llm_output_tokens_total", labels, trace.output_tokens)
+    metrics.inc("agent_llm_retries_total", labels, trace.retries)
+    if error:
+        metrics.inc("agent_node_errors_total", labels)
+    logger.info(json.dumps({"event": "node", **record}))
+    return record
+
+
+def _attach(update, trace: NodeTrace, started: float, run_start: bool, error: str | None):
+    record = _finish(trace, started, run_start, error)
+    if isinstance(update, dict):
+        # Keep records the node merged in from elsewhere (a background task)
+        return {**update, "timings": [*(update.get("timings") or []), record]}
+    # Command / Send lists are returned untouched
+    return update